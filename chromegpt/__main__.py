@@ -1,7 +1,9 @@
 """Chrome-GPT: An AutoGPT agent that interacts with Chrome"""
+from typing import Optional
+
 import click
 
-from chromegpt.main import run_chromegpt
+from chromegpt.agent.registry import AGENT_REGISTRY
 
 
 @click.command()
@@ -11,7 +13,7 @@ from chromegpt.main import run_chromegpt
     "-a",
     help="The agent type to use",
     default="zero-shot",
-    type=click.Choice(["auto-gpt", "baby-agi", "zero-shot"], case_sensitive=False),
+    type=click.Choice(list(AGENT_REGISTRY), case_sensitive=False),
 )
 @click.option("--model", "-m", help="The model to use", default="gpt-3.5-turbo")
 @click.option("--headless", help="Run in headless mode", is_flag=True)
@@ -21,6 +23,124 @@ from chromegpt.main import run_chromegpt
     help="Run in human-in-loop mode, only available when using auto-gpt agent",
     is_flag=True,
 )
+@click.option(
+    "--prefetch",
+    help="Number of google search results to preload in background tabs",
+    default=0,
+    type=int,
+)
+@click.option(
+    "--session-dir",
+    help="Directory to persist cookies and site storage between runs",
+    default=None,
+)
+@click.option(
+    "--tenant",
+    help="Isolate persisted sessions per tenant",
+    default="default",
+)
+@click.option(
+    "--observation-budget",
+    help="Approximate token limit for each website description",
+    default=None,
+    type=int,
+)
+@click.option(
+    "--parallel-sessions",
+    help=(
+        "Extra browser sessions for running independent actions or tasks"
+        " concurrently, only available when using zero-shot or baby-agi agent"
+    ),
+    default=0,
+    type=int,
+)
+@click.option(
+    "--page-model",
+    help=(
+        "How pages are read: dom (XPath extraction) or accessibility (Chrome's"
+        " accessibility tree)"
+    ),
+    default="dom",
+    type=click.Choice(["dom", "accessibility"], case_sensitive=False),
+)
+@click.option(
+    "--locator-cache",
+    help="Directory to cache the locators of buttons and form fields per site",
+    default=None,
+)
+@click.option(
+    "--trajectory-cache",
+    help=(
+        "Directory to record successful plans and replay them for similar tasks,"
+        " only available when using zero-shot agent"
+    ),
+    default=None,
+)
+@click.option(
+    "--llm-requests-per-minute",
+    help="Request rate limit per model for all LLM calls",
+    default=None,
+    type=int,
+)
+@click.option(
+    "--llm-tokens-per-minute",
+    help="Token rate limit per model for all LLM calls",
+    default=None,
+    type=int,
+)
+@click.option(
+    "--llm-concurrency",
+    help="Maximum concurrent LLM requests per model",
+    default=None,
+    type=int,
+)
+@click.option(
+    "--grid",
+    help=(
+        "Comma-separated Selenium Grid / WebDriver endpoints, sessions go to the"
+        " least loaded one and move to another if they die"
+    ),
+    default=None,
+)
+@click.option(
+    "--grid-capacity",
+    help="Maximum concurrent browser sessions per grid endpoint",
+    default=4,
+    type=int,
+)
+@click.option(
+    "--fast-model",
+    help=(
+        "Cheaper model for simple steps, escalating to --model when its output"
+        " doesn't parse or hedges"
+    ),
+    default=None,
+)
+@click.option(
+    "--fast-steps",
+    help=(
+        "Comma-separated step types for the fast model: planning, extraction,"
+        " navigation, form"
+    ),
+    default="navigation,extraction,form",
+)
+@click.option(
+    "--dedup-boilerplate",
+    help=(
+        "Leave texts, links and buttons repeated on every page of a site out of"
+        " the page descriptions after the first page"
+    ),
+    is_flag=True,
+)
+@click.option(
+    "--prioritize-every",
+    help=(
+        "Re-prioritize the task list every N batches of tasks, only available when"
+        " using baby-agi agent"
+    ),
+    default=1,
+    type=int,
+)
 def main(
     task: str,
     agent: str,
@@ -28,8 +148,28 @@ def main(
     headless: bool = False,
     verbose: bool = False,
     human_in_loop: bool = False,
+    prefetch: int = 0,
+    session_dir: Optional[str] = None,
+    tenant: str = "default",
+    observation_budget: Optional[int] = None,
+    parallel_sessions: int = 0,
+    page_model: str = "dom",
+    locator_cache: Optional[str] = None,
+    trajectory_cache: Optional[str] = None,
+    llm_requests_per_minute: Optional[int] = None,
+    llm_tokens_per_minute: Optional[int] = None,
+    llm_concurrency: Optional[int] = None,
+    grid: Optional[str] = None,
+    grid_capacity: int = 4,
+    fast_model: Optional[str] = None,
+    fast_steps: str = "navigation,extraction,form",
+    dedup_boilerplate: bool = False,
+    prioritize_every: int = 1,
 ) -> str:
     """Run ChromeGPT: An AutoGPT agent that interacts with Chrome"""
+    # Imported here so that --help doesn't load langchain and selenium
+    from chromegpt.main import run_chromegpt
+
     return run_chromegpt(
         task=task,
         model=model,
@@ -37,6 +177,23 @@ def main(
         headless=headless,
         verbose=verbose,
         continuous=not human_in_loop,
+        prefetch_top_k=prefetch,
+        session_dir=session_dir,
+        tenant=tenant,
+        observation_budget=observation_budget,
+        parallel_sessions=parallel_sessions,
+        page_model=page_model,
+        locator_cache_dir=locator_cache,
+        trajectory_dir=trajectory_cache,
+        llm_requests_per_minute=llm_requests_per_minute,
+        llm_tokens_per_minute=llm_tokens_per_minute,
+        llm_concurrency=llm_concurrency,
+        grid_endpoints=grid,
+        grid_capacity=grid_capacity,
+        fast_model=fast_model,
+        fast_steps=fast_steps,
+        dedup_boilerplate=dedup_boilerplate,
+        prioritize_every=prioritize_every,
     )
 
 
@@ -1,38 +1,57 @@
 """Module for the AutoGPT agent. Optimized for GPT-4 use."""
-from typing import List
+from typing import List, Optional
 
 from langchain import LLMChain
-from langchain.chat_models import ChatOpenAI
+from langchain.chat_models.base import BaseChatModel
 from langchain.experimental import AutoGPT
-from langchain.experimental.autonomous_agents.autogpt.output_parser import (
-    AutoGPTOutputParser,
+from langchain.experimental.autonomous_agents.autogpt.prompt_generator import (
+    FINISH_NAME,
 )
 from langchain.tools.human.tool import HumanInputRun
 
+from chromegpt.agent.autogpt.history import MessageHistory
 from chromegpt.agent.autogpt.prompt import AutoGPTPrompt
 from chromegpt.agent.chromegpt_agent import ChromeGPTAgent
+from chromegpt.agent.repair import ActionRepairer, RepairingAutoGPTOutputParser
+from chromegpt.agent.routing import ModelRouter, RoutedChatModel
+from chromegpt.agent.streaming import EarlyStopChatOpenAI
 from chromegpt.agent.utils import get_agent_tools, get_vectorstore
+from chromegpt.tools.selenium import SeleniumWrapper
 
 
 class AutoGPTAgent(ChromeGPTAgent):
     """AutoGPT agent for ChromeGPT. Note that this agent is optimized for GPT-4 use."""
 
     def __init__(
-        self, model: str = "gpt-4", verbose: bool = False, continuous: bool = True
+        self,
+        model: str = "gpt-4",
+        verbose: bool = False,
+        continuous: bool = True,
+        selenium: Optional[SeleniumWrapper] = None,
+        router: Optional[ModelRouter] = None,
     ) -> None:
         """Initialize the ZeroShotAgent."""
+        if router:
+            llm: BaseChatModel = RoutedChatModel(router=router)
+        else:
+            llm = EarlyStopChatOpenAI(model_name=model, temperature=0)  # type: ignore
         self.agent = self._get_autogpt_agent(
-            llm=ChatOpenAI(model_name=model, temperature=0),  # type: ignore
+            llm=llm,
             verbose=verbose,
             human_in_the_loop=not continuous,
+            selenium=selenium,
         )
         self.model = model
 
     def _get_autogpt_agent(
-        self, llm: ChatOpenAI, verbose: bool, human_in_the_loop: bool = False
+        self,
+        llm: BaseChatModel,
+        verbose: bool,
+        human_in_the_loop: bool = False,
+        selenium: Optional[SeleniumWrapper] = None,
     ) -> AutoGPT:
         vectorstore = get_vectorstore()
-        tools = get_agent_tools()
+        tools = get_agent_tools(selenium)
         ai_name = "Jarvis"
 
         prompt = AutoGPTPrompt(
@@ -48,10 +67,14 @@ class AutoGPTAgent(ChromeGPTAgent):
             ai_name,
             vectorstore.as_retriever(),  # type: ignore
             chain,
-            AutoGPTOutputParser(),
+            RepairingAutoGPTOutputParser(
+                repairer=ActionRepairer(tools, extra_names=[FINISH_NAME])
+            ),
             tools,
             feedback_tool=human_feedback_tool,
         )
+        # Keep page observations compressed and deduplicated instead of in full
+        agent.full_message_history = MessageHistory()  # type: ignore
         # Set verbose to be true
         agent.chain.verbose = verbose
         return agent
@@ -0,0 +1,183 @@
+"""Compact message history for long AutoGPT runs."""
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import zlib
+from collections import OrderedDict, deque
+from typing import (
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+    overload,
+)
+
+from langchain.schema import BaseMessage, HumanMessage
+
+
+class ObservationStore:
+    """Content-addressed store of message contents.
+
+    Every distinct text is kept once, zlib compressed, until every ``put`` of it
+    has been released. Once the compressed blobs take more than
+    ``max_memory_bytes`` the least recently used ones are written to ``spill_dir``
+    (a temporary directory by default, removed with the store). The last
+    ``cache_size`` texts are also kept decompressed.
+    """
+
+    def __init__(
+        self,
+        max_memory_bytes: int = 2_000_000,
+        spill_dir: Optional[str] = None,
+        cache_size: int = 8,
+    ) -> None:
+        self.max_memory_bytes = max_memory_bytes
+        self.spill_dir = spill_dir
+        self.cache_size = cache_size
+        self.memory_bytes = 0
+        self._blobs: "OrderedDict[str, bytes]" = OrderedDict()
+        self._spilled: Set[str] = set()
+        self._refs: Dict[str, int] = {}
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._owns_spill_dir = False
+
+    def put(self, text: str) -> str:
+        """Store ``text``, returns its reference."""
+        ref = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        if ref in self._blobs:
+            self._blobs.move_to_end(ref)
+        elif ref not in self._spilled:
+            blob = zlib.compress(text.encode("utf-8"))
+            self._blobs[ref] = blob
+            self.memory_bytes += len(blob)
+            self._spill()
+        self._refs[ref] = self._refs.get(ref, 0) + 1
+        self._remember(ref, text)
+        return ref
+
+    def release(self, ref: str) -> None:
+        """Release one ``put`` of ``ref``, the text is dropped with the last one."""
+        count = self._refs.get(ref, 0) - 1
+        if count > 0:
+            self._refs[ref] = count
+            return
+        self._refs.pop(ref, None)
+        self._cache.pop(ref, None)
+        if ref in self._blobs:
+            self.memory_bytes -= len(self._blobs.pop(ref))
+        elif ref in self._spilled:
+            self._spilled.discard(ref)
+            try:
+                os.remove(self._path(ref))
+            except OSError:
+                pass
+
+    def get(self, ref: str) -> str:
+        if ref in self._cache:
+            self._cache.move_to_end(ref)
+            return self._cache[ref]
+        if ref in self._blobs:
+            self._blobs.move_to_end(ref)
+            blob = self._blobs[ref]
+        else:
+            with open(self._path(ref), "rb") as f:
+                blob = f.read()
+        text = zlib.decompress(blob).decode("utf-8")
+        self._remember(ref, text)
+        return text
+
+    def close(self) -> None:
+        if self._owns_spill_dir and self.spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+
+    def __del__(self) -> None:
+        self.close()
+
+    def _remember(self, ref: str, text: str) -> None:
+        self._cache[ref] = text
+        self._cache.move_to_end(ref)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _spill(self) -> None:
+        # Keep at least the newest blob in memory
+        while self.memory_bytes > self.max_memory_bytes and len(self._blobs) > 1:
+            ref, blob = self._blobs.popitem(last=False)
+            if self.spill_dir is None:
+                self.spill_dir = tempfile.mkdtemp(prefix="chromegpt-history-")
+                self._owns_spill_dir = True
+            with open(self._path(ref), "wb") as f:
+                f.write(blob)
+            self._spilled.add(ref)
+            self.memory_bytes -= len(blob)
+
+    def _path(self, ref: str) -> str:
+        return os.path.join(self.spill_dir or "", ref)
+
+
+class MessageHistory(Sequence[BaseMessage]):
+    """Drop-in replacement for AutoGPT's ``full_message_history`` list.
+
+    Messages only hold a reference to their content in an ``ObservationStore`` and
+    are rebuilt when indexed. Only the last ``max_messages`` are kept, AutoGPT
+    only reads the latest ones, and older contents are released from the store. A
+    rolling digest of the last ``digest_size`` replies and results, each cut to
+    ``digest_chars``, replaces the serialized messages as the memory retrieval
+    query.
+    """
+
+    def __init__(
+        self,
+        store: Optional[ObservationStore] = None,
+        digest_size: int = 6,
+        digest_chars: int = 300,
+        max_messages: int = 100,
+    ) -> None:
+        self.store = store or ObservationStore()
+        self.digest_chars = digest_chars
+        self.max_messages = max_messages
+        self._messages: Deque[Tuple[Type[BaseMessage], str]] = deque()
+        self._digest: Deque[str] = deque(maxlen=digest_size)
+
+    def append(self, message: BaseMessage) -> None:
+        self._messages.append((type(message), self.store.put(message.content)))
+        while len(self._messages) > self.max_messages:
+            self.store.release(self._messages.popleft()[1])
+        # The human message is the same instruction on every step
+        if not isinstance(message, HumanMessage):
+            self._digest.append(
+                re.sub(r"\s+", " ", message.content)[: self.digest_chars].strip()
+            )
+
+    def digest(self) -> str:
+        return "\n".join(self._digest)
+
+    @overload
+    def __getitem__(self, index: int) -> BaseMessage:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[BaseMessage]:
+        ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[BaseMessage, List[BaseMessage]]:
+        if isinstance(index, slice):
+            return [self._build(entry) for entry in list(self._messages)[index]]
+        return self._build(self._messages[index])
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def _build(self, entry: Tuple[Type[BaseMessage], str]) -> BaseMessage:
+        message_cls, ref = entry
+        return message_cls(content=self.store.get(ref))
@@ -10,6 +10,8 @@ from langchain.tools.base import BaseTool
 from langchain.vectorstores.base import VectorStoreRetriever
 from pydantic import BaseModel
 
+from chromegpt.agent.autogpt.history import MessageHistory
+
 
 class AutoGPTPrompt(BaseChatPromptTemplate, BaseModel):
     ai_name: str
@@ -83,7 +85,14 @@ class AutoGPTPrompt(BaseChatPromptTemplate, BaseModel):
         memory: VectorStoreRetriever = kwargs["memory"]
         previous_messages = kwargs["messages"]
         content_format = "This reminds you of these events from your past:\n"
-        relevant_docs = memory.get_relevant_documents(str(previous_messages[-10:]))
+        if isinstance(previous_messages, MessageHistory):
+            query = previous_messages.digest()
+        else:
+            query = str(previous_messages[-10:]) if previous_messages else ""
+        if not query:
+            # Nothing has happened yet on the first step, recall by the goals
+            query = "\n".join(kwargs["goals"])
+        relevant_docs = memory.get_relevant_documents(query)
         relevant_memory = [d.page_content for d in relevant_docs]
         relevant_memory_tokens = sum(
             [self.token_counter(doc) for doc in relevant_memory]
@@ -0,0 +1,281 @@
+"""Module for the BabyAGI agent. Optimized for GPT-3.5 use."""
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain import LLMChain, PromptTemplate
+from langchain.agents import Tool
+from langchain.agents.agent import AgentExecutor
+from langchain.agents.mrkl.base import ZeroShotAgent as LangChainZeroShotAgent
+from langchain.callbacks.manager import CallbackManagerForChainRun
+from langchain.chains.base import Chain
+from langchain.chat_models.base import BaseChatModel
+from langchain.experimental import BabyAGI
+from langchain.tools.base import BaseTool
+from pydantic import Field
+
+from chromegpt.agent.chromegpt_agent import ChromeGPTAgent
+from chromegpt.agent.gateway import GatewayChatOpenAI
+from chromegpt.agent.routing import ModelRouter, RoutedChatModel
+from chromegpt.agent.utils import get_agent_tools, get_vectorstore
+from chromegpt.tools.pool import SeleniumPool
+from chromegpt.tools.selenium import SeleniumWrapper
+
+
+class ConcurrentBabyAGI(BabyAGI):
+    """BabyAGI that runs the top tasks of the list concurrently.
+
+    Each batch takes up to one task per execution chain (each chain drives its own
+    browser session) from the head of the prioritized list and runs them at the same
+    time. Results of a batch are stored in the vectorstore together, new tasks are
+    created once per batch and the list is re-prioritized every
+    ``prioritize_every`` batches. ``max_iterations`` counts executed tasks.
+
+    Timings of every executed task are kept in ``task_timings``.
+    """
+
+    extra_execution_chains: List[Chain] = Field(default_factory=list)
+    prioritize_every: int = 1
+    task_timings: List[Dict[str, Any]] = Field(default_factory=list)
+
+    @property
+    def output_keys(self) -> List[str]:
+        return ["task_timings"]
+
+    def _run_task(
+        self, chain: Chain, session: int, objective: str, context: str, task: Dict
+    ) -> str:
+        started = time.time()
+        result = chain.run(objective=objective, context=context, task=task["task_name"])
+        self.task_timings.append(
+            {
+                "task_id": task["task_id"],
+                "task_name": task["task_name"],
+                "session": session,
+                "seconds": round(time.time() - started, 2),
+            }
+        )
+        return result
+
+    def _call(
+        self,
+        inputs: Dict[str, Any],
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> Dict[str, Any]:
+        """Run the agent."""
+        objective = inputs["objective"]
+        first_task = inputs.get("first_task", "Make a todo list")
+        self.add_task({"task_id": 1, "task_name": first_task})
+        self.task_timings = []
+        chains = [self.execution_chain] + self.extra_execution_chains
+        executed = 0
+        num_batches = 0
+        while self.task_list:
+            self.print_task_list()
+            batch_size = min(len(chains), len(self.task_list))
+            if self.max_iterations is not None:
+                batch_size = min(batch_size, self.max_iterations - executed)
+            batch = [self.task_list.popleft() for _ in range(batch_size)]
+            for task in batch:
+                self.print_next_task(task)
+
+            # Step 1: Execute the batch, every task on its own browser session
+            context = "\n".join(self._get_top_tasks(query=objective, k=5))
+            with ThreadPoolExecutor(max_workers=batch_size) as executor:
+                futures = [
+                    executor.submit(
+                        self._run_task, chains[i], i, objective, context, task
+                    )
+                    for i, task in enumerate(batch)
+                ]
+                results = [future.result() for future in futures]
+            for result in results:
+                self.print_task_result(result)
+            executed += batch_size
+            num_batches += 1
+
+            # Step 2: Store all results at once
+            self.vectorstore.add_texts(
+                texts=results,
+                metadatas=[{"task": task["task_name"]} for task in batch],
+                ids=[f"result_{task['task_id']}" for task in batch],
+            )
+
+            # Step 3: Create new tasks from the whole batch and reprioritize
+            new_tasks = self.get_next_task(
+                "\n\n".join(
+                    f"{task['task_name']}: {result}"
+                    for task, result in zip(batch, results)
+                ),
+                "; ".join(task["task_name"] for task in batch),
+                objective,
+            )
+            for new_task in new_tasks:
+                self.task_id_counter += 1
+                new_task.update({"task_id": self.task_id_counter})
+                self.add_task(new_task)
+            if num_batches % self.prioritize_every == 0:
+                this_task_id = max(int(task["task_id"]) for task in batch)
+                self.task_list = deque(self.prioritize_tasks(this_task_id, objective))
+
+            if self.max_iterations is not None and executed >= self.max_iterations:
+                print(
+                    "\033[91m\033[1m" + "\n*****TASK ENDING*****\n" + "\033[0m\033[0m"
+                )
+                break
+        return {"task_timings": self.task_timings}
+
+
+class LazyChain(Chain):
+    """Chain that is only built the first time it is run.
+
+    Used for the execution agents of pooled browser sessions, so a session is only
+    started once a task actually runs on it.
+    """
+
+    factory: Callable[[], Chain]
+    inputs: List[str]
+    outputs: List[str]
+    chain: Optional[Chain] = None
+
+    @property
+    def input_keys(self) -> List[str]:
+        return self.inputs
+
+    @property
+    def output_keys(self) -> List[str]:
+        return self.outputs
+
+    def _call(
+        self,
+        inputs: Dict[str, Any],
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> Dict[str, Any]:
+        if self.chain is None:
+            self.chain = self.factory()
+        return self.chain(
+            inputs,
+            return_only_outputs=True,
+            callbacks=run_manager.get_child() if run_manager else None,
+        )
+
+
+class BabyAGIAgent(ChromeGPTAgent):
+    def __init__(
+        self,
+        model: str = "gpt-3.5-turbo",
+        verbose: bool = False,
+        selenium: Optional[SeleniumWrapper] = None,
+        selenium_pool: Optional[SeleniumPool] = None,
+        router: Optional[ModelRouter] = None,
+        prioritize_every: int = 1,
+    ) -> None:
+        """Initialize the BabyAGIAgent.
+
+        With a ``selenium_pool`` the top tasks of the list run concurrently, one per
+        browser session, and the list is re-prioritized every ``prioritize_every``
+        batches. With a ``router`` the steps of the task execution agents go to the
+        model tier for their kind of step, task creation stays on ``model``.
+        """
+        self.model = model
+        self.router = router
+        self.babyagi = self._get_baby_agi(
+            verbose=verbose,
+            selenium=selenium,
+            selenium_pool=selenium_pool,
+            prioritize_every=prioritize_every,
+        )
+
+    def _get_todo_tool(self) -> Tool:
+        todo_prompt = PromptTemplate.from_template(
+            "You are a planner who is an expert at coming up "
+            "with a todo list for a given objective. Come up "
+            "with a todo list for this objective: {objective}"
+        )
+        todo_chain = LLMChain(
+            llm=GatewayChatOpenAI(model_name=self.model, temperature=0),  # type: ignore
+            prompt=todo_prompt,
+        )
+        return Tool(
+            name="TODO",
+            func=todo_chain.run,
+            description=(
+                "useful for when you need to come up with todo lists. Input: an"
+                " objective to create a todo list for. Output: a todo list for that"
+                " objective. Please be very clear what the objective is!"
+            ),
+        )
+
+    def _get_baby_agi(
+        self,
+        verbose: bool = False,
+        max_iterations: int = 20,
+        selenium: Optional[SeleniumWrapper] = None,
+        selenium_pool: Optional[SeleniumPool] = None,
+        prioritize_every: int = 1,
+    ) -> BabyAGI:
+        """Get the zero shot agent. Optimized for GPT-3.5 use."""
+        llm = GatewayChatOpenAI(model_name=self.model, temperature=0)  # type: ignore
+        todo_tool = self._get_todo_tool()
+        execution_llm = RoutedChatModel(router=self.router) if self.router else llm
+
+        def get_agent(session: Optional[SeleniumWrapper]) -> Chain:
+            return self._get_zero_shot_agent(
+                llm=execution_llm,
+                verbose=verbose,
+                tools=get_agent_tools(session) + [todo_tool],
+            )
+
+        # One task execution agent per browser session, each with the ToDo tool.
+        # Pooled sessions start when their agent runs its first task.
+        agents = [get_agent(selenium)]
+        if selenium_pool:
+            pool = selenium_pool
+            agents += [
+                LazyChain(
+                    factory=partial(lambda i: get_agent(pool.get(i)), i),
+                    inputs=agents[0].input_keys,
+                    outputs=agents[0].output_keys,
+                )
+                for i in range(pool.size)
+            ]
+        vectorstore = get_vectorstore()
+        baby_agi = ConcurrentBabyAGI.from_llm(
+            llm=llm,
+            vectorstore=vectorstore,  # type: ignore
+            task_execution_chain=agents[0],
+            verbose=verbose,
+            max_iterations=max_iterations,  # type: ignore
+            extra_execution_chains=agents[1:],  # type: ignore
+            prioritize_every=prioritize_every,  # type: ignore
+        )
+        return baby_agi
+
+    def _get_zero_shot_agent(
+        self, llm: BaseChatModel, verbose: bool, tools: List[BaseTool]
+    ) -> AgentExecutor:
+        prefix = (
+            "You are an AI who performs one task based on the "
+            "following objective: {objective}. Take into account these "
+            "previously completed tasks: {context}."
+        )
+        suffix = """Question: {task}
+        {agent_scratchpad}"""
+        prompt = LangChainZeroShotAgent.create_prompt(
+            tools,
+            prefix=prefix,
+            suffix=suffix,
+            input_variables=["objective", "task", "context", "agent_scratchpad"],
+        )
+        llm_chain = LLMChain(llm=llm, prompt=prompt)
+        tool_names = [tool.name for tool in tools]
+        agent = LangChainZeroShotAgent(llm_chain=llm_chain, allowed_tools=tool_names)
+        agent_executor = AgentExecutor.from_agent_and_tools(
+            agent=agent, tools=tools, verbose=True, max_iterations=4
+        )
+        return agent_executor
+
+    def run(self, tasks: List[str]) -> str:
+        return str(self.babyagi({"objective": " ".join(tasks)}))
@@ -0,0 +1,449 @@
+"""Shared, rate-limited gateway for the LLM requests of all agents in a process."""
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+import openai
+import requests
+from langchain.callbacks.manager import AsyncCallbackManagerForLLMRun
+from langchain.chat_models import ChatOpenAI
+from langchain.chat_models.openai import (
+    _convert_dict_to_message,
+    acompletion_with_retry,
+)
+from langchain.schema import BaseMessage, ChatGeneration, ChatResult
+
+from chromegpt.tools.utils import estimate_tokens
+
+# Agent steps wait on these, they go first
+PRIORITY_ACTION = 0
+# Summaries and other bookkeeping that can wait
+PRIORITY_BACKGROUND = 1
+
+RETRYABLE_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.ServiceUnavailableError,
+    openai.error.APIError,
+    openai.error.APIConnectionError,
+    openai.error.Timeout,
+)
+
+
+class TokenBucket:
+    """Refills ``rate_per_minute`` units per minute up to ``capacity``."""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity or rate_per_minute
+        self.clock = clock
+        self.level = self.capacity
+        self.updated_at = clock()
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` units are available, 0 if they are now."""
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        """Give back (or, if negative, charge) units after the real cost is known."""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.level = min(
+            self.capacity, self.level + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+
+class ModelLimits:
+    """Rate limits of one model, None for no limit."""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_concurrency: int = 8,
+    ) -> None:
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+
+
+class _ModelState:
+    def __init__(self, limits: ModelLimits) -> None:
+        self.limits = limits
+        self.requests = (
+            TokenBucket(limits.requests_per_minute)
+            if limits.requests_per_minute
+            else None
+        )
+        self.tokens = (
+            TokenBucket(limits.tokens_per_minute) if limits.tokens_per_minute else None
+        )
+        self.concurrency = limits.max_concurrency
+        self.in_flight = 0
+        self.successes = 0
+        self.paused_until = 0.0
+        self.queue: List[Tuple[int, int]] = []
+        self.condition = threading.Condition()
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0}
+
+
+class LLMGateway:
+    """Admit LLM requests per model by priority, within rate and token budgets.
+
+    Waiting requests are served lowest ``priority`` first (FIFO within a priority)
+    once the model has a free concurrency slot and its request and token buckets
+    allow it. Concurrency adapts: a rate limit error halves it and pauses the model
+    for the backoff delay, so the other callers back off too instead of piling up
+    more 429s, and every ``concurrency`` successes raise it by one up to
+    ``max_concurrency``. Failed requests are retried with exponential backoff.
+
+    Example:
+        .. code-block:: python
+
+            set_gateway(LLMGateway({"gpt-4": ModelLimits(200, 40000, 4)}))
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, ModelLimits]] = None,
+        default_limits: Optional[ModelLimits] = None,
+        max_retries: int = 6,
+        min_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ) -> None:
+        self.limits = limits or {}
+        self.default_limits = default_limits or ModelLimits()
+        self.max_retries = max_retries
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self._models: Dict[str, _ModelState] = {}
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        # One keep-alive connection pool shared by all threads
+        pool_size = max(
+            [self.default_limits.max_concurrency]
+            + [model.max_concurrency for model in self.limits.values()]
+        )
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=4, pool_maxsize=pool_size * 2, max_retries=2
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def call(
+        self,
+        model: str,
+        request: Callable[[], Any],
+        tokens: int = 0,
+        priority: int = PRIORITY_ACTION,
+    ) -> Any:
+        """Run ``request`` for ``model`` once admitted, retrying failures.
+
+        Streamed responses keep their slot until the stream is consumed or closed.
+        """
+        state = self._state(model)
+        for attempt in range(self.max_retries + 1):
+            self._acquire(state, tokens, priority)
+            try:
+                response = request()
+            except RETRYABLE_ERRORS as e:
+                delay = self._failed(state, attempt, e)
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self._release(state, succeeded=False)
+                raise
+            return self._finish(state, response, tokens)
+
+    async def acall(
+        self,
+        model: str,
+        request: Callable[[], Awaitable[Any]],
+        tokens: int = 0,
+        priority: int = PRIORITY_ACTION,
+    ) -> Any:
+        """Async ``call``, waits for admission in a thread without blocking the loop."""
+        state = self._state(model)
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            admitted = loop.run_in_executor(
+                None, self._acquire, state, tokens, priority
+            )
+            try:
+                await asyncio.shield(admitted)
+            except asyncio.CancelledError:
+                # The slot is still taken once the waiting thread gets it
+                admitted.add_done_callback(
+                    lambda _: self._release(state, succeeded=False)
+                )
+                raise
+            try:
+                response = await request()
+            except RETRYABLE_ERRORS as e:
+                delay = self._failed(state, attempt, e)
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self._release(state, succeeded=False)
+                raise
+            return self._finish(state, response, tokens)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            models = dict(self._models)
+        return {
+            model: {
+                **state.stats,
+                "in_flight": state.in_flight,
+                "queued": len(state.queue),
+                "concurrency": state.concurrency,
+            }
+            for model, state in models.items()
+        }
+
+    def _state(self, model: str) -> _ModelState:
+        with self._lock:
+            if model not in self._models:
+                limits = self.limits.get(model, self.default_limits)
+                self._models[model] = _ModelState(limits)
+            return self._models[model]
+
+    def _acquire(self, state: _ModelState, tokens: int, priority: int) -> None:
+        entry = (priority, next(self._sequence))
+        with state.condition:
+            heapq.heappush(state.queue, entry)
+            while True:
+                timeout: Optional[float] = None
+                if state.queue[0] == entry and state.in_flight < state.concurrency:
+                    timeout = max(
+                        state.paused_until - time.monotonic(),
+                        state.requests.wait_time(1) if state.requests else 0.0,
+                        state.tokens.wait_time(tokens) if state.tokens else 0.0,
+                    )
+                    if timeout <= 0:
+                        break
+                state.condition.wait(timeout)
+            heapq.heappop(state.queue)
+            if state.requests:
+                state.requests.consume(1)
+            if state.tokens:
+                state.tokens.consume(tokens)
+            state.in_flight += 1
+            state.stats["requests"] += 1
+            state.condition.notify_all()
+
+    def _release(
+        self,
+        state: _ModelState,
+        succeeded: bool = True,
+        rate_limited: bool = False,
+        pause: float = 0.0,
+    ) -> None:
+        with state.condition:
+            state.in_flight -= 1
+            if rate_limited:
+                state.stats["rate_limited"] += 1
+                state.concurrency = max(1, state.concurrency // 2)
+                state.successes = 0
+                state.paused_until = max(state.paused_until, time.monotonic() + pause)
+            elif succeeded:
+                state.successes += 1
+                if (
+                    state.successes >= state.concurrency
+                    and state.concurrency < state.limits.max_concurrency
+                ):
+                    state.concurrency += 1
+                    state.successes = 0
+            state.condition.notify_all()
+
+    def _failed(self, state: _ModelState, attempt: int, error: Exception) -> float:
+        """Release the slot of a failed attempt. Returns the delay before a retry."""
+        rate_limited = isinstance(error, openai.error.RateLimitError)
+        delay = self._backoff(attempt, error)
+        self._release(state, succeeded=False, rate_limited=rate_limited, pause=delay)
+        if attempt < self.max_retries:
+            with state.condition:
+                state.stats["retries"] += 1
+        # A rate limit pauses the model, the retry waits for that in _acquire
+        return 0.0 if rate_limited else delay
+
+    def _finish(self, state: _ModelState, response: Any, tokens: int) -> Any:
+        if isinstance(response, (Iterator, AsyncIterator)):
+            return _Stream(response, lambda: self._release(state))
+        self._release(state)
+        usage = response.get("usage") if hasattr(response, "get") else None
+        if usage and state.tokens:
+            with state.condition:
+                state.tokens.refund(tokens - usage.get("total_tokens", tokens))
+        return response
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        headers = getattr(error, "headers", None) or {}
+        retry_after = headers.get("retry-after") if hasattr(headers, "get") else None
+        try:
+            if retry_after is not None:
+                return min(self.max_backoff, float(retry_after))
+        except ValueError:
+            pass
+        delay = min(self.max_backoff, self.min_backoff * 2**attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+
+class _Stream:
+    """Streamed response that releases its gateway slot exactly once.
+
+    The slot is released when the stream is exhausted, fails, is closed or is
+    garbage collected, even if it was never iterated.
+    """
+
+    def __init__(self, response: Any, release: Callable[[], None]) -> None:
+        self._response = response
+        self._release = release
+        self._released = False
+
+    def __iter__(self) -> "_Stream":
+        return self
+
+    def __next__(self) -> Any:
+        try:
+            return next(self._response)
+        except BaseException:
+            self.close()
+            raise
+
+    def __aiter__(self) -> "_Stream":
+        return self
+
+    async def __anext__(self) -> Any:
+        try:
+            return await self._response.__anext__()
+        except BaseException:
+            await self.aclose()
+            raise
+
+    def close(self) -> None:
+        if hasattr(self._response, "close"):
+            self._response.close()
+        self._done()
+
+    async def aclose(self) -> None:
+        if hasattr(self._response, "aclose"):
+            await self._response.aclose()
+        self._done()
+
+    def __del__(self) -> None:
+        self._done()
+
+    def _done(self) -> None:
+        if not self._released:
+            self._released = True
+            self._release()
+
+
+_gateway: Optional[LLMGateway] = None
+
+
+def set_gateway(gateway: Optional[LLMGateway]) -> None:
+    """Route the requests of all ``GatewayChatOpenAI`` models through ``gateway``."""
+    global _gateway
+    _gateway = gateway
+    openai.requestssession = gateway.session if gateway else None
+
+
+def get_gateway() -> Optional[LLMGateway]:
+    return _gateway
+
+
+class GatewayChatOpenAI(ChatOpenAI):
+    """ChatOpenAI that sends its requests through the gateway, if one is set."""
+
+    priority: int = PRIORITY_ACTION
+
+    def completion_with_retry(self, **kwargs: Any) -> Any:
+        gateway = get_gateway()
+        if gateway is None:
+            return super().completion_with_retry(**kwargs)
+        return gateway.call(
+            self.model_name,
+            lambda: self.client.create(**kwargs),
+            tokens=self._estimate_tokens(kwargs),
+            priority=self.priority,
+        )
+
+    async def acompletion_with_retry(self, **kwargs: Any) -> Any:
+        gateway = get_gateway()
+        if gateway is None:
+            return await acompletion_with_retry(self, **kwargs)
+        return await gateway.acall(
+            self.model_name,
+            lambda: self.client.acreate(**kwargs),
+            tokens=self._estimate_tokens(kwargs),
+            priority=self.priority,
+        )
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+    ) -> ChatResult:
+        # Same as ChatOpenAI._agenerate, which calls the module level retry function
+        message_dicts, params = self._create_message_dicts(messages, stop)
+        if not self.streaming:
+            response = await self.acompletion_with_retry(
+                messages=message_dicts, **params
+            )
+            return self._create_chat_result(response)
+        inner_completion = ""
+        role = "assistant"
+        params["stream"] = True
+        async for stream_resp in await self.acompletion_with_retry(
+            messages=message_dicts, **params
+        ):
+            role = stream_resp["choices"][0]["delta"].get("role", role)
+            token = stream_resp["choices"][0]["delta"].get("content", "")
+            inner_completion += token
+            if run_manager:
+                await run_manager.on_llm_new_token(token)
+        message = _convert_dict_to_message({"content": inner_completion, "role": role})
+        generation = ChatGeneration(message=message)  # type: ignore
+        return ChatResult(generations=[generation])
+
+    def _estimate_tokens(self, kwargs: Dict[str, Any]) -> int:
+        return sum(
+            estimate_tokens(message.get("content") or "")
+            for message in kwargs.get("messages", [])
+        ) + (self.max_tokens or 256)
@@ -0,0 +1,203 @@
+"""Run several independent agent actions per LLM turn over pooled browsers."""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from langchain.agents.agent import AgentExecutor, ExceptionTool
+from langchain.agents.tools import InvalidTool
+from langchain.callbacks.manager import CallbackManagerForChainRun
+from langchain.schema import AgentAction, AgentFinish
+from langchain.tools.base import BaseTool
+from pydantic import Field
+
+from chromegpt.agent.repair import RepairingChatOutputParser
+from chromegpt.agent.utils import get_agent_tools
+from chromegpt.tools.pool import SeleniumPool
+
+# Tools that load their own page and don't depend on what the browser shows
+PARALLEL_SAFE_TOOLS = {"goto", "google_search", "find_form"}
+
+FINAL_ANSWER_ACTION = "Final Answer:"
+
+PARALLEL_FORMAT_INSTRUCTIONS = """The way you use the tools is by specifying a json \
+blob. Specifically, this json should have a `action` key (with the name of the tool to \
+use) and a `action_input` key (with the input to the tool going here).
+
+The only values that should be in the "action" field are: {tool_names}
+
+When several actions do not depend on each other (e.g. visiting a few search results), \
+return them together as a list in the $JSON_BLOB and they will run at the same time. \
+Only PARALLEL_TOOLS can run at the same time as other actions. Here are examples of a \
+valid $JSON_BLOB:
+
+```
+{{{{
+  "action": $TOOL_NAME,
+  "action_input": $INPUT
+}}}}
+```
+
+```
+[
+  {{{{"action": $TOOL_NAME, "action_input": $INPUT}}}},
+  {{{{"action": $TOOL_NAME, "action_input": $INPUT}}}}
+]
+```
+
+ALWAYS use the following format:
+
+Question: the input question you must answer
+Thought: you should always think about what to do
+Action:
+```
+$JSON_BLOB
+```
+Observation: the result of the action
+... (this Thought/Action/Observation can repeat N times)
+Thought: I now know the final answer
+Final Answer: the final answer to the original input question""".replace(
+    "PARALLEL_TOOLS", ", ".join(sorted(PARALLEL_SAFE_TOOLS))
+)
+
+
+class MultiActionOutputParser(RepairingChatOutputParser):
+    """Parse a chat agent response holding one action or a list of actions."""
+
+    def parse(  # type: ignore[override]
+        self, text: str
+    ) -> Union[AgentAction, List[AgentAction], AgentFinish]:
+        if FINAL_ANSWER_ACTION in text:
+            return AgentFinish(
+                {"output": text.split(FINAL_ANSWER_ACTION)[-1].strip()}, text
+            )
+        actions = []
+        for i, (tool, tool_input) in enumerate(self.parse_actions(text)):
+            # The first action carries the full thought, the others only
+            # their own blob so the scratchpad doesn't repeat the thought
+            item = {"action": tool, "action_input": tool_input}
+            log = text if i == 0 else f"\nAction:\n```\n{json.dumps(item)}\n```"
+            actions.append(AgentAction(tool, tool_input, log))
+        return actions[0] if len(actions) == 1 else actions
+
+
+class ParallelAgentExecutor(AgentExecutor):
+    """AgentExecutor that dispatches independent actions concurrently.
+
+    The first action of a turn runs on the agent's own browser. Further actions that
+    are safe to run in parallel (see ``PARALLEL_SAFE_TOOLS``) each get a session from
+    ``pool`` and run at the same time; the remaining actions run afterwards on the
+    agent's browser in the order the LLM gave them. All observations are added to
+    the scratchpad as separate steps.
+    """
+
+    pool: SeleniumPool
+    session_tools: Dict[int, Dict[str, BaseTool]] = Field(default_factory=dict)
+
+    def _take_next_step(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        inputs: Dict[str, str],
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> Union[AgentFinish, List[Tuple[AgentAction, str]]]:
+        try:
+            output = self.agent.plan(
+                intermediate_steps,
+                callbacks=run_manager.get_child() if run_manager else None,
+                **inputs,
+            )
+        except Exception as e:
+            # Same as AgentExecutor: tell the agent its output didn't parse
+            if not self.handle_parsing_errors:
+                raise e
+            output = AgentAction("_Exception", "Invalid or incomplete response", str(e))
+            observation = ExceptionTool().run(
+                output.tool,
+                verbose=self.verbose,
+                color=None,
+                callbacks=run_manager.get_child() if run_manager else None,
+                **self.agent.tool_run_logging_kwargs(),
+            )
+            return [(output, observation)]
+        if isinstance(output, AgentFinish):
+            return output
+        actions = [output] if isinstance(output, AgentAction) else list(output)
+
+        # Group the actions per browser session: None is the agent's own browser
+        queues: Dict[Optional[int], List[int]] = {None: []}
+        for i, action in enumerate(actions):
+            next_session = len(queues) - 1
+            if i == 0 or action.tool not in PARALLEL_SAFE_TOOLS:
+                queues[None].append(i)
+            elif next_session < self.pool.size:
+                queues[next_session] = [i]
+            else:
+                queues[None].append(i)
+
+        observations: Dict[int, str] = {}
+
+        def _run_queue(session: Optional[int], indices: List[int]) -> None:
+            tools = self._get_session_tools(session, name_to_tool_map)
+            for i in indices:
+                observation = self._run_action(
+                    actions[i], tools, color_mapping, run_manager
+                )
+                if session is not None:
+                    observation = (
+                        "(loaded in a separate browser, use goto to continue on this"
+                        f" page) {observation}"
+                    )
+                observations[i] = observation
+
+        with ThreadPoolExecutor(max_workers=len(queues)) as executor:
+            futures = [
+                executor.submit(_run_queue, session, indices)
+                for session, indices in queues.items()
+                if session is not None
+            ]
+            # The agent's first action runs alongside the pooled ones, the actions
+            # that depend on the current page follow it
+            _run_queue(None, queues[None])
+            for future in futures:
+                future.result()
+        return [(action, observations[i]) for i, action in enumerate(actions)]
+
+    def _get_session_tools(
+        self, session: Optional[int], default_tools: Dict[str, BaseTool]
+    ) -> Dict[str, BaseTool]:
+        if session is None:
+            return default_tools
+        if session not in self.session_tools:
+            tools = get_agent_tools(self.pool.get(session))
+            self.session_tools[session] = {tool.name: tool for tool in tools}
+        return self.session_tools[session]
+
+    def _run_action(
+        self,
+        action: AgentAction,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        run_manager: Optional[CallbackManagerForChainRun],
+    ) -> str:
+        if run_manager:
+            run_manager.on_agent_action(action, color="green")
+        tool_run_kwargs: Dict[str, Any] = self.agent.tool_run_logging_kwargs()
+        if action.tool not in name_to_tool_map:
+            return InvalidTool().run(
+                action.tool,
+                verbose=self.verbose,
+                color=None,
+                callbacks=run_manager.get_child() if run_manager else None,
+                **tool_run_kwargs,
+            )
+        tool = name_to_tool_map[action.tool]
+        if tool.return_direct:
+            tool_run_kwargs["llm_prefix"] = ""
+        return tool.run(
+            action.tool_input,
+            verbose=self.verbose,
+            color=color_mapping[action.tool],
+            callbacks=run_manager.get_child() if run_manager else None,
+            **tool_run_kwargs,
+        )
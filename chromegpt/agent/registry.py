@@ -0,0 +1,21 @@
+"""Registry of the available agents, imported only when selected."""
+import importlib
+from typing import TYPE_CHECKING, Dict, Type
+
+if TYPE_CHECKING:
+    from chromegpt.agent.chromegpt_agent import ChromeGPTAgent
+
+# Agent name -> "module:class", so that listing the agents imports nothing heavy
+AGENT_REGISTRY: Dict[str, str] = {
+    "auto-gpt": "chromegpt.agent.autogpt:AutoGPTAgent",
+    "baby-agi": "chromegpt.agent.babyagi:BabyAGIAgent",
+    "zero-shot": "chromegpt.agent.zeroshot:ZeroShotAgent",
+}
+
+
+def get_agent_class(name: str) -> "Type[ChromeGPTAgent]":
+    """Import and return the agent class registered as ``name``."""
+    if name not in AGENT_REGISTRY:
+        raise ValueError(f"Agent {name} not found.")
+    module_name, class_name = AGENT_REGISTRY[name].split(":")
+    return getattr(importlib.import_module(module_name), class_name)
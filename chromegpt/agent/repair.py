@@ -0,0 +1,154 @@
+"""Output parsers that repair malformed actions instead of failing the step."""
+import difflib
+import json
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+from langchain.agents.chat.output_parser import ChatOutputParser
+from langchain.experimental.autonomous_agents.autogpt.output_parser import (
+    AutoGPTAction,
+    AutoGPTOutputParser,
+)
+from langchain.schema import AgentAction, AgentFinish, OutputParserException
+from langchain.tools.base import BaseTool
+from pydantic import Field
+
+from chromegpt.tools.json_repair import loads_tolerant, record_retry_saved
+
+FINAL_ANSWER_ACTION = "Final Answer:"
+
+
+def _normalize_name(name: str) -> str:
+    return name.strip().strip("`'\"").lower().replace(" ", "_").replace("-", "_")
+
+
+def _closest(name: str, options: Sequence[str], cutoff: float) -> str:
+    """The option ``name`` most likely means, ``name`` itself if none is close."""
+    if name in options:
+        return name
+    normalized = {_normalize_name(option): option for option in options}
+    key = _normalize_name(name)
+    if key in normalized:
+        return normalized[key]
+    prefixed = [
+        option
+        for option in normalized
+        if option.startswith(key) or key.startswith(option)
+    ]
+    if key and len(prefixed) == 1:
+        return normalized[prefixed[0]]
+    matches = difflib.get_close_matches(key, list(normalized), n=1, cutoff=cutoff)
+    return normalized[matches[0]] if matches else name
+
+
+class ActionRepairer:
+    """Match misspelled tool names and argument keys to the agent's tools.
+
+    Argument keys are matched against the fields of the tool's ``args_schema``. A
+    dict with a single unknown key is taken as the only required field of a tool
+    that has exactly one.
+    """
+
+    def __init__(
+        self, tools: Sequence[BaseTool] = (), extra_names: Sequence[str] = ()
+    ) -> None:
+        self.fields: Dict[str, List[str]] = {name: [] for name in extra_names}
+        self.required: Dict[str, List[str]] = {name: [] for name in extra_names}
+        for tool in tools:
+            schema_fields = tool.args_schema.__fields__ if tool.args_schema else {}
+            self.fields[tool.name] = list(schema_fields)
+            self.required[tool.name] = [
+                name for name, field in schema_fields.items() if field.required
+            ]
+
+    def fix(self, name: str, tool_input: Any) -> Tuple[str, Any, bool]:
+        """Return the matched tool name and input, and whether anything changed."""
+        if not self.fields:
+            return name, tool_input, False
+        fixed_name = _closest(name, list(self.fields), cutoff=0.75)
+        fields = self.fields.get(fixed_name, [])
+        fixed_input = tool_input
+        if isinstance(tool_input, dict) and fields:
+            unknown = [key for key in tool_input if key not in fields]
+            required = self.required.get(fixed_name, [])
+            if len(tool_input) == 1 and unknown and len(fields) == 1 and required:
+                fixed_input = {fields[0]: tool_input[unknown[0]]}
+            elif unknown:
+                fixed_input = {
+                    _closest(key, fields, cutoff=0.75) if key in unknown else key: value
+                    for key, value in tool_input.items()
+                }
+        changed = fixed_name != name or fixed_input != tool_input
+        return fixed_name, fixed_input, changed
+
+
+class RepairingChatOutputParser(ChatOutputParser):
+    """Chat agent parser that repairs the action blob before giving up.
+
+    The output is first parsed the way LangChain does. If that fails, or names an
+    unknown tool or argument, the repaired action is used and counted as a saved
+    LLM retry.
+    """
+
+    repairer: ActionRepairer = Field(default_factory=ActionRepairer)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def parse(self, text: str) -> Union[AgentAction, AgentFinish]:
+        if FINAL_ANSWER_ACTION in text:
+            return AgentFinish(
+                {"output": text.split(FINAL_ANSWER_ACTION)[-1].strip()}, text
+            )
+        return AgentAction(*self.parse_actions(text)[0], text)
+
+    def parse_actions(self, text: str) -> List[Tuple[str, Any]]:
+        """The ``(tool, tool_input)`` of each action in ``text``."""
+        repaired = False
+        try:
+            response = json.loads(text.split("```")[1].strip())
+        except Exception:
+            try:
+                response = loads_tolerant(text)
+            except ValueError:
+                raise OutputParserException(f"Could not parse LLM output: {text}")
+            repaired = True
+        items = response if isinstance(response, list) else [response]
+        actions = []
+        for item in items:
+            if not isinstance(item, dict) or "action" not in item:
+                raise OutputParserException(f"Could not parse LLM output: {text}")
+            name, tool_input, changed = self.repairer.fix(
+                str(item["action"]), item.get("action_input", {})
+            )
+            repaired = repaired or changed
+            actions.append((name, tool_input))
+        if not actions:
+            raise OutputParserException(f"Could not parse LLM output: {text}")
+        if repaired:
+            record_retry_saved("chat")
+        return actions
+
+
+class RepairingAutoGPTOutputParser(AutoGPTOutputParser):
+    """AutoGPT parser that repairs the response JSON and the command, see above."""
+
+    repairer: ActionRepairer = Field(default_factory=ActionRepairer)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def parse(self, text: str) -> AutoGPTAction:
+        action = super().parse(text)
+        repaired = False
+        if action.name == "ERROR":
+            try:
+                parsed = loads_tolerant(text)
+                command = parsed["command"]
+                action = AutoGPTAction(name=command["name"], args=command["args"])
+            except (ValueError, KeyError, TypeError):
+                return action
+            repaired = True
+        name, args, changed = self.repairer.fix(action.name, action.args)
+        if repaired or changed:
+            record_retry_saved("auto-gpt")
+        return AutoGPTAction(name=name, args=args)
@@ -0,0 +1,290 @@
+"""Route each agent step to the cheapest model tier that handles it."""
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain.callbacks.manager import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain.chat_models.base import BaseChatModel
+from langchain.schema import BaseMessage, ChatResult
+
+from chromegpt.agent.streaming import (
+    FINAL_ANSWER_PREFIX,
+    EarlyStopChatOpenAI,
+    IncrementalActionParser,
+)
+from chromegpt.agent.trajectory import is_error_observation
+from chromegpt.tools.json_repair import loads_tolerant
+from chromegpt.tools.utils import estimate_tokens, percentiles
+
+STEP_PLANNING = "planning"
+STEP_EXTRACTION = "extraction"
+STEP_NAVIGATION = "navigation"
+STEP_FORM = "form"
+STEP_TYPES = (STEP_PLANNING, STEP_EXTRACTION, STEP_NAVIGATION, STEP_FORM)
+
+# Step type by the tool whose observation the model answers to
+_STEP_AFTER_TOOL = {
+    "google_search": STEP_NAVIGATION,
+    "scroll": STEP_NAVIGATION,
+    "find_form": STEP_FORM,
+    "fill_form": STEP_FORM,
+}
+
+# USD per 1K prompt and completion tokens, matched by model name prefix
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-3.5-turbo": (0.0015, 0.002),
+    "gpt-3.5-turbo-16k": (0.003, 0.004),
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-32k": (0.06, 0.12),
+}
+
+# Thoughts of a model that is guessing
+HEDGE_PATTERN = re.compile(
+    r"\b(not sure|unsure|unclear|i don't know|i do not know|cannot determine|"
+    r"can't determine|no idea|confus)",
+    re.IGNORECASE,
+)
+
+_LAST_ACTION_PATTERN = re.compile(
+    r"\"action\":\s*\"([\w-]+)\"|\"command\":\s*\{\s*\"name\":\s*\"([\w-]+)\""
+    r"|Command ([\w-]+) returned|Action:\s*([\w-]+)"
+)
+_OBSERVATION_PATTERN = re.compile(r"(?:Observation:|Command [\w-]+ returned:)\s*")
+_MRKL_ACTION_PATTERN = re.compile(r"Action\s*:\s*([\w-]+)\s*\nAction\s*Input\s*:")
+
+
+def _history_text(messages: List[BaseMessage]) -> str:
+    # The first message holds the instructions and tool descriptions
+    return "\n".join(message.content for message in messages[1:])
+
+
+def classify_step(messages: List[BaseMessage]) -> str:
+    """Guess what the model is asked to do from the last action and its result."""
+    text = _history_text(messages)
+    actions = [
+        next(group for group in match.groups() if group)
+        for match in _LAST_ACTION_PATTERN.finditer(text)
+    ]
+    observations = _OBSERVATION_PATTERN.split(text)
+    if not actions or len(observations) < 2:
+        return STEP_PLANNING
+    observation = observations[-1].strip()
+    if is_error_observation(observation) or observation.startswith(
+        ("Error", "Unknown command", "Validation Error")
+    ):
+        # Replan after a failed action
+        return STEP_PLANNING
+    return _STEP_AFTER_TOOL.get(actions[-1], STEP_EXTRACTION)
+
+
+def escalation_reason(text: str, messages: List[BaseMessage]) -> Optional[str]:
+    """Why the output ``text`` should be retried on a stronger model, if at all."""
+    if FINAL_ANSWER_PREFIX in text:
+        action_names: List[str] = []
+    else:
+        parser = IncrementalActionParser()
+        parser.feed(text)
+        action = parser.action
+        if action is None:
+            # The agents' parsers repair what they can, only escalate the rest
+            try:
+                action = loads_tolerant(text)
+            except ValueError:
+                pass
+        if isinstance(action, (dict, list)):
+            items = action if isinstance(action, list) else [action]
+            action_names = [
+                str(
+                    item["command"].get("name", "")
+                    if isinstance(item.get("command"), dict)
+                    else item.get("action", "")
+                )
+                for item in items
+                if isinstance(item, dict)
+            ]
+            if not action_names or not all(action_names):
+                return "parse failure"
+        else:
+            match = _MRKL_ACTION_PATTERN.search(text)
+            if match is None:
+                return "parse failure"
+            action_names = [match.group(1)]
+    instructions = messages[0].content if messages else ""
+    for name in action_names:
+        if not re.search(rf"\b{re.escape(name)}\b", instructions):
+            return f"unknown action {name}"
+    if HEDGE_PATTERN.search(text):
+        return "low confidence"
+    return None
+
+
+def model_price(model: str) -> Optional[Tuple[float, float]]:
+    matches = [prefix for prefix in MODEL_PRICES if model.startswith(prefix)]
+    return MODEL_PRICES[max(matches, key=len)] if matches else None
+
+
+def _default_llm(model: str) -> BaseChatModel:
+    return EarlyStopChatOpenAI(model_name=model, temperature=0)  # type: ignore
+
+
+class _TierStats:
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.steps = {step: 0 for step in STEP_TYPES}
+        self.escalations = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+
+class ModelRouter:
+    """Pick a model tier per agent step and escalate outputs that look wrong.
+
+    ``tiers`` go from the cheapest to the strongest model. Each step is classified
+    (see ``classify_step``) and sent to the tier that ``routes`` maps its type to,
+    planning steps go to the strongest tier by default. An output that doesn't
+    parse, names an unknown tool or hedges is retried on the next tier up. Latency,
+    estimated tokens and cost are kept per tier. The router is thread-safe and can
+    be shared by several agents.
+
+    Example:
+        .. code-block:: python
+
+            router = ModelRouter(["gpt-3.5-turbo", "gpt-4"])
+            agent = ZeroShotAgent(model="gpt-4", router=router)
+    """
+
+    def __init__(
+        self,
+        tiers: Sequence[str],
+        routes: Optional[Dict[str, int]] = None,
+        llm_factory: Callable[[str], BaseChatModel] = _default_llm,
+    ) -> None:
+        if not tiers:
+            raise ValueError("ModelRouter needs at least one model tier")
+        self.tiers = list(tiers)
+        self.routes = {step: 0 for step in STEP_TYPES}
+        self.routes[STEP_PLANNING] = len(self.tiers) - 1
+        self.routes.update(routes or {})
+        self.llms = [llm_factory(model) for model in self.tiers]
+        self._stats = [_TierStats() for _ in self.tiers]
+        self._lock = threading.Lock()
+
+    def generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+    ) -> ChatResult:
+        """Generate the reply to ``messages`` on the tier for the step."""
+        step, tier, prompt_tokens = self._route(messages)
+        while True:
+            started = time.time()
+            result = self.llms[tier]._generate(
+                messages, stop=stop, run_manager=run_manager
+            )
+            if not self._escalate(step, tier, started, prompt_tokens, result, messages):
+                return result
+            tier += 1
+
+    async def agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+    ) -> ChatResult:
+        """Async version of ``generate``."""
+        step, tier, prompt_tokens = self._route(messages)
+        while True:
+            started = time.time()
+            result = await self.llms[tier]._agenerate(
+                messages, stop=stop, run_manager=run_manager
+            )
+            if not self._escalate(step, tier, started, prompt_tokens, result, messages):
+                return result
+            tier += 1
+
+    def _route(self, messages: List[BaseMessage]) -> Tuple[str, int, int]:
+        """The step type, first tier and estimated prompt tokens of ``messages``."""
+        step = classify_step(messages)
+        tier = min(max(self.routes.get(step, 0), 0), len(self.tiers) - 1)
+        prompt_tokens = sum(estimate_tokens(message.content) for message in messages)
+        return step, tier, prompt_tokens
+
+    def _escalate(
+        self,
+        step: str,
+        tier: int,
+        started: float,
+        prompt_tokens: int,
+        result: ChatResult,
+        messages: List[BaseMessage],
+    ) -> bool:
+        """Record the call on ``tier``, True if the next tier should retry it."""
+        text = result.generations[0].text
+        is_last = tier == len(self.tiers) - 1
+        reason = None if is_last else escalation_reason(text, messages)
+        with self._lock:
+            stats = self._stats[tier]
+            stats.latencies.append(time.time() - started)
+            stats.steps[step] += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += estimate_tokens(text)
+            if reason:
+                stats.escalations += 1
+        return reason is not None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Steps, escalations, latency and estimated cost (USD) per tier."""
+        with self._lock:
+            result = {}
+            for model, stats in zip(self.tiers, self._stats):
+                price = model_price(model)
+                cost = (
+                    round(
+                        stats.prompt_tokens / 1000 * price[0]
+                        + stats.completion_tokens / 1000 * price[1],
+                        4,
+                    )
+                    if price
+                    else None
+                )
+                result[model] = {
+                    "calls": len(stats.latencies),
+                    "steps": dict(stats.steps),
+                    "escalations": stats.escalations,
+                    "latency_seconds": percentiles(stats.latencies),
+                    "prompt_tokens": stats.prompt_tokens,
+                    "completion_tokens": stats.completion_tokens,
+                    "cost": cost,
+                }
+            return result
+
+
+class RoutedChatModel(BaseChatModel):
+    """Chat model that sends every call through a ``ModelRouter``."""
+
+    router: ModelRouter
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+    ) -> ChatResult:
+        return self.router.generate(messages, stop=stop, run_manager=run_manager)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+    ) -> ChatResult:
+        return await self.router.agenerate(messages, stop=stop, run_manager=run_manager)
+
+    def get_num_tokens(self, text: str) -> int:
+        # Prompts are sized for the smallest context, the cheapest tier
+        return self.router.llms[0].get_num_tokens(text)
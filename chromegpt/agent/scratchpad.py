@@ -0,0 +1,106 @@
+"""Rolling scratchpad: recent agent steps in full, older ones summarized."""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain import LLMChain, PromptTemplate
+from langchain.base_language import BaseLanguageModel
+from langchain.schema import AgentAction
+
+from chromegpt.tools.utils import estimate_tokens
+
+SUMMARY_PROMPT = PromptTemplate.from_template(
+    "You keep a short summary of the progress of a web browsing agent. Update the"
+    " summary with the new step. Keep visited urls, found facts, filled forms and"
+    " dead ends, drop page boilerplate. Answer with the new summary only.\n\n"
+    "Current summary:\n{summary}\n\nNew step:\n{step}\n\nNew summary:"
+)
+
+
+class ScratchpadManager:
+    """Build the agent scratchpad within a token budget without forgetting steps.
+
+    The last ``window`` steps are shown in full as long as they fit in
+    ``token_budget``. Each step that falls out of the window is folded into a running
+    summary exactly once, so every call costs at most the summarization of the steps
+    that were just dropped.
+    """
+
+    def __init__(
+        self,
+        llm: Optional[BaseLanguageModel] = None,
+        window: int = 4,
+        token_budget: int = 2500,
+        summary_token_limit: int = 400,
+        max_observation_chars: int = 1500,
+        token_counter: Callable[[str], int] = estimate_tokens,
+    ) -> None:
+        self.chain = LLMChain(llm=llm, prompt=SUMMARY_PROMPT) if llm else None
+        self.window = window
+        self.token_budget = token_budget
+        self.summary_token_limit = summary_token_limit
+        self.max_observation_chars = max_observation_chars
+        self.token_counter = token_counter
+        self.summary = ""
+        self.summarized_steps = 0
+
+    def get_full_inputs(
+        self,
+        agent: Any,
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """Create the full inputs for the agent's LLMChain, see ``Agent``."""
+        if len(intermediate_steps) < self.summarized_steps:
+            # A new run started with the same agent
+            self.summary = ""
+            self.summarized_steps = 0
+        start = max(self.summarized_steps, len(intermediate_steps) - self.window)
+        while (
+            start < len(intermediate_steps) - 1
+            and self._count_tokens(intermediate_steps[start:]) > self.token_budget
+        ):
+            start += 1
+        for step in intermediate_steps[self.summarized_steps : start]:
+            self.summary = self._summarize(step)
+        self.summarized_steps = max(start, self.summarized_steps)
+
+        thoughts = agent._construct_scratchpad(
+            intermediate_steps[self.summarized_steps :]
+        )
+        if self.summary:
+            thoughts = f"Summary of your earlier steps:\n{self.summary}\n\n{thoughts}"
+        new_inputs = {"agent_scratchpad": thoughts, "stop": agent._stop}
+        return {**kwargs, **new_inputs}
+
+    def _count_tokens(self, steps: List[Tuple[AgentAction, str]]) -> int:
+        return sum(
+            self.token_counter(action.log) + self.token_counter(observation)
+            for action, observation in steps
+        )
+
+    def _format_step(self, step: Tuple[AgentAction, str]) -> str:
+        action, observation = step
+        if len(observation) > self.max_observation_chars:
+            observation = observation[: self.max_observation_chars] + "..."
+        return f"{action.tool}({action.tool_input}) -> {observation}"
+
+    def _summarize(self, step: Tuple[AgentAction, str]) -> str:
+        """Fold one step into the running summary."""
+        if self.chain is not None:
+            try:
+                return self.chain.run(
+                    summary=self.summary or "(nothing yet)",
+                    step=self._format_step(step),
+                ).strip()
+            except Exception:
+                # Fall back to the extractive summary below
+                pass
+        action, observation = step
+        line = f"- {action.tool}({action.tool_input}): {observation[:200]}"
+        lines = (self.summary.splitlines() if self.summary else []) + [line]
+        # Drop the oldest lines once the summary is over its limit
+        while (
+            len(lines) > 1
+            and self.token_counter("\n".join(lines)) > self.summary_token_limit
+        ):
+            lines.pop(0)
+        return "\n".join(lines)
@@ -0,0 +1,152 @@
+"""Stream LLM output and stop as soon as a complete action has been generated."""
+import json
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from langchain.callbacks.manager import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain.chat_models.openai import _convert_dict_to_message
+from langchain.schema import BaseMessage, ChatGeneration, ChatResult
+
+from chromegpt.agent.gateway import GatewayChatOpenAI
+
+FINAL_ANSWER_PREFIX = "Final Answer:"
+
+
+class IncrementalActionParser:
+    """Scan LLM output token by token for a complete JSON action.
+
+    Recognizes the chat ReAct blob (``{"action": ..., "action_input": ...}``), a list
+    of such blobs, and the AutoGPT response (``{"thoughts": ..., "command": {...}}``).
+    Final answers are never cut short, since everything after the prefix is the answer.
+    """
+
+    def __init__(self, action_keys: Sequence[str] = ("action", "command")) -> None:
+        self.action_keys = action_keys
+        self.text = ""
+        self.action: Optional[Union[Dict[str, Any], List[Dict[str, Any]]]] = None
+        self._end = -1
+        self._depth = 0
+        self._start = -1
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, token: str) -> bool:
+        """Add ``token`` to the output. Returns True once an action is complete."""
+        if self.action is not None:
+            return True
+        for char in token:
+            self.text += char
+            if self._depth and self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif self._depth and char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    self._start = len(self.text) - 1
+                self._depth += 1
+            elif char in "}]" and self._depth:
+                self._depth -= 1
+                if self._depth == 0 and self._check_candidate():
+                    return True
+        return False
+
+    def completion(self) -> str:
+        """The output up to and including the parsed action, closing any code fence."""
+        if self.action is None:
+            return self.text
+        text = self.text[: self._end]
+        if text.count("```") % 2:
+            text += "\n```"
+        return text
+
+    def _check_candidate(self) -> bool:
+        if FINAL_ANSWER_PREFIX in self.text:
+            return False
+        try:
+            candidate = json.loads(self.text[self._start :])
+        except json.decoder.JSONDecodeError:
+            return False
+        items = candidate if isinstance(candidate, list) else [candidate]
+        if not items or not all(
+            isinstance(item, dict) and any(key in item for key in self.action_keys)
+            for item in items
+        ):
+            return False
+        self.action = candidate
+        self._end = len(self.text)
+        return True
+
+
+class EarlyStopChatOpenAI(GatewayChatOpenAI):
+    """ChatOpenAI that streams its completion and stops once an action is parsed.
+
+    The agent can run the tool as soon as the action JSON is closed instead of
+    waiting for whatever the model writes after it.
+    """
+
+    streaming: bool = True
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+    ) -> ChatResult:
+        message_dicts, params = self._create_message_dicts(messages, stop)
+        params["stream"] = True
+        parser = IncrementalActionParser()
+        role = "assistant"
+        stream = self.completion_with_retry(messages=message_dicts, **params)
+        try:
+            for stream_resp in stream:
+                role = stream_resp["choices"][0]["delta"].get("role", role)
+                token = stream_resp["choices"][0]["delta"].get("content", "")
+                if run_manager:
+                    run_manager.on_llm_new_token(token)
+                if parser.feed(token):
+                    break
+        finally:
+            # Drop the rest of the response instead of downloading it
+            if hasattr(stream, "close"):
+                stream.close()
+        return self._create_early_stop_result(parser, role)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+    ) -> ChatResult:
+        message_dicts, params = self._create_message_dicts(messages, stop)
+        params["stream"] = True
+        parser = IncrementalActionParser()
+        role = "assistant"
+        stream = await self.acompletion_with_retry(messages=message_dicts, **params)
+        try:
+            async for stream_resp in stream:
+                role = stream_resp["choices"][0]["delta"].get("role", role)
+                token = stream_resp["choices"][0]["delta"].get("content", "")
+                if run_manager:
+                    await run_manager.on_llm_new_token(token)
+                if parser.feed(token):
+                    break
+        finally:
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
+        return self._create_early_stop_result(parser, role)
+
+    def _create_early_stop_result(
+        self, parser: IncrementalActionParser, role: str
+    ) -> ChatResult:
+        message = _convert_dict_to_message(
+            {"content": parser.completion(), "role": role}
+        )
+        generation = ChatGeneration(message=message)  # type: ignore
+        return ChatResult(generations=[generation])
@@ -0,0 +1,270 @@
+"""Record successful tool sequences and replay them for similar tasks."""
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain import LLMChain, PromptTemplate
+from langchain.base_language import BaseLanguageModel
+from langchain.schema import AgentAction
+from langchain.tools.base import BaseTool
+
+from chromegpt.tools.utils import ERROR_PREFIXES
+
+# Values that vary between otherwise identical tasks: quoted strings, urls, emails
+# and numbers
+_VALUE_PATTERN = re.compile(
+    r"\"([^\"]+)\"|(?<!\w)'([^']+)'(?!\w)|(https?://\S+)|([\w.+-]+@[\w-]+\.[\w.-]+)"
+    r"|(\b\d[\d.,:/-]*)"
+)
+
+ITERATION_LIMIT_OUTPUT = "Agent stopped due to iteration limit or time limit."
+
+FINAL_ANSWER_PROMPT = PromptTemplate.from_template(
+    "A web browsing agent completed these steps for the task: {task}\n\n{steps}\n\n"
+    "Answer the task in one or two sentences based on the steps above."
+)
+
+
+def parameterize(task: str) -> Tuple[str, List[str]]:
+    """Split ``task`` into a normalized template and the values that fill it."""
+    values: List[str] = []
+
+    def _placeholder(match: "re.Match[str]") -> str:
+        values.append(next(group for group in match.groups() if group))
+        return f"<<p{len(values) - 1}>>"
+
+    template = _VALUE_PATTERN.sub(_placeholder, task)
+    template = re.sub(r"\s+", " ", template).strip().lower()
+    return template, values
+
+
+def fill_placeholders(value: Any, params: List[str], reverse: bool = False) -> Any:
+    """Swap task values and their placeholders in a (nested) tool input."""
+    if isinstance(value, dict):
+        return {k: fill_placeholders(v, params, reverse) for k, v in value.items()}
+    if isinstance(value, list):
+        return [fill_placeholders(v, params, reverse) for v in value]
+    if not isinstance(value, str):
+        return value
+    if not reverse:
+        for i, param in enumerate(params):
+            value = value.replace(f"<<p{i}>>", param)
+        return value
+    # Short numbers ("2") are only a parameter when they are the whole input,
+    # anywhere else they are likely part of a date, price or path
+    whole = next((i for i, param in enumerate(params) if param == value), None)
+    if whole is not None:
+        return f"<<p{whole}>>"
+    searchable = [
+        i
+        for i, param in enumerate(params)
+        if param and not (len(param) < 3 and param.isdigit())
+    ]
+    if not searchable:
+        return value
+    # One pass, longest values first so that one value inside another isn't split
+    # up, and only whole tokens so "2" doesn't match inside "2024" (a sentence's
+    # full stop may follow)
+    searchable.sort(key=lambda i: -len(params[i]))
+    pattern = re.compile(
+        r"(?<![\w.])(?:"
+        + "|".join(f"({re.escape(params[i])})" for i in searchable)
+        + r")(?!\w|\.\w)"
+    )
+    return pattern.sub(
+        lambda match: f"<<p{searchable[match.lastindex - 1]}>>",  # type: ignore
+        value,
+    )
+
+
+def is_error_observation(observation: str) -> bool:
+    return observation.startswith(ERROR_PREFIXES) or "is not a valid tool" in (
+        observation
+    )
+
+
+def page_outcome(observation: str) -> Optional[str]:
+    """Whether a click or form submission changed the page, None if unknown."""
+    if "nothing changed" in observation or "did not change" in observation:
+        return "unchanged"
+    if "website changed" in observation:
+        return "changed"
+    return None
+
+
+class TrajectoryStore:
+    """Successful tool sequences per task template, kept in one JSON file.
+
+    A trajectory is dropped once its replay failed ``max_failures`` times in a row.
+    """
+
+    def __init__(
+        self, root_dir: str = "~/.chromegpt/trajectories", max_failures: int = 3
+    ) -> None:
+        self.path = os.path.join(os.path.expanduser(root_dir), "trajectories.json")
+        self.max_failures = max_failures
+        self._lock = threading.Lock()
+        try:
+            with open(self.path) as f:
+                self.trajectories: Dict[str, Dict[str, Any]] = json.load(f)
+        except (OSError, ValueError):
+            self.trajectories = {}
+
+    def match(self, task: str) -> Optional[Tuple[Dict[str, Any], List[str]]]:
+        """Find the trajectory for ``task``, with the values to fill it in."""
+        template, params = parameterize(task)
+        trajectory = self.trajectories.get(template)
+        if trajectory is None or trajectory["num_params"] != len(params):
+            return None
+        return trajectory, params
+
+    def record(
+        self, task: str, steps: List[Tuple[AgentAction, str]], answer: str
+    ) -> bool:
+        """Store the successful steps of a run, returns False if not replayable."""
+        template, params = parameterize(task)
+        good_steps = [
+            {
+                "tool": action.tool,
+                "tool_input": fill_placeholders(action.tool_input, params, True),
+                "outcome": page_outcome(observation),
+            }
+            for action, observation in steps
+            if not is_error_observation(observation)
+        ]
+        serialized = json.dumps([step["tool_input"] for step in good_steps])
+        # A value the steps don't depend on could change the answer without
+        # changing the plan, such tasks always need the LLM
+        if not good_steps or any(
+            f"<<p{i}>>" not in serialized for i in range(len(params))
+        ):
+            return False
+        with self._lock:
+            self.trajectories[template] = {
+                "num_params": len(params),
+                "steps": good_steps,
+                "answer": fill_placeholders(answer, params, True),
+                "failures": 0,
+                "recorded_at": time.time(),
+            }
+            self._save()
+        return True
+
+    def mark_replayed(self, task: str, succeeded: bool) -> None:
+        """Count a replay of the trajectory for ``task``."""
+        template, _ = parameterize(task)
+        with self._lock:
+            trajectory = self.trajectories.get(template)
+            if trajectory is None:
+                return
+            trajectory["failures"] = 0 if succeeded else trajectory["failures"] + 1
+            if trajectory["failures"] >= self.max_failures:
+                del self.trajectories[template]
+            self._save()
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.trajectories, f)
+        os.replace(tmp_path, self.path)
+
+
+class ReplayResult:
+    """Steps replayed for a task; ``output`` is set if the replay finished it."""
+
+    def __init__(self) -> None:
+        self.steps: List[Tuple[AgentAction, str]] = []
+        self.output: Optional[str] = None
+
+    def handoff(self, task: str) -> str:
+        """The task for the LLM agent, continuing after the replayed steps."""
+        if not self.steps:
+            return task
+        done = "\n".join(
+            f"- {action.tool}({json.dumps(action.tool_input)})"
+            for action, _ in self.steps
+        )
+        return (
+            f"{task}\n\nThese steps were already completed, continue from the"
+            f" current page:\n{done}\nLast result: {self.steps[-1][1][:1000]}"
+        )
+
+
+class TrajectoryReplayer:
+    """Replay stored trajectories against the agent's tools without the LLM.
+
+    Each step's observation is checked: an error, or a click/form submission that
+    changes the page when it didn't while recording (or vice versa), stops the
+    replay so the LLM agent can take over from the current page. A finished replay
+    is answered with one LLM call over the observations when an ``llm`` is given,
+    otherwise with the recorded answer.
+    """
+
+    def __init__(
+        self,
+        store: TrajectoryStore,
+        tools: Sequence[BaseTool],
+        llm: Optional[BaseLanguageModel] = None,
+    ) -> None:
+        self.store = store
+        self.tools = {tool.name: tool for tool in tools}
+        self.chain = LLMChain(llm=llm, prompt=FINAL_ANSWER_PROMPT) if llm else None
+
+    def replay(self, task: str) -> ReplayResult:
+        result = ReplayResult()
+        match = self.store.match(task)
+        if match is None:
+            return result
+        trajectory, params = match
+        for step in trajectory["steps"]:
+            tool = self.tools.get(step["tool"])
+            if tool is None:
+                self.store.mark_replayed(task, succeeded=False)
+                return result
+            tool_input = fill_placeholders(step["tool_input"], params)
+            try:
+                observation = str(tool.run(tool_input))
+            except Exception as e:
+                observation = f"Error running {step['tool']}: {e}"
+            action = AgentAction(step["tool"], tool_input, "Replayed known plan")
+            result.steps.append((action, observation))
+            if is_error_observation(observation) or (
+                step["outcome"] and page_outcome(observation) != step["outcome"]
+            ):
+                self.store.mark_replayed(task, succeeded=False)
+                return result
+        self.store.mark_replayed(task, succeeded=True)
+        result.output = self._answer(task, trajectory, params, result.steps)
+        return result
+
+    def record(
+        self, task: str, steps: List[Tuple[AgentAction, str]], output: str
+    ) -> bool:
+        """Store the steps of a run that the LLM agent finished."""
+        if output == ITERATION_LIMIT_OUTPUT:
+            return False
+        return self.store.record(task, steps, output)
+
+    def _answer(
+        self,
+        task: str,
+        trajectory: Dict[str, Any],
+        params: List[str],
+        steps: List[Tuple[AgentAction, str]],
+    ) -> str:
+        if self.chain is not None:
+            formatted = "\n".join(
+                f"{action.tool}({json.dumps(action.tool_input)}) ->"
+                f" {observation[:1500]}"
+                for action, observation in steps[-3:]
+            )
+            try:
+                return self.chain.run(task=task, steps=formatted).strip()
+            except Exception:
+                # Fall back to the recorded answer below
+                pass
+        return fill_placeholders(trajectory["answer"], params)
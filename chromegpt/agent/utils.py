@@ -1,25 +1,30 @@
-from typing import List
+from typing import Any, Callable, Iterable, List, Optional
 
 from langchain.agents import Tool
-from langchain.docstore import InMemoryDocstore
-from langchain.embeddings import OpenAIEmbeddings
+from langchain.docstore.document import Document
+from langchain.embeddings.base import Embeddings
 from langchain.tools.base import BaseTool
-from langchain.vectorstores import FAISS
+from langchain.vectorstores.base import VectorStore
 
 from chromegpt.tools.selenium import (
     ClickButtonInput,
+    ComparePagesInput,
     DescribeWebsiteInput,
     FillOutFormInput,
     FindFormInput,
     GoogleSearchInput,
+    OpenTabInput,
+    RunScriptInput,
     ScrollInput,
     SeleniumWrapper,
+    SwitchTabInput,
 )
 
 
-def get_agent_tools() -> List[BaseTool]:
+def get_agent_tools(selenium: Optional[SeleniumWrapper] = None) -> List[BaseTool]:
     """Get the tools that will be used by the AI agent."""
-    selenium = SeleniumWrapper()
+    if selenium is None:
+        selenium = SeleniumWrapper()
     tools: List[BaseTool] = [
         Tool(
             name="goto",
@@ -65,6 +70,43 @@ def get_agent_tools() -> List[BaseTool]:
             description="perform a google search",
             args_schema=GoogleSearchInput,
         ),
+        Tool(
+            name="open_tab",
+            func=selenium.open_tab,
+            description=(
+                "useful for when you want to visit a website in a new tab and keep the"
+                " current page open"
+            ),
+            args_schema=OpenTabInput,
+        ),
+        Tool(
+            name="switch_tab",
+            func=selenium.switch_tab,
+            description="switch to an open tab by its name",
+            args_schema=SwitchTabInput,
+        ),
+        Tool(
+            name="compare_pages",
+            func=selenium.compare_pages,
+            description=(
+                "useful for when you need to look at several websites at once, e.g."
+                " comparing venues or products. Input should be a comma separated list"
+                " of urls. Each page is kept open in its own tab"
+            ),
+            args_schema=ComparePagesInput,
+        ),
+        ScriptTool(
+            name="run_script",
+            func=selenium.run_script,
+            description=(
+                "useful for when you are sure of the next few steps, e.g. go to a"
+                " url, click a link and fill out a form. Runs goto, click, fill_form"
+                " and scroll steps in one go and returns the status of each step"
+                " and the final page. Input should be a json object with a"
+                ' "steps" list, each step with an "action" and its "input"'
+            ),
+            args_schema=RunScriptInput,
+        ),
         # TODO: Re-enable this, StopIteration error, cannot parse None as input
         # Tool(
         #     name="previous_webpage",
@@ -76,16 +118,91 @@ def get_agent_tools() -> List[BaseTool]:
         # ReadFileTool(root_dir="./"),
         # WriteFileTool(root_dir="./"),
     ]
+    # Report every tool call to the session's listeners, move dead sessions
+    for tool in tools:
+        tool.func = selenium.events.wrap(  # type: ignore
+            tool.name, selenium.with_failover(tool.func)  # type: ignore
+        )
     return tools
 
 
-def get_vectorstore() -> FAISS:
+class ScriptTool(Tool):
+    """Tool that also takes its steps as a bare list instead of ``{"steps": ...}``."""
+
+    def run(self, tool_input: Any, *args: Any, **kwargs: Any) -> Any:
+        if isinstance(tool_input, list):
+            tool_input = {"steps": tool_input}
+        return super().run(tool_input, *args, **kwargs)
+
+    async def arun(self, tool_input: Any, *args: Any, **kwargs: Any) -> Any:
+        if isinstance(tool_input, list):
+            tool_input = {"steps": tool_input}
+        return await super().arun(tool_input, *args, **kwargs)
+
+
+class LazyVectorStore(VectorStore):
+    """VectorStore that only builds the underlying store when memory is used.
+
+    Loading FAISS and the embedding model is deferred from agent construction to the
+    first time something is stored or retrieved.
+    """
+
+    def __init__(self, factory: Callable[[], VectorStore]) -> None:
+        self._factory = factory
+        self._store: Optional[VectorStore] = None
+
+    @property
+    def store(self) -> VectorStore:
+        if self._store is None:
+            self._store = self._factory()
+        return self._store
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        return self.store.add_texts(texts, metadatas=metadatas, **kwargs)
+
+    def similarity_search(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Document]:
+        return self.store.similarity_search(query, k=k, **kwargs)
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> "LazyVectorStore":
+        """FAISS store of ``texts``, embedded the first time it is used."""
+
+        def factory() -> VectorStore:
+            from langchain.vectorstores import FAISS
+
+            return FAISS.from_texts(texts, embedding, metadatas=metadatas, **kwargs)
+
+        return cls(factory)
+
+
+def _get_faiss_vectorstore() -> VectorStore:
+    import faiss
+    from langchain.docstore import InMemoryDocstore
+    from langchain.embeddings import OpenAIEmbeddings
+    from langchain.vectorstores import FAISS
+
     # Define your embedding model
     embeddings_model = OpenAIEmbeddings()  # type: ignore
     # Initialize the vectorstore as empty
-    import faiss
-
     embedding_size = 1536
     index = faiss.IndexFlatL2(embedding_size)
     vectorstore = FAISS(embeddings_model.embed_query, index, InMemoryDocstore({}), {})
     return vectorstore
+
+
+def get_vectorstore() -> VectorStore:
+    """Get an empty vectorstore, FAISS is loaded the first time it is used."""
+    return LazyVectorStore(_get_faiss_vectorstore)
@@ -1,128 +1,123 @@
 """Module for the zero shot agent. Optimized for GPT-3.5 use."""
 import types
-from typing import Any, Dict, List, Tuple
+from typing import List, Optional
 
-from langchain import LLMChain, PromptTemplate
-from langchain.agents import AgentType, Tool, initialize_agent
+from langchain.agents import AgentType, initialize_agent
 from langchain.agents.agent import AgentExecutor
-from langchain.agents.mrkl.base import ZeroShotAgent as LangChainZeroShotAgent
-from langchain.chat_models import ChatOpenAI
-from langchain.experimental import BabyAGI
-from langchain.schema import AgentAction
-from langchain.tools.base import BaseTool
+from langchain.agents.chat.base import ChatAgent
+from langchain.chat_models.base import BaseChatModel
 
 from chromegpt.agent.chromegpt_agent import ChromeGPTAgent
-from chromegpt.agent.utils import get_agent_tools, get_vectorstore
+from chromegpt.agent.gateway import PRIORITY_BACKGROUND, GatewayChatOpenAI
+from chromegpt.agent.parallel import (
+    PARALLEL_FORMAT_INSTRUCTIONS,
+    MultiActionOutputParser,
+    ParallelAgentExecutor,
+)
+from chromegpt.agent.repair import ActionRepairer, RepairingChatOutputParser
+from chromegpt.agent.routing import ModelRouter, RoutedChatModel
+from chromegpt.agent.scratchpad import ScratchpadManager
+from chromegpt.agent.streaming import EarlyStopChatOpenAI
+from chromegpt.agent.trajectory import TrajectoryReplayer, TrajectoryStore
+from chromegpt.agent.utils import get_agent_tools
+from chromegpt.tools.pool import SeleniumPool
+from chromegpt.tools.selenium import SeleniumWrapper
 
 
-def get_zeroshot_agent(llm: ChatOpenAI, verbose: bool = False) -> AgentExecutor:
-    """Get the zero shot agent. Optimized for GPT-3.5 use."""
-    tools = get_agent_tools()
-    agent = initialize_agent(
-        tools, llm, agent=AgentType.CHAT_ZERO_SHOT_REACT_DESCRIPTION, verbose=verbose
-    )
-    return agent
-
+def get_zeroshot_agent(
+    llm: BaseChatModel,
+    verbose: bool = False,
+    selenium: Optional[SeleniumWrapper] = None,
+    selenium_pool: Optional[SeleniumPool] = None,
+) -> AgentExecutor:
+    """Get the zero shot agent. Optimized for GPT-3.5 use.
 
-def _get_full_inputs(
-    self: Any,
-    intermediate_steps: List[Tuple[AgentAction, str]],
-    **kwargs: Dict[str, Any]
-) -> Dict[str, Any]:
-    """Create the full inputs for the LLMChain from intermediate steps.
-    Patched version limit to 5 intermediate steps.
+    With a ``selenium_pool`` the agent may return several actions per turn, which
+    are run concurrently on the pooled browser sessions.
     """
-    thoughts = self._construct_scratchpad(
-        intermediate_steps[-4:]
-    )  # limit to 4 intermediate steps for GPT-3.5
-    new_inputs = {"agent_scratchpad": thoughts, "stop": self._stop}
-    full_inputs = {**kwargs, **new_inputs}
-    return full_inputs
-
-
-class ZeroShotAgent(ChromeGPTAgent):
-    def __init__(self, model: str = "gpt-3.5-turbo", verbose: bool = False) -> None:
-        """Initialize the ZeroShotAgent."""
-        self.model = model
-        self.agent = get_zeroshot_agent(
-            llm=ChatOpenAI(model_name=model, temperature=0),  # type: ignore
+    tools = get_agent_tools(selenium)
+    # Repair malformed actions locally instead of asking the LLM again
+    repairer = ActionRepairer(tools)
+    if selenium_pool is None or selenium_pool.size < 1:
+        return initialize_agent(
+            tools,
+            llm,
+            agent=AgentType.CHAT_ZERO_SHOT_REACT_DESCRIPTION,
             verbose=verbose,
+            agent_kwargs={
+                "output_parser": RepairingChatOutputParser(repairer=repairer)
+            },
         )
-        self.agent.max_iterations = 30
-        self.agent.agent.__dict__["get_full_inputs"] = types.MethodType(
-            _get_full_inputs, self.agent.agent
-        )
+    agent = ChatAgent.from_llm_and_tools(
+        llm,
+        tools,
+        output_parser=MultiActionOutputParser(repairer=repairer),
+        format_instructions=PARALLEL_FORMAT_INSTRUCTIONS,
+    )
+    return ParallelAgentExecutor.from_agent_and_tools(
+        agent=agent, tools=tools, pool=selenium_pool, verbose=verbose
+    )
 
-    def run(self, tasks: List[str]) -> str:
-        return self.agent.run(" ".join(tasks))
 
+class ZeroShotAgent(ChromeGPTAgent):
+    def __init__(
+        self,
+        model: str = "gpt-3.5-turbo",
+        verbose: bool = False,
+        selenium: Optional[SeleniumWrapper] = None,
+        selenium_pool: Optional[SeleniumPool] = None,
+        trajectory_store: Optional[TrajectoryStore] = None,
+        router: Optional[ModelRouter] = None,
+    ) -> None:
+        """Initialize the ZeroShotAgent.
 
-class BabyAGIAgent(ChromeGPTAgent):
-    def __init__(self, model: str = "gpt-3.5-turbo", verbose: bool = False) -> None:
-        """Initialize the BabyAGIAgent."""
+        With a ``trajectory_store`` tasks that match a recorded plan are replayed
+        without the LLM, and successful runs are recorded. With a ``router`` each
+        step goes to the model tier for its kind of step instead of ``model``.
+        """
         self.model = model
-        self.babyagi = self._get_baby_agi(verbose=verbose)
-
-    def _get_todo_tool(self) -> Tool:
-        todo_prompt = PromptTemplate.from_template(
-            "You are a planner who is an expert at coming up "
-            "with a todo list for a given objective. Come up "
-            "with a todo list for this objective: {objective}"
-        )
-        todo_chain = LLMChain(
-            llm=ChatOpenAI(model=self.model, temperature=0),  # type: ignore
-            prompt=todo_prompt,
-        )
-        return Tool(
-            name="TODO",
-            func=todo_chain.run,
-            description=(
-                "useful for when you need to come up with todo lists. Input: an"
-                " objective to create a todo list for. Output: a todo list for that"
-                " objective. Please be very clear what the objective is!"
-            ),
-        )
-
-    def _get_baby_agi(self, verbose: bool = False, max_iterations: int = 20) -> BabyAGI:
-        """Get the zero shot agent. Optimized for GPT-3.5 use."""
-        llm = ChatOpenAI(model_name=self.model, temperature=0)  # type: ignore
-        tools = get_agent_tools()
-        # Add ToDo tool for baby agi
-        tools.append(self._get_todo_tool())
-        agent = self._get_zero_shot_agent(llm=llm, verbose=verbose, tools=tools)
-        vectorstore = get_vectorstore()
-        baby_agi = BabyAGI.from_llm(
+        if router:
+            llm: BaseChatModel = RoutedChatModel(router=router)
+        else:
+            llm = EarlyStopChatOpenAI(model_name=model, temperature=0)  # type: ignore
+        self.agent = get_zeroshot_agent(
             llm=llm,
-            vectorstore=vectorstore,  # type: ignore
-            task_execution_chain=agent,
             verbose=verbose,
-            max_iterations=max_iterations,  # type: ignore
+            selenium=selenium,
+            selenium_pool=selenium_pool,
         )
-        return baby_agi
-
-    def _get_zero_shot_agent(
-        self, llm: ChatOpenAI, verbose: bool, tools: List[BaseTool]
-    ) -> AgentExecutor:
-        prefix = (
-            "You are an AI who performs one task based on the "
-            "following objective: {objective}. Take into account these "
-            "previously completed tasks: {context}."
-        )
-        suffix = """Question: {task}
-        {agent_scratchpad}"""
-        prompt = LangChainZeroShotAgent.create_prompt(
-            tools,
-            prefix=prefix,
-            suffix=suffix,
-            input_variables=["objective", "task", "context", "agent_scratchpad"],
+        self.agent.max_iterations = 30
+        # Keep the last 4 steps in full for GPT-3.5, summarize the older ones
+        self.scratchpad = ScratchpadManager(
+            llm=GatewayChatOpenAI(
+                model_name=model,  # type: ignore
+                temperature=0,
+                priority=PRIORITY_BACKGROUND,
+            ),
+            window=4,
         )
-        llm_chain = LLMChain(llm=llm, prompt=prompt)
-        tool_names = [tool.name for tool in tools]
-        agent = LangChainZeroShotAgent(llm_chain=llm_chain, allowed_tools=tool_names)
-        agent_executor = AgentExecutor.from_agent_and_tools(
-            agent=agent, tools=tools, verbose=True, max_iterations=4
+        self.agent.agent.__dict__["get_full_inputs"] = types.MethodType(
+            self.scratchpad.get_full_inputs, self.agent.agent
         )
-        return agent_executor
+        self.replayer = None
+        if trajectory_store is not None:
+            self.agent.return_intermediate_steps = True
+            self.replayer = TrajectoryReplayer(
+                trajectory_store,
+                self.agent.tools,
+                llm=GatewayChatOpenAI(model_name=model, temperature=0),  # type: ignore
+            )
 
     def run(self, tasks: List[str]) -> str:
-        return str(self.babyagi({"objective": " ".join(tasks)}))
+        task = " ".join(tasks)
+        if self.replayer is None:
+            return self.agent.run(task)
+        replay = self.replayer.replay(task)
+        if replay.output is not None:
+            return replay.output
+        # Let the LLM take over from wherever the replay stopped
+        outputs = self.agent({"input": replay.handoff(task)})
+        self.replayer.record(
+            task, replay.steps + outputs["intermediate_steps"], outputs["output"]
+        )
+        return outputs["output"]
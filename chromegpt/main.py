@@ -1,6 +1,125 @@
-from chromegpt.agent.autogpt import AutoGPTAgent
+from typing import Any, Callable, Dict, Optional
+
 from chromegpt.agent.chromegpt_agent import ChromeGPTAgent
-from chromegpt.agent.zeroshot import BabyAGIAgent, ZeroShotAgent
+from chromegpt.agent.gateway import LLMGateway, ModelLimits, set_gateway
+from chromegpt.agent.registry import get_agent_class
+from chromegpt.agent.routing import STEP_TYPES, ModelRouter
+from chromegpt.agent.trajectory import TrajectoryStore
+from chromegpt.tools.grid import GridScheduler
+from chromegpt.tools.json_repair import retries_saved
+from chromegpt.tools.locator_cache import LocatorCache
+from chromegpt.tools.pool import SeleniumPool
+from chromegpt.tools.selenium import SeleniumWrapper
+from chromegpt.tools.session_state import SessionStateStore
+
+
+def get_selenium_factory(
+    headless: bool = False,
+    prefetch_top_k: int = 0,
+    session_dir: Optional[str] = None,
+    tenant: str = "default",
+    observation_budget: Optional[int] = None,
+    page_model: str = "dom",
+    locator_cache: Optional[LocatorCache] = None,
+    grid: Optional[GridScheduler] = None,
+    dedup_boilerplate: bool = False,
+) -> Callable[[], SeleniumWrapper]:
+    """Get a function that starts identically configured browser sessions."""
+
+    def make_selenium() -> SeleniumWrapper:
+        session_store = (
+            SessionStateStore(session_dir, tenant=tenant) if session_dir else None
+        )
+        return SeleniumWrapper(
+            headless=headless,
+            prefetch_top_k=prefetch_top_k,
+            session_store=session_store,
+            observation_budget=observation_budget,
+            page_model=page_model,
+            locator_cache=locator_cache,
+            grid=grid,
+            dedup_boilerplate=dedup_boilerplate,
+        )
+
+    return make_selenium
+
+
+def get_grid(endpoints: Optional[str], capacity: int = 4) -> Optional[GridScheduler]:
+    """Get a scheduler over the comma-separated WebDriver ``endpoints``, if any."""
+    urls = [url.strip() for url in (endpoints or "").split(",") if url.strip()]
+    return GridScheduler(urls, capacity=capacity) if urls else None
+
+
+def setup_llm_gateway(
+    requests_per_minute: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+    concurrency: Optional[int] = None,
+) -> Optional[LLMGateway]:
+    """Send all LLM requests through one rate-limited gateway, if limits are set."""
+    if not (requests_per_minute or tokens_per_minute or concurrency):
+        return None
+    gateway = LLMGateway(
+        default_limits=ModelLimits(
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            max_concurrency=concurrency or 8,
+        )
+    )
+    set_gateway(gateway)
+    return gateway
+
+
+def get_model_router(
+    model: str,
+    fast_model: Optional[str],
+    fast_steps: str = "navigation,extraction,form",
+) -> Optional[ModelRouter]:
+    """Route the comma-separated ``fast_steps`` to ``fast_model``, the rest to
+    ``model``. None without a ``fast_model``."""
+    if not fast_model:
+        return None
+    steps = {step.strip() for step in fast_steps.split(",") if step.strip()}
+    unknown = steps.difference(STEP_TYPES)
+    if unknown:
+        raise ValueError(
+            f"Unknown step types {sorted(unknown)}, choose from {list(STEP_TYPES)}"
+        )
+    return ModelRouter(
+        [fast_model, model],
+        routes={step: 0 if step in steps else 1 for step in STEP_TYPES},
+    )
+
+
+def build_agent(
+    agent: str,
+    model: str,
+    selenium: SeleniumWrapper,
+    selenium_pool: Optional[SeleniumPool] = None,
+    verbose: bool = False,
+    continuous: bool = True,
+    trajectory_store: Optional[TrajectoryStore] = None,
+    router: Optional[ModelRouter] = None,
+    prioritize_every: int = 1,
+) -> ChromeGPTAgent:
+    """Build the agent registered as ``agent`` on the given browser sessions."""
+    # only the selected agent's dependencies get imported
+    agent_cls = get_agent_class(agent)
+    agent_kwargs: Dict[str, Any] = {
+        "model": model,
+        "verbose": verbose,
+        "selenium": selenium,
+    }
+    if agent == "auto-gpt":
+        agent_kwargs["continuous"] = continuous
+    else:
+        agent_kwargs["selenium_pool"] = selenium_pool
+    if agent == "zero-shot":
+        agent_kwargs["trajectory_store"] = trajectory_store
+    if agent == "baby-agi":
+        agent_kwargs["prioritize_every"] = prioritize_every
+    if router:
+        agent_kwargs["router"] = router
+    return agent_cls(**agent_kwargs)
 
 
 def run_chromegpt(
@@ -10,18 +129,59 @@ def run_chromegpt(
     headless: bool = False,
     verbose: bool = False,
     continuous: bool = True,
+    prefetch_top_k: int = 0,
+    session_dir: Optional[str] = None,
+    tenant: str = "default",
+    observation_budget: Optional[int] = None,
+    parallel_sessions: int = 0,
+    page_model: str = "dom",
+    locator_cache_dir: Optional[str] = None,
+    trajectory_dir: Optional[str] = None,
+    llm_requests_per_minute: Optional[int] = None,
+    llm_tokens_per_minute: Optional[int] = None,
+    llm_concurrency: Optional[int] = None,
+    grid_endpoints: Optional[str] = None,
+    grid_capacity: int = 4,
+    fast_model: Optional[str] = None,
+    fast_steps: str = "navigation,extraction,form",
+    dedup_boilerplate: bool = False,
+    prioritize_every: int = 1,
 ) -> str:
     """Run ChromeGPT."""
+    setup_llm_gateway(llm_requests_per_minute, llm_tokens_per_minute, llm_concurrency)
+    locator_cache = LocatorCache(locator_cache_dir) if locator_cache_dir else None
+    make_selenium = get_selenium_factory(
+        headless=headless,
+        prefetch_top_k=prefetch_top_k,
+        session_dir=session_dir,
+        tenant=tenant,
+        observation_budget=observation_budget,
+        page_model=page_model,
+        locator_cache=locator_cache,
+        grid=get_grid(grid_endpoints, grid_capacity),
+        dedup_boilerplate=dedup_boilerplate,
+    )
+    router = get_model_router(model, fast_model, fast_steps)
     # setup agent
-    if agent == "auto-gpt":
-        agent_obj: ChromeGPTAgent = AutoGPTAgent(
-            model=model, verbose=verbose, continuous=continuous
-        )
-    elif agent == "baby-agi":
-        agent_obj = BabyAGIAgent(model=model, verbose=verbose)
-    elif agent == "zero-shot":
-        agent_obj = ZeroShotAgent(model=model, verbose=verbose)
-    else:
-        raise ValueError(f"Agent {agent} not found.")
+    agent_obj = build_agent(
+        agent,
+        model,
+        selenium=make_selenium(),
+        selenium_pool=SeleniumPool(make_selenium, size=parallel_sessions),
+        verbose=verbose,
+        continuous=continuous,
+        trajectory_store=TrajectoryStore(trajectory_dir) if trajectory_dir else None,
+        router=router,
+        prioritize_every=prioritize_every,
+    )
     # run agent
-    return agent_obj.run([task])
+    result = agent_obj.run([task])
+    if locator_cache:
+        locator_cache.flush()
+    if verbose and locator_cache:
+        print(f"Locator cache: {locator_cache.stats()}")
+    if verbose and router:
+        print(f"Model tiers: {router.stats()}")
+    if verbose and retries_saved():
+        print(f"LLM retries saved by repairing output: {retries_saved()}")
+    return result
@@ -0,0 +1,548 @@
+"""Long-lived ChromeGPT daemon with a local HTTP task API.
+
+Workers keep their browser session and agents warm between tasks, so a submitted
+task only pays for the agent run itself.
+
+Usage:
+    python -m chromegpt.server [--port 8765] [--workers 1] [--headless]
+
+API (JSON):
+    POST   /tasks              {"task": ..., "agent": ..., "model": ...} -> task
+    GET    /tasks/<id>         task status and result
+    GET    /tasks/<id>/events  step events as newline delimited JSON until done
+    DELETE /tasks/<id>         cancel a queued or running task
+    GET    /stats              queue depth, running tasks and latency percentiles
+"""
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+import click
+
+from chromegpt.agent.registry import AGENT_REGISTRY
+from chromegpt.tools.events import TaskCancelled
+from chromegpt.tools.utils import percentiles
+
+if TYPE_CHECKING:
+    from chromegpt.agent.routing import ModelRouter
+    from chromegpt.agent.trajectory import TrajectoryStore
+
+FINISHED_STATUSES = {"succeeded", "failed", "cancelled"}
+
+
+class Task:
+    """A submitted task, its status and the step events of its run."""
+
+    def __init__(
+        self, task: str, agent: str = "zero-shot", model: str = "gpt-3.5-turbo"
+    ) -> None:
+        self.id = uuid.uuid4().hex
+        self.task = task
+        self.agent = agent
+        self.model = model
+        self.status = "queued"
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancelled = threading.Event()
+        self.events: List[Dict[str, Any]] = []
+        self._condition = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def add_event(self, event: Dict[str, Any]) -> None:
+        with self._condition:
+            self.events.append({"time": round(time.time(), 3), **event})
+            self._condition.notify_all()
+
+    def set_status(self, status: str, **fields: Any) -> None:
+        with self._condition:
+            self.status = status
+            for key, value in fields.items():
+                setattr(self, key, value)
+            self.events.append(
+                {"time": round(time.time(), 3), "type": "status", "status": status}
+            )
+            self._condition.notify_all()
+
+    def iter_events(self, timeout: float = 1.0) -> Iterator[Dict[str, Any]]:
+        """Yield all events of the task, waiting for new ones until it is done."""
+        sent = 0
+        while True:
+            with self._condition:
+                if sent == len(self.events) and not self.done:
+                    self._condition.wait(timeout)
+                events = self.events[sent:]
+                done = self.done
+            yield from events
+            sent += len(events)
+            if done and sent == len(self.events):
+                return
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "task": self.task,
+            "agent": self.agent,
+            "model": self.model,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ChromeGPTWorker:
+    """Runs tasks on one warm browser session.
+
+    The browser is started with the first task and reused afterwards. Zero-shot
+    agents are stateless between runs and are kept per model; the other agents keep
+    memory of earlier objectives and are rebuilt for each task on the same browser.
+    """
+
+    def __init__(
+        self,
+        selenium_factory: Callable[[], Any],
+        verbose: bool = False,
+        trajectory_store: Optional["TrajectoryStore"] = None,
+        router_factory: Optional[Callable[[str], Optional["ModelRouter"]]] = None,
+    ):
+        self.selenium_factory = selenium_factory
+        self.verbose = verbose
+        self.trajectory_store = trajectory_store
+        self.router_factory = router_factory
+        self.selenium: Optional[Any] = None
+        self.agents: Dict[Tuple[str, str], Any] = {}
+
+    def run(self, task: Task) -> str:
+        # Imported here so that the API starts without loading langchain
+        from chromegpt.main import build_agent
+
+        if self.selenium is None:
+            self.selenium = self.selenium_factory()
+        elif self.selenium.site_templates:
+            # The new task's agent hasn't read the site templates yet
+            self.selenium.site_templates.reset()
+        events = self.selenium.events
+        events.cancelled = task.cancelled
+        events.listeners = [task.add_event]
+        try:
+            key = (task.agent, task.model)
+            agent = self.agents.get(key)
+            if agent is None:
+                agent = build_agent(
+                    task.agent,
+                    task.model,
+                    selenium=self.selenium,
+                    verbose=self.verbose,
+                    trajectory_store=self.trajectory_store,
+                    router=(
+                        self.router_factory(task.model) if self.router_factory else None
+                    ),
+                )
+                if task.agent == "zero-shot":
+                    self.agents[key] = agent
+            return agent.run([task.task])
+        finally:
+            events.listeners = []
+
+
+class TaskServer:
+    """Queue of tasks served by a fixed number of worker threads."""
+
+    def __init__(
+        self,
+        worker_factory: Callable[[], Any],
+        workers: int = 1,
+        history: int = 1000,
+        metrics: Optional[Dict[str, Callable[[], Dict[str, Any]]]] = None,
+    ) -> None:
+        """Start ``workers`` threads, each with a worker from ``worker_factory``.
+
+        ``metrics`` are extra stats (e.g. cache hit rates) reported by ``stats``.
+        Only the last ``history`` finished tasks are kept.
+        """
+        self.tasks: Dict[str, Task] = {}
+        self.history = history
+        self.metrics = metrics or {}
+        self.queue: "queue.Queue[Optional[Task]]" = queue.Queue()
+        self.completed = 0
+        self.run_times: Deque[float] = deque(maxlen=history)
+        self.queue_waits: Deque[float] = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._work, args=(worker_factory(),), daemon=True)
+            for _ in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(
+        self, task: str, agent: str = "zero-shot", model: str = "gpt-3.5-turbo"
+    ) -> Task:
+        if agent not in AGENT_REGISTRY:
+            raise ValueError(
+                f"Unknown agent {agent}, choose one of {', '.join(AGENT_REGISTRY)}"
+            )
+        record = Task(task, agent=agent, model=model)
+        with self._lock:
+            self.tasks[record.id] = record
+        record.set_status("queued")
+        self.queue.put(record)
+        return record
+
+    def get(self, task_id: str) -> Optional[Task]:
+        return self.tasks.get(task_id)
+
+    def cancel(self, task_id: str) -> Optional[Task]:
+        """Cancel a task. Running tasks stop at their next tool call."""
+        # Status changes hold the lock, a worker can't start or finish the task
+        # between the check and the change
+        with self._lock:
+            task = self.tasks.get(task_id)
+            if task is None or task.done:
+                return task
+            task.cancelled.set()
+            if task.status == "queued":
+                task.set_status("cancelled", finished_at=time.time())
+                self._evict_finished()
+        return task
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = [task.status for task in self.tasks.values()]
+            return {
+                "queue_depth": statuses.count("queued"),
+                "running": statuses.count("running"),
+                "completed": self.completed,
+                "workers": len(self._threads),
+                "run_seconds": percentiles(self.run_times),
+                "queue_wait_seconds": percentiles(self.queue_waits),
+                **{name: get_stats() for name, get_stats in self.metrics.items()},
+            }
+
+    def shutdown(self) -> None:
+        for _ in self._threads:
+            self.queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self, worker: Any) -> None:
+        while True:
+            task = self.queue.get()
+            if task is None:
+                return
+            started = time.time()
+            with self._lock:
+                if task.cancelled.is_set():
+                    continue
+                task.set_status("running", started_at=started)
+            fields: Dict[str, Any] = {}
+            try:
+                fields["result"] = worker.run(task)
+                status = "succeeded"
+            except TaskCancelled:
+                status = "cancelled"
+            except Exception as e:
+                status = "failed"
+                fields["error"] = str(e)
+            with self._lock:
+                task.set_status(status, finished_at=time.time(), **fields)
+                self.completed += 1
+                self.queue_waits.append(started - task.submitted_at)
+                self.run_times.append(time.time() - started)
+                self._evict_finished()
+
+    def _evict_finished(self) -> None:
+        """Forget the oldest finished tasks beyond ``history``."""
+        finished = [task_id for task_id, task in self.tasks.items() if task.done]
+        for task_id in finished[: max(len(finished) - self.history, 0)]:
+            del self.tasks[task_id]
+
+
+class TaskRequestHandler(BaseHTTPRequestHandler):
+    """HTTP API of a ``TaskServer``."""
+
+    server: "TaskHTTPServer"
+
+    def do_GET(self) -> None:
+        parts = self.path.strip("/").split("/")
+        if parts == ["stats"]:
+            return self._send_json(200, self.server.tasks.stats())
+        task = self._get_task(parts)
+        if task is None:
+            return
+        if parts[2:] == ["events"]:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            for event in task.iter_events():
+                self.wfile.write(json.dumps(event).encode() + b"\n")
+                self.wfile.flush()
+            return
+        self._send_json(200, task.to_dict())
+
+    def do_POST(self) -> None:
+        if self.path.strip("/") != "tasks":
+            return self._send_json(404, {"error": "Not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("expected a JSON object")
+            task = self.server.tasks.submit(
+                body["task"],
+                agent=body.get("agent", "zero-shot"),
+                model=body.get("model", "gpt-3.5-turbo"),
+            )
+        except (KeyError, ValueError) as e:
+            return self._send_json(400, {"error": f"Invalid task: {e}"})
+        self._send_json(201, task.to_dict())
+
+    def do_DELETE(self) -> None:
+        parts = self.path.strip("/").split("/")
+        if self._get_task(parts) is not None:
+            task = self.server.tasks.cancel(parts[1])
+            self._send_json(200, task.to_dict())  # type: ignore
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _get_task(self, parts: List[str]) -> Optional[Task]:
+        task = None
+        if len(parts) >= 2 and parts[0] == "tasks":
+            task = self.server.tasks.get(parts[1])
+        if task is None:
+            self._send_json(404, {"error": "Not found"})
+        return task
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class TaskHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self, address: Tuple[str, int], tasks: TaskServer, verbose: bool = False
+    ) -> None:
+        super().__init__(address, TaskRequestHandler)
+        self.tasks = tasks
+        self.verbose = verbose
+
+
+@click.command()
+@click.option("--host", help="Address to listen on", default="127.0.0.1")
+@click.option("--port", "-p", help="Port to listen on", default=8765, type=int)
+@click.option("--workers", "-w", help="Number of browser sessions", default=1)
+@click.option("--headless", help="Run in headless mode", is_flag=True)
+@click.option("--verbose", "-v", help="Run in verbose mode", is_flag=True)
+@click.option(
+    "--session-dir",
+    help="Directory to persist cookies and site storage between runs",
+    default=None,
+)
+@click.option(
+    "--observation-budget",
+    help="Approximate token limit for each website description",
+    default=None,
+    type=int,
+)
+@click.option(
+    "--page-model",
+    help=(
+        "How pages are read: dom (XPath extraction) or accessibility (Chrome's"
+        " accessibility tree)"
+    ),
+    default="dom",
+    type=click.Choice(["dom", "accessibility"], case_sensitive=False),
+)
+@click.option(
+    "--locator-cache",
+    help="Directory to cache the locators of buttons and form fields per site",
+    default=None,
+)
+@click.option(
+    "--trajectory-cache",
+    help=(
+        "Directory to record successful plans and replay them for similar tasks,"
+        " only available when using zero-shot agent"
+    ),
+    default=None,
+)
+@click.option(
+    "--llm-requests-per-minute",
+    help="Request rate limit per model for all LLM calls",
+    default=None,
+    type=int,
+)
+@click.option(
+    "--llm-tokens-per-minute",
+    help="Token rate limit per model for all LLM calls",
+    default=None,
+    type=int,
+)
+@click.option(
+    "--llm-concurrency",
+    help="Maximum concurrent LLM requests per model",
+    default=None,
+    type=int,
+)
+@click.option(
+    "--grid",
+    help=(
+        "Comma-separated Selenium Grid / WebDriver endpoints, sessions go to the"
+        " least loaded one and move to another if they die"
+    ),
+    default=None,
+)
+@click.option(
+    "--grid-capacity",
+    help="Maximum concurrent browser sessions per grid endpoint",
+    default=4,
+    type=int,
+)
+@click.option(
+    "--fast-model",
+    help=(
+        "Cheaper model for simple steps, escalating to --model when its output"
+        " doesn't parse or hedges"
+    ),
+    default=None,
+)
+@click.option(
+    "--fast-steps",
+    help=(
+        "Comma-separated step types for the fast model: planning, extraction,"
+        " navigation, form"
+    ),
+    default="navigation,extraction,form",
+)
+@click.option(
+    "--dedup-boilerplate",
+    help=(
+        "Leave texts, links and buttons repeated on every page of a site out of"
+        " the page descriptions after the first page"
+    ),
+    is_flag=True,
+)
+def main(
+    host: str,
+    port: int,
+    workers: int = 1,
+    headless: bool = False,
+    verbose: bool = False,
+    session_dir: Optional[str] = None,
+    observation_budget: Optional[int] = None,
+    page_model: str = "dom",
+    locator_cache: Optional[str] = None,
+    trajectory_cache: Optional[str] = None,
+    llm_requests_per_minute: Optional[int] = None,
+    llm_tokens_per_minute: Optional[int] = None,
+    llm_concurrency: Optional[int] = None,
+    grid: Optional[str] = None,
+    grid_capacity: int = 4,
+    fast_model: Optional[str] = None,
+    fast_steps: str = "navigation,extraction,form",
+    dedup_boilerplate: bool = False,
+) -> None:
+    """Serve ChromeGPT tasks over a local HTTP API."""
+    from chromegpt.agent.trajectory import TrajectoryStore
+    from chromegpt.main import (
+        get_grid,
+        get_model_router,
+        get_selenium_factory,
+        setup_llm_gateway,
+    )
+    from chromegpt.tools.json_repair import retries_saved
+    from chromegpt.tools.locator_cache import LocatorCache
+
+    cache = LocatorCache(locator_cache) if locator_cache else None
+    # One gateway for all workers so that they share the rate limits
+    gateway = setup_llm_gateway(
+        llm_requests_per_minute, llm_tokens_per_minute, llm_concurrency
+    )
+    metrics: Dict[str, Callable[[], Dict[str, Any]]] = {"output_repair": retries_saved}
+    if cache:
+        metrics["locator_cache"] = cache.stats
+    if gateway:
+        metrics["llm_gateway"] = gateway.stats
+    scheduler = get_grid(grid, grid_capacity)
+    if scheduler:
+        metrics["grid"] = scheduler.stats
+    trajectory_store = TrajectoryStore(trajectory_cache) if trajectory_cache else None
+    # One router per task model, shared by all workers
+    routers: Dict[str, Optional[ModelRouter]] = {}
+    routers_lock = threading.Lock()
+
+    def get_router(model: str) -> Optional[ModelRouter]:
+        with routers_lock:
+            if model not in routers:
+                routers[model] = get_model_router(model, fast_model, fast_steps)
+            return routers[model]
+
+    if fast_model:
+        metrics["model_router"] = lambda: {
+            model: router.stats() for model, router in routers.items() if router
+        }
+
+    make_selenium = get_selenium_factory(
+        headless=headless,
+        session_dir=session_dir,
+        observation_budget=observation_budget,
+        page_model=page_model,
+        locator_cache=cache,
+        grid=scheduler,
+        dedup_boilerplate=dedup_boilerplate,
+    )
+    tasks = TaskServer(
+        lambda: ChromeGPTWorker(
+            make_selenium,
+            verbose=verbose,
+            trajectory_store=trajectory_store,
+            router_factory=get_router,
+        ),
+        workers=workers,
+        metrics=metrics,
+    )
+    httpd = TaskHTTPServer((host, port), tasks, verbose=verbose)
+    click.echo(f"ChromeGPT serving on http://{host}:{port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        if cache:
+            cache.flush()
+
+
+if __name__ == "__main__":
+    main()
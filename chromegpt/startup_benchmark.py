@@ -0,0 +1,94 @@
+"""Cold-start benchmark for the chromegpt CLI and agents.
+
+Every scenario runs in a fresh interpreter, so nothing is cached between runs.
+
+Usage:
+    python -m chromegpt.startup_benchmark [--runs 5] [--top 10]
+"""
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import click
+
+SCENARIOS: Dict[str, List[str]] = {
+    "cli --help": ["-m", "chromegpt", "--help"],
+    "import chromegpt.__main__": ["-c", "import chromegpt.__main__"],
+    "load zero-shot": [
+        "-c",
+        (
+            "from chromegpt.agent.registry import get_agent_class;"
+            " get_agent_class('zero-shot')"
+        ),
+    ],
+    "load baby-agi": [
+        "-c",
+        (
+            "from chromegpt.agent.registry import get_agent_class;"
+            " get_agent_class('baby-agi')"
+        ),
+    ],
+    "load auto-gpt": [
+        "-c",
+        (
+            "from chromegpt.agent.registry import get_agent_class;"
+            " get_agent_class('auto-gpt')"
+        ),
+    ],
+}
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int]]:
+    """Parse ``-X importtime`` output into (module, cumulative microseconds).
+
+    Only top-level imports (the ones the scenario triggered directly) are returned,
+    sorted from slowest to fastest.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|", 2)
+        if not cumulative.strip().isdigit() or name.startswith("  "):
+            continue
+        modules.append((name.strip(), int(cumulative)))
+    return sorted(modules, key=lambda module: -module[1])
+
+
+def run_scenario(args: List[str]) -> Tuple[float, List[Tuple[str, int]]]:
+    """Run one scenario in a fresh interpreter, returns (seconds, import times)."""
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if process.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{process.stderr[-2000:]}")
+    return elapsed, parse_importtime(process.stderr)
+
+
+@click.command()
+@click.option("--runs", help="Runs per scenario", default=5, type=int)
+@click.option("--top", help="Number of slowest imports to show", default=10, type=int)
+def main(runs: int, top: int) -> None:
+    """Measure cold-start time of the chromegpt CLI and agents."""
+    for scenario, args in SCENARIOS.items():
+        timings = []
+        imports: List[Tuple[str, int]] = []
+        for _ in range(runs):
+            elapsed, imports = run_scenario(args)
+            timings.append(elapsed)
+        click.echo(
+            f"{scenario}: median {statistics.median(timings):.3f}s,"
+            f" min {min(timings):.3f}s over {runs} runs"
+        )
+        for module, microseconds in imports[:top]:
+            click.echo(f"    {microseconds / 1e6:8.3f}s  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Compact page model built from Chrome's accessibility tree."""
+import itertools
+from typing import Any, Dict, List, Optional, Union
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.webdriver import WebDriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+from chromegpt.tools.utils import prettify_text
+
+LINK_ROLES = {"link"}
+BUTTON_ROLES = {
+    "button",
+    "checkbox",
+    "menuitem",
+    "menuitemcheckbox",
+    "menuitemradio",
+    "option",
+    "radio",
+    "switch",
+    "tab",
+    "treeitem",
+}
+FIELD_ROLES = {"combobox", "searchbox", "spinbutton", "textbox"}
+# Containers whose text is already their accessible name
+NAMED_CONTAINER_ROLES = LINK_ROLES | BUTTON_ROLES | FIELD_ROLES | {"heading"}
+
+_element_ids = itertools.count()
+
+
+class AXElement:
+    """An interactable node of the accessibility tree."""
+
+    def __init__(
+        self,
+        role: str,
+        name: str,
+        backend_node_id: Optional[int],
+        states: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.role = role
+        self.name = name
+        self.backend_node_id = backend_node_id
+        self.states = states or {}
+
+    @property
+    def enabled(self) -> bool:
+        return not self.states.get("disabled") and not self.states.get("hidden")
+
+
+class AccessibilityPageModel:
+    """Texts, links, buttons and form fields of a page from one CDP call.
+
+    The full tree is pruned while it is walked: ignored and hidden nodes are
+    skipped, unnamed layout containers are collapsed into their children and text
+    inside links, buttons, fields and headings is represented by their accessible
+    name only, so every label appears once.
+    """
+
+    def __init__(self, nodes: List[Dict[str, Any]]) -> None:
+        self.texts: List[str] = []
+        self.links: List[AXElement] = []
+        self.buttons: List[AXElement] = []
+        self.fields: List[AXElement] = []
+        self._nodes = {node["nodeId"]: node for node in nodes}
+        roots = [node for node in nodes if not node.get("parentId")]
+        for root in roots:
+            self._walk(root, inside_named=False)
+
+    @classmethod
+    def from_driver(
+        cls, driver: Union[WebDriver, RemoteWebDriver]
+    ) -> Optional["AccessibilityPageModel"]:
+        """Build the model of the current page, None when CDP is unavailable."""
+        nodes = get_full_ax_tree(driver)
+        return cls(nodes) if nodes is not None else None
+
+    def find_button(self, text: str) -> Optional[AXElement]:
+        """Find the enabled link or button named ``text`` (or close to it)."""
+        text = prettify_text(text)
+        candidates = [
+            element for element in self.links + self.buttons if element.enabled
+        ]
+        for element in candidates:
+            if prettify_text(element.name) == text:
+                return element
+        for element in candidates:
+            name = prettify_text(element.name)
+            if text in name and abs(len(name) - len(text)) < 50:
+                return element
+        return None
+
+    def find_field(self, label: str) -> Optional[AXElement]:
+        """Find the enabled form field whose accessible name is ``label``."""
+        label = prettify_text(label)
+        for element in self.fields:
+            if element.enabled and prettify_text(element.name) == label:
+                return element
+        return None
+
+    def _walk(self, node: Dict[str, Any], inside_named: bool) -> None:
+        role = _value(node.get("role"))
+        name = str(_value(node.get("name")) or "").strip()
+        states = {
+            prop["name"]: _value(prop.get("value"))
+            for prop in node.get("properties", [])
+        }
+        if states.get("hidden"):
+            return
+        if not node.get("ignored"):
+            if role == "StaticText" and name and not inside_named:
+                self._add_text(name)
+            elif role == "heading" and name:
+                self._add_text(name)
+            elif name and role in LINK_ROLES | BUTTON_ROLES | FIELD_ROLES:
+                element = AXElement(role, name, node.get("backendDOMNodeId"), states)
+                if role in LINK_ROLES:
+                    self.links.append(element)
+                elif role in BUTTON_ROLES:
+                    self.buttons.append(element)
+                else:
+                    self.fields.append(element)
+            inside_named = inside_named or (
+                role in NAMED_CONTAINER_ROLES and bool(name)
+            )
+        for child_id in node.get("childIds", []):
+            child = self._nodes.get(child_id)
+            if child is not None:
+                self._walk(child, inside_named)
+
+    def _add_text(self, text: str) -> None:
+        text = prettify_text(text)
+        if text and text not in self.texts:
+            self.texts.append(text)
+
+
+def execute_cdp(
+    driver: Union[WebDriver, RemoteWebDriver], cmd: str, params: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Send a CDP command, also through a plain remote driver.
+
+    Remote drivers don't know chromedriver's CDP endpoint, so it is registered on
+    their command executor. Raises WebDriverException when the browser (or grid)
+    doesn't support it.
+    """
+    execute_cdp_cmd = getattr(driver, "execute_cdp_cmd", None)
+    if execute_cdp_cmd is not None:
+        return execute_cdp_cmd(cmd, params)
+    commands = getattr(driver.command_executor, "_commands", None)
+    if commands is None:
+        raise WebDriverException("The driver can't send CDP commands")
+    commands.setdefault(
+        "executeCdpCommand", ("POST", "/session/$sessionId/goog/cdp/execute")
+    )
+    return driver.execute("executeCdpCommand", {"cmd": cmd, "params": params})["value"]
+
+
+def get_full_ax_tree(
+    driver: Union[WebDriver, RemoteWebDriver]
+) -> Optional[List[Dict[str, Any]]]:
+    """Get the nodes of the page's accessibility tree over CDP.
+
+    Returns None when CDP is unavailable, so callers can fall back to the DOM based
+    extraction.
+    """
+    try:
+        return execute_cdp(driver, "Accessibility.getFullAXTree", {}).get("nodes", [])
+    except (WebDriverException, AttributeError):
+        return None
+
+
+def resolve_element(
+    driver: Union[WebDriver, RemoteWebDriver], element: AXElement
+) -> Optional[WebElement]:
+    """Get the WebElement behind an accessibility node."""
+    if element.backend_node_id is None:
+        return None
+    marker = str(next(_element_ids))
+    try:
+        node = execute_cdp(
+            driver, "DOM.resolveNode", {"backendNodeId": element.backend_node_id}
+        )
+        execute_cdp(
+            driver,
+            "Runtime.callFunctionOn",
+            {
+                "objectId": node["object"]["objectId"],
+                "functionDeclaration": (
+                    "function(marker) {"
+                    " (this.nodeType === 1 ? this : this.parentElement)"
+                    ".setAttribute('data-chromegpt-ax', marker); }"
+                ),
+                "arguments": [{"value": marker}],
+            },
+        )
+        web_element = driver.find_element(
+            By.CSS_SELECTOR, f"[data-chromegpt-ax='{marker}']"
+        )
+        # Leave the page as it was, the WebElement reference stays valid
+        driver.execute_script(
+            "arguments[0].removeAttribute('data-chromegpt-ax');", web_element
+        )
+        return web_element
+    except (WebDriverException, KeyError):
+        return None
+
+
+def _value(field: Optional[Dict[str, Any]]) -> Any:
+    return field.get("value") if field else None
@@ -0,0 +1,82 @@
+"""Learn the blocks a site repeats on every page and leave them out of descriptions."""
+import json
+import urllib.parse
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from chromegpt.tools.session_state import domain_from_url
+from chromegpt.tools.utils import estimate_tokens
+
+# Description kinds that hold site chrome; forms stay, they are what the agent uses
+TEMPLATE_KINDS = {"text", "links", "buttons"}
+
+
+def page_key(url: str) -> str:
+    """The page of ``url``: its path and query, without the fragment."""
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.path or '/'}?{parts.query}"
+
+
+class SiteTemplates:
+    """Per-domain detector of template blocks (nav bar, footer, cookie banner).
+
+    Every text, link and button of a description is recorded with the pages of the
+    domain it was seen on. Once a block has shown up on ``min_pages`` different
+    pages it is part of the site template: the agent has already read it on an
+    earlier page, so later descriptions leave it out. Scrolling or reloading the
+    same page never marks a block. Up to ``max_blocks`` blocks are tracked per
+    domain, the least recently seen are forgotten first.
+
+    Call ``reset`` when a new task starts in the same browser, since the new
+    agent hasn't seen the earlier pages.
+    """
+
+    def __init__(self, min_pages: int = 2, max_blocks: int = 2000) -> None:
+        self.min_pages = min_pages
+        self.max_blocks = max_blocks
+        self.omitted = 0
+        self.tokens_saved = 0
+        self._domains: Dict[str, "OrderedDict[str, Set[str]]"] = {}
+
+    def filter(self, url: str, kind: str, content: str) -> Tuple[Optional[str], int]:
+        """Record a description chunk seen on ``url``.
+
+        Returns the chunk without its template blocks (None if nothing is left) and
+        the number of blocks left out.
+        """
+        domain = domain_from_url(url)
+        if not domain or kind not in TEMPLATE_KINDS:
+            return content, 0
+        if kind == "text":
+            blocks = [content]
+        else:
+            try:
+                blocks = [str(item) for item in json.loads(content)]
+            except ValueError:
+                return content, 0
+        page = page_key(url)
+        kept = [block for block in blocks if not self._seen(domain, page, kind, block)]
+        omitted = len(blocks) - len(kept)
+        if omitted:
+            self.omitted += omitted
+            self.tokens_saved += estimate_tokens(content) - (
+                estimate_tokens(json.dumps(kept)) if kept and kind != "text" else 0
+            )
+        if not kept:
+            return None, omitted
+        return (content if kind == "text" else json.dumps(kept)), omitted
+
+    def reset(self) -> None:
+        self._domains.clear()
+
+    def _seen(self, domain: str, page: str, kind: str, block: str) -> bool:
+        """Add ``page`` to the pages of ``block``, True if it is a template block."""
+        blocks = self._domains.setdefault(domain, OrderedDict())
+        key = f"{kind}:{block}"
+        pages = blocks.setdefault(key, set())
+        blocks.move_to_end(key)
+        if len(pages) < self.min_pages:
+            pages.add(page)
+        while len(blocks) > self.max_blocks:
+            blocks.popitem(last=False)
+        return len(pages) >= self.min_pages
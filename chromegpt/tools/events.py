@@ -0,0 +1,51 @@
+"""Observe and cancel the tool calls made on a browser session."""
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+
+class TaskCancelled(BaseException):
+    """Raised at the next tool call once the running task has been cancelled.
+
+    Derives from BaseException so that agent loops which turn tool errors into
+    observations (like AutoGPT) don't swallow it.
+    """
+
+
+class ToolEvents:
+    """Listeners and a cancellation flag for the tools of one browser session."""
+
+    def __init__(self) -> None:
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self.cancelled = threading.Event()
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        for listener in list(self.listeners):
+            listener(event)
+
+    def check_cancelled(self) -> None:
+        if self.cancelled.is_set():
+            raise TaskCancelled()
+
+    def wrap(self, name: str, func: Callable[..., str]) -> Callable[..., str]:
+        """Wrap tool ``name`` so each call is reported and can be cancelled."""
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> str:
+            self.check_cancelled()
+            self.emit({"type": "action", "tool": name, "input": args or kwargs})
+            started = time.time()
+            output = func(*args, **kwargs)
+            self.emit(
+                {
+                    "type": "observation",
+                    "tool": name,
+                    "output": output,
+                    "seconds": round(time.time() - started, 3),
+                }
+            )
+            self.check_cancelled()
+            return output
+
+        return wrapper
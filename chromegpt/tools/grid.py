@@ -0,0 +1,152 @@
+"""Route browser sessions over several Selenium Grid / WebDriver endpoints."""
+import json
+import threading
+import time
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+
+
+def _remote_driver(url: str, options: Options) -> RemoteWebDriver:
+    return webdriver.Remote(url, options=options)
+
+
+class GridNode:
+    """A WebDriver endpoint with its load, health and recent latency."""
+
+    def __init__(self, url: str, capacity: int) -> None:
+        self.url = url.rstrip("/")
+        self.capacity = capacity
+        self.sessions = 0
+        self.healthy = True
+        self.latency = 0.0
+        self.failures = 0
+        self.checked_at = 0.0
+
+    @property
+    def load(self) -> float:
+        return self.sessions / self.capacity
+
+    def observe_latency(self, seconds: float, weight: float = 0.3) -> None:
+        """Keep an exponentially weighted average of the node's response time."""
+        if self.latency == 0:
+            self.latency = seconds
+        else:
+            self.latency = (1 - weight) * self.latency + weight * seconds
+
+
+class GridScheduler:
+    """Start sessions on the least loaded healthy endpoint.
+
+    Endpoints are probed with the WebDriver ``/status`` call at most every
+    ``health_interval`` seconds. A node is skipped while it isn't ready, is full,
+    or failed to start a session; it is probed again after the interval. Among the
+    remaining nodes the one with the lowest load wins, recent latency breaks ties.
+
+    Example:
+        .. code-block:: python
+
+            grid = GridScheduler(["http://node-1:4444/wd/hub", "http://node-2:4444"])
+            selenium = SeleniumWrapper(grid=grid)
+    """
+
+    def __init__(
+        self,
+        endpoints: List[str],
+        capacity: int = 4,
+        health_interval: float = 30.0,
+        timeout: float = 3.0,
+        driver_factory: Callable[[str, Options], RemoteWebDriver] = _remote_driver,
+    ) -> None:
+        if not endpoints:
+            raise ValueError("GridScheduler needs at least one endpoint")
+        self.nodes = [GridNode(url, capacity) for url in endpoints]
+        self.health_interval = health_interval
+        self.timeout = timeout
+        self.driver_factory = driver_factory
+        self._lock = threading.Lock()
+
+    def start_session(
+        self, options: Options, exclude: Optional[GridNode] = None
+    ) -> Tuple[RemoteWebDriver, GridNode]:
+        """Start a driver on the best node, trying the next one if it fails."""
+        tried: List[GridNode] = []
+        while True:
+            node = self._choose(exclude=[exclude] + tried if exclude else tried)
+            if node is None:
+                raise WebDriverException(
+                    "No healthy Selenium endpoint with free capacity, tried: "
+                    + ", ".join(n.url for n in tried)
+                )
+            started = time.time()
+            try:
+                driver = self.driver_factory(node.url, options)
+            except Exception:
+                self.release(node, failed=True)
+                tried.append(node)
+                continue
+            with self._lock:
+                node.observe_latency(time.time() - started)
+                node.failures = 0
+            return driver, node
+
+    def release(self, node: GridNode, failed: bool = False) -> None:
+        """Give back a session slot, ``failed`` if the node lost the session."""
+        with self._lock:
+            node.sessions = max(0, node.sessions - 1)
+            if failed:
+                node.failures += 1
+                node.healthy = False
+                node.checked_at = time.time()
+
+    def check_health(self, node: GridNode) -> bool:
+        """Ask the node's ``/status`` endpoint whether it accepts new sessions."""
+        started = time.time()
+        try:
+            with urllib.request.urlopen(
+                f"{node.url}/status", timeout=self.timeout
+            ) as response:
+                status = json.load(response).get("value", {})
+            healthy = bool(status.get("ready", True))
+        except (OSError, ValueError, AttributeError):
+            healthy = False
+        with self._lock:
+            node.healthy = healthy
+            node.checked_at = time.time()
+            if healthy:
+                node.observe_latency(time.time() - started)
+        return healthy
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                node.url: {
+                    "healthy": node.healthy,
+                    "sessions": node.sessions,
+                    "capacity": node.capacity,
+                    "latency": round(node.latency, 3),
+                    "failures": node.failures,
+                }
+                for node in self.nodes
+            }
+
+    def _choose(self, exclude: List[GridNode]) -> Optional[GridNode]:
+        now = time.time()
+        for node in self.nodes:
+            if node not in exclude and now - node.checked_at > self.health_interval:
+                self.check_health(node)
+        with self._lock:
+            candidates = [
+                node
+                for node in self.nodes
+                if node.healthy and node not in exclude and node.load < 1
+            ]
+            if not candidates:
+                return None
+            node = min(candidates, key=lambda n: (n.load, n.latency))
+            node.sessions += 1
+            return node
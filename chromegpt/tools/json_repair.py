@@ -0,0 +1,111 @@
+"""Parse the almost-JSON that LLMs write without asking them again."""
+import json
+import re
+import threading
+from typing import Any, Dict, List
+
+_FENCE_PATTERN = re.compile(r"```[\w-]*\s*\n?(.*?)(?:```|$)", re.DOTALL)
+_TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+# Single backslashes that don't start a JSON escape
+_LONE_BACKSLASH_PATTERN = re.compile(r'(?<!\\)\\(?!["\\/bfnrtu])')
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+_retries_saved: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def record_retry_saved(source: str) -> None:
+    """Count an LLM output that only parsed after repairing it."""
+    with _lock:
+        _retries_saved[source] = _retries_saved.get(source, 0) + 1
+
+
+def retries_saved() -> Dict[str, int]:
+    """LLM round trips saved by repairs since the process started, per source."""
+    with _lock:
+        return dict(_retries_saved)
+
+
+def _normalize(text: str) -> str:
+    """Rewrite the first JSON-like value in ``text`` as JSON.
+
+    Single-quoted strings become double-quoted, raw newlines in strings are
+    escaped, Python literals become JSON ones, text after the value is dropped and
+    unclosed strings, objects and lists are closed.
+    """
+    out: List[str] = []
+    closers: List[str] = []
+    quote = ""
+    escaped = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        i += 1
+        if quote:
+            if escaped:
+                escaped = False
+                if char == "'" and quote == "'":
+                    out[-1] = "'"
+                else:
+                    out.append(char)
+            elif char == "\\":
+                escaped = True
+                out.append(char)
+            elif char == quote:
+                quote = ""
+                out.append('"')
+            elif char == '"':
+                out.append('\\"')
+            elif char == "\n":
+                out.append("\\n")
+            else:
+                out.append(char)
+        elif char in "\"'":
+            quote = char
+            out.append('"')
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+            out.append(char)
+        elif char in "}]":
+            if closers:
+                out.append(closers.pop())
+            if not closers:
+                break
+        elif char.isalpha():
+            word = re.match(r"\w+", text[i - 1 :])
+            assert word is not None
+            out.append(_PYTHON_LITERALS.get(word.group(), word.group()))
+            i += len(word.group()) - 1
+        else:
+            out.append(char)
+    if quote:
+        out.append('"')
+    normalized = "".join(out).rstrip().rstrip(",:")
+    return _TRAILING_COMMA_PATTERN.sub(r"\1", normalized + "".join(reversed(closers)))
+
+
+def loads_tolerant(text: str) -> Any:
+    """Load the first JSON object or list in ``text``, repairing it if needed.
+
+    Handles code fences, text around the value, single quotes, trailing commas,
+    Python literals, unescaped backslashes and missing closing braces. Raises
+    ``ValueError`` if nothing can be recovered.
+    """
+    fence = _FENCE_PATTERN.search(text)
+    if fence and re.search(r"[{\[]", fence.group(1)):
+        text = fence.group(1)
+    start = re.search(r"[{\[]", text)
+    if start is None:
+        raise ValueError(f"No JSON found in: {text}")
+    text = text[start.start() :]
+    try:
+        return json.JSONDecoder(strict=False).raw_decode(text)[0]
+    except ValueError:
+        pass
+    normalized = _normalize(text)
+    for candidate in (normalized, _LONE_BACKSLASH_PATTERN.sub(r"\\\\", normalized)):
+        try:
+            return json.loads(candidate, strict=False)
+        except ValueError:
+            continue
+    raise ValueError(f"Could not repair JSON: {text}")
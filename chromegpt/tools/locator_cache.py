@@ -0,0 +1,227 @@
+"""Remember per site which locator found a button or form field."""
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set, Union
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.webdriver import WebDriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+from chromegpt.tools.session_state import domain_from_url
+from chromegpt.tools.utils import prettify_text, safe_filename
+
+# Shortest CSS selector that is unique on the page: id, a naming attribute, or the
+# nth-of-type path from the closest ancestor with an id
+_CSS_SELECTOR_SCRIPT = """
+const el = arguments[0];
+const unique = (selector) => document.querySelectorAll(selector).length === 1;
+if (el.id && unique('#' + CSS.escape(el.id))) {
+    return '#' + CSS.escape(el.id);
+}
+const tag = el.tagName.toLowerCase();
+for (const attr of ['name', 'aria-label', 'data-testid']) {
+    const value = el.getAttribute(attr);
+    if (value) {
+        const selector = tag + '[' + attr + '="' + CSS.escape(value) + '"]';
+        if (unique(selector)) {
+            return selector;
+        }
+    }
+}
+const path = [];
+for (let node = el; node && node.nodeType === 1; node = node.parentElement) {
+    if (node !== el && node.id && unique('#' + CSS.escape(node.id))) {
+        path.unshift('#' + CSS.escape(node.id));
+        break;
+    }
+    let index = 1;
+    for (let sib = node.previousElementSibling; sib; sib = sib.previousElementSibling) {
+        if (sib.tagName === node.tagName) {
+            index++;
+        }
+    }
+    path.unshift(node.tagName.toLowerCase() + ':nth-of-type(' + index + ')');
+}
+return path.join(' > ');
+"""
+
+_BY = {"css": By.CSS_SELECTOR, "xpath": By.XPATH}
+
+
+class LocatorCache:
+    """Per-domain cache of the locators that resolved a button text or form label.
+
+    Entries are keyed by kind (``"button"`` or ``"field"``) and normalized text and
+    stored in ``<root_dir>/<domain>.json``. A cached locator is only used if the
+    element it finds passes the caller's check, otherwise the entry is dropped and
+    the caller falls back to a full scan (and records the new locator). The cache
+    is shared by all browser sessions of a process. ``implicit_wait`` is the
+    sessions' implicit wait, restored after a lookup, which doesn't wait for
+    elements to appear.
+
+    Usage counts of hits are written every ``flush_every`` hits, with the next
+    change to the domain, or by ``flush``. A cache directory that can't be written
+    to only costs persistence (see ``save_errors``), never the tool call.
+
+    Example:
+        .. code-block:: python
+
+            cache = LocatorCache("~/.chromegpt/locators")
+            selenium = SeleniumWrapper(locator_cache=cache)
+    """
+
+    def __init__(
+        self,
+        root_dir: str = "~/.chromegpt/locators",
+        max_entries: int = 500,
+        implicit_wait: float = 5,
+        flush_every: int = 20,
+    ) -> None:
+        self.directory = os.path.expanduser(root_dir)
+        self.max_entries = max_entries
+        self.implicit_wait = implicit_wait
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.save_errors = 0
+        self._dirty: Set[str] = set()
+        self._unsaved_hits = 0
+        self._domains: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def lookup(
+        self,
+        driver: Union[WebDriver, RemoteWebDriver],
+        kind: str,
+        text: str,
+        check: Callable[[WebElement], bool],
+    ) -> Optional[WebElement]:
+        """Find the element for ``text`` with its cached locator, None on a miss."""
+        domain = domain_from_url(driver.current_url)
+        if not domain:
+            return None
+        key = self._key(kind, text)
+        with self._lock:
+            entry = self._load(domain).get(key)
+        if entry is None:
+            self._count("misses")
+            return None
+        try:
+            # A stale locator should miss right away, not after the implicit wait
+            driver.implicitly_wait(0)
+            elements = driver.find_elements(_BY[entry["by"]], entry["value"])
+            element = next((e for e in elements[:3] if check(e)), None)
+        except WebDriverException:
+            element = None
+        finally:
+            try:
+                driver.implicitly_wait(self.implicit_wait)
+            except WebDriverException:
+                pass
+        if element is None:
+            self._count("misses")
+            self._count("stale")
+            with self._lock:
+                self._load(domain).pop(key, None)
+                self._save(domain)
+            return None
+        self._count("hits")
+        with self._lock:
+            entry["hits"] = entry.get("hits", 0) + 1
+            entry["used_at"] = time.time()
+            self._dirty.add(domain)
+            self._unsaved_hits += 1
+            if self._unsaved_hits >= self.flush_every:
+                self._flush()
+        return element
+
+    def record(
+        self,
+        driver: Union[WebDriver, RemoteWebDriver],
+        kind: str,
+        text: str,
+        element: WebElement,
+    ) -> None:
+        """Remember the locator of ``element``, found for ``text`` by a full scan."""
+        domain = domain_from_url(driver.current_url)
+        if not domain:
+            return
+        try:
+            selector = driver.execute_script(_CSS_SELECTOR_SCRIPT, element)
+        except WebDriverException:
+            return
+        if not selector:
+            return
+        with self._lock:
+            entries = self._load(domain)
+            entries[self._key(kind, text)] = {
+                "by": "css",
+                "value": selector,
+                "hits": 0,
+                "used_at": time.time(),
+            }
+            while len(entries) > self.max_entries:
+                oldest = min(entries, key=lambda k: entries[k].get("used_at", 0))
+                entries.pop(oldest)
+            self._save(domain)
+
+    def flush(self) -> None:
+        """Write the usage counts of hits that haven't been saved yet."""
+        with self._lock:
+            self._flush()
+
+    def __del__(self) -> None:
+        if getattr(self, "_dirty", None):
+            self._flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate of the cache since the process started."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "save_errors": self.save_errors,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _key(self, kind: str, text: str) -> str:
+        return f"{kind}:{prettify_text(text)}"
+
+    def _load(self, domain: str) -> Dict[str, Dict[str, Any]]:
+        if domain not in self._domains:
+            try:
+                with open(self._path(domain)) as f:
+                    self._domains[domain] = json.load(f)
+            except (OSError, ValueError):
+                self._domains[domain] = {}
+        return self._domains[domain]
+
+    def _flush(self) -> None:
+        for domain in list(self._dirty):
+            self._save(domain)
+        self._unsaved_hits = 0
+
+    def _save(self, domain: str) -> None:
+        self._dirty.discard(domain)
+        path = self._path(domain)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(self._domains.get(domain, {}), f)
+            os.replace(tmp_path, path)
+        except OSError:
+            self.save_errors += 1
+
+    def _path(self, domain: str) -> str:
+        return os.path.join(self.directory, f"{safe_filename(domain)}.json")
@@ -0,0 +1,45 @@
+"""Pool of extra browser sessions for running tools concurrently."""
+import threading
+from typing import Callable, Dict
+
+from chromegpt.tools.selenium import SeleniumWrapper
+
+
+class SeleniumPool:
+    """Lazily started browser sessions, addressed by index.
+
+    Sessions are only created the first time they are used, so a pool costs nothing
+    until the agent actually fans out.
+
+    Example:
+        .. code-block:: python
+
+            pool = SeleniumPool(lambda: SeleniumWrapper(headless=True), size=3)
+            pool.get(0).describe_website("https://example.com")
+    """
+
+    def __init__(self, factory: Callable[[], SeleniumWrapper], size: int) -> None:
+        self.factory = factory
+        self.size = size
+        self._sessions: Dict[int, SeleniumWrapper] = {}
+        self._lock = threading.Lock()
+
+    def get(self, index: int) -> SeleniumWrapper:
+        """Get session ``index``, starting it if needed."""
+        if not 0 <= index < self.size:
+            raise IndexError(
+                f"Session {index} is outside of the pool (size {self.size})"
+            )
+        with self._lock:
+            session = self._sessions.get(index)
+        if session is None:
+            # Start outside the lock so several sessions can boot at the same time
+            session = self.factory()
+            with self._lock:
+                session = self._sessions.setdefault(index, session)
+        return session
+
+    def close(self) -> None:
+        """Release all started sessions, which closes their browsers."""
+        with self._lock:
+            self._sessions = {}
@@ -0,0 +1,101 @@
+"""Prefetch search results in background tabs."""
+import time
+from typing import Dict, List, Optional, Union
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.webdriver import WebDriver
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a url so that trivially different links share a cache key."""
+    url = url.split("#")[0].strip()
+    return url.rstrip("/")
+
+
+class PrefetchedPage:
+    """A search result loading in a background tab."""
+
+    def __init__(self, url: str, handle: str) -> None:
+        self.url = url
+        self.handle = handle
+        self.opened_at = time.time()
+
+
+class SearchResultPrefetcher:
+    """Load the top search results concurrently in background tabs.
+
+    All links are opened at once with ``window.open`` and ``prefetch`` returns right
+    away, so the browser loads them while the agent decides where to go. Nothing is
+    extracted up front: when the agent navigates to a prefetched link its tab
+    becomes the working tab and is described like any other page.
+    """
+
+    def __init__(self, top_k: int = 3, ttl: float = 120.0) -> None:
+        self.top_k = top_k
+        self.ttl = ttl
+        self.origin_handle: Optional[str] = None
+        self.pages: Dict[str, PrefetchedPage] = {}
+
+    def prefetch(
+        self, driver: Union[WebDriver, RemoteWebDriver], links: List[str]
+    ) -> None:
+        """Open ``links`` in background tabs without waiting for them to load."""
+        self.discard(driver)
+        links = [link for link in links if link.startswith("http")][: self.top_k]
+        if not links:
+            return
+        self.origin_handle = driver.current_window_handle
+        for link in links:
+            known_handles = set(driver.window_handles)
+            try:
+                driver.execute_script("window.open(arguments[0], '_blank');", link)
+            except WebDriverException:
+                continue
+            new_handles = set(driver.window_handles) - known_handles
+            if new_handles:
+                page = PrefetchedPage(link, new_handles.pop())
+                self.pages[normalize_url(link)] = page
+        driver.switch_to.window(self.origin_handle)
+
+    def take(self, driver: Union[WebDriver, RemoteWebDriver], url: str) -> bool:
+        """Make the prefetched tab of ``url`` the working tab.
+
+        The other prefetched tabs and the tab the search was made from are closed,
+        leaving the browser in the same state as if ``url`` had been loaded directly.
+        Returns False if ``url`` was not prefetched or its tab has expired.
+        """
+        page = self.pages.get(normalize_url(url))
+        if page is None or time.time() - page.opened_at > self.ttl:
+            return False
+        if page.handle not in driver.window_handles:
+            del self.pages[normalize_url(url)]
+            return False
+        del self.pages[normalize_url(url)]
+        stale_handles = [other.handle for other in self.pages.values()]
+        if self.origin_handle is not None:
+            stale_handles.append(self.origin_handle)
+        self._close_tabs(driver, stale_handles)
+        self.pages = {}
+        self.origin_handle = None
+        driver.switch_to.window(page.handle)
+        return True
+
+    def discard(self, driver: Union[WebDriver, RemoteWebDriver]) -> None:
+        """Close all prefetched tabs and switch back to the originating tab."""
+        if not self.pages:
+            return
+        self._close_tabs(driver, [page.handle for page in self.pages.values()])
+        self.pages = {}
+        if self.origin_handle in driver.window_handles:
+            driver.switch_to.window(self.origin_handle)
+        self.origin_handle = None
+
+    def _close_tabs(
+        self, driver: Union[WebDriver, RemoteWebDriver], handles: List[str]
+    ) -> None:
+        open_handles = set(driver.window_handles)
+        for handle in handles:
+            if handle in open_handles:
+                driver.switch_to.window(handle)
+                driver.close()
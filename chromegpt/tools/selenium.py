@@ -1,13 +1,14 @@
 """Tool that calls Selenium."""
+import functools
 import json
 import re
 import time
 import urllib.parse
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple, Union
 
 import validators
 from bs4 import BeautifulSoup
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, root_validator, validator
 from selenium import webdriver
 from selenium.common.exceptions import (
     WebDriverException,
@@ -16,14 +17,36 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.remote.webelement import WebElement
 
+from chromegpt.tools.accessibility import AccessibilityPageModel, resolve_element
+from chromegpt.tools.boilerplate import SiteTemplates
+from chromegpt.tools.events import ToolEvents
+from chromegpt.tools.grid import GridNode, GridScheduler
+from chromegpt.tools.json_repair import loads_tolerant, record_retry_saved
+from chromegpt.tools.locator_cache import LocatorCache
+from chromegpt.tools.prefetch import SearchResultPrefetcher
+from chromegpt.tools.session_state import SessionStateStore, domain_from_url
+from chromegpt.tools.tabs import TabManager
 from chromegpt.tools.utils import (
+    ERROR_PREFIXES,
+    estimate_tokens,
     find_parent_element_text,
-    get_all_text_elements,
+    iter_text_elements,
     prettify_text,
-    truncate_string_from_last_occurrence,
 )
 
+# Share of the observation budget the page text may use, the rest is kept for the
+# links, buttons and forms the agent acts on
+TEXT_BUDGET_SHARE = 0.6
+
+# Every name a form field goes by: attributes and the text of its <label>s
+_FIELD_NAMES_SCRIPT = """
+const el = arguments[0];
+const labels = Array.from(el.labels || []).map((label) => label.innerText);
+return [el.name, el.id, el.placeholder, el.getAttribute('aria-label'), ...labels];
+"""
+
 
 class SeleniumWrapper:
     """Wrapper around Selenium.
@@ -37,14 +60,51 @@ class SeleniumWrapper:
             selenium = SeleniumWrapper()
     """
 
-    def __init__(self, headless: bool = False, docker: bool = True) -> None:
-        """Initialize Selenium and start interactive session."""
+    def __init__(
+        self,
+        headless: bool = False,
+        docker: bool = True,
+        prefetch_top_k: int = 0,
+        session_store: Optional[SessionStateStore] = None,
+        observation_budget: Optional[int] = None,
+        page_model: str = "dom",
+        locator_cache: Optional[LocatorCache] = None,
+        grid: Optional[GridScheduler] = None,
+        dedup_boilerplate: bool = False,
+    ) -> None:
+        """Initialize Selenium and start interactive session.
+
+        Args:
+            headless: run Chrome without a window.
+            docker: connect to the selenium-chrome container instead of a local
+                Chrome.
+            prefetch_top_k: number of google search results to load in background
+                tabs after each search, 0 disables prefetching.
+            session_store: store to restore and save cookies/storage per domain,
+                so logins and consent banners carry over between runs.
+            observation_budget: approximate number of tokens after which page
+                extraction stops, None for no limit.
+            page_model: "dom" to extract the page with XPaths, "accessibility" to
+                use Chrome's accessibility tree (falls back to "dom" when the driver
+                can't send CDP commands).
+            locator_cache: cache of the locators that found buttons and form
+                fields per site, tried before scanning the whole page.
+            grid: scheduler that picks the endpoint for the session and moves it
+                to another endpoint if it dies, replaces ``docker``.
+            dedup_boilerplate: leave texts, links and buttons that the site repeats
+                on every page out of the descriptions after the first page.
+        """
         chrome_options = Options()
         if headless:
             chrome_options.add_argument("--headless")
         else:
             chrome_options.add_argument("--start-maximized")
-        if docker:
+        self.chrome_options = chrome_options
+        self.grid = grid
+        self.grid_node: Optional[GridNode] = None
+        if grid:
+            self.driver, self.grid_node = grid.start_session(chrome_options)
+        elif docker:
             self.driver = webdriver.Remote(
                 "http://selenium-chrome:4444/wd/hub",
                 options=chrome_options,
@@ -52,12 +112,53 @@ class SeleniumWrapper:
         else:
             self.driver = webdriver.Chrome(options=chrome_options)
         self.driver.implicitly_wait(5)  # Wait 5 seconds for elements to load
+        self.tabs = TabManager(self.driver)
+        self.session_store = session_store
+        self.observation_budget = observation_budget
+        self.page_model = page_model
+        self.locator_cache = locator_cache
+        self.events = ToolEvents()
+        self.site_templates = SiteTemplates() if dedup_boilerplate else None
+        self.prefetcher = (
+            SearchResultPrefetcher(top_k=prefetch_top_k) if prefetch_top_k > 0 else None
+        )
+        self._last_url: Optional[str] = None
 
     def __del__(self) -> None:
         """Close Selenium session."""
         if hasattr(self, "driver") and self.driver is not None:
-            self.driver.close()
-            self.driver.quit()
+            try:
+                session_store = getattr(self, "session_store", None)
+                if session_store:
+                    session_store.snapshot(self.driver)
+                self.driver.close()
+                self.driver.quit()
+            finally:
+                # A dead session must still give its slot back
+                grid = getattr(self, "grid", None)
+                if grid and self.grid_node:
+                    grid.release(self.grid_node)
+
+    def with_failover(self, func: Callable[..., str]) -> Callable[..., str]:
+        """Wrap tool ``func`` to rerun it on another grid endpoint if the session
+        dies during the call. The new session opens the last page first."""
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> str:
+            if self.grid is None:
+                return func(*args, **kwargs)
+            try:
+                output = func(*args, **kwargs)
+            except Exception:
+                if self._session_alive():
+                    raise
+            else:
+                if self._session_alive():
+                    return output
+            self._move_session()
+            return func(*args, **kwargs)
+
+        return wrapper
 
     def previous_webpage(self) -> str:
         """Go back in browser history."""
@@ -69,13 +170,18 @@ class SeleniumWrapper:
         url = "https://www.google.com/search?q=" + safe_string
         # Go to website
         try:
-            self.driver.switch_to.window(self.driver.window_handles[-1])
+            self._switch_to_working_tab()
             self.driver.get(url)
         except Exception:
             return f"Cannot load website {url}. Try again later."
+        self._sync_session_state()
 
         # Scrape search results
         results = self._get_google_search_results()
+        if self.prefetcher:
+            self.prefetcher.prefetch(
+                self.driver, [result["link"] for result in results]
+            )
         return (
             "Which url would you like to goto? Provide the full url starting with http"
             " or https to goto: "
@@ -106,10 +212,13 @@ class SeleniumWrapper:
 
     def describe_website(self, url: Optional[str] = None) -> str:
         """Describe the website."""
-        output = ""
+        if url and self.prefetcher and self.prefetcher.take(self.driver, url):
+            # The tab has been loading while the agent picked the result
+            self._sync_session_state()
+            return self._collect_website_description()
         if url:
             try:
-                self.driver.switch_to.window(self.driver.window_handles[-1])
+                self._switch_to_working_tab()
                 self.driver.get(url)
             except Exception:
                 return (
@@ -119,27 +228,136 @@ class SeleniumWrapper:
 
         # Let driver wait for website to load
         time.sleep(1)  # Wait for website to load
+        self._sync_session_state()
+
+        return self._collect_website_description()
+
+    def iter_website_description(
+        self,
+    ) -> Generator[Tuple[str, str], Optional[bool], None]:
+        """Stream the description of the current website as ``(kind, content)``.
+
+        Kinds are ``"text"`` (one chunk per visible text element), ``"links"``,
+        ``"buttons"`` and ``"forms"``, in that order. Extraction happens lazily, so a
+        consumer that stops iterating skips the remaining WebDriver calls. Sending
+        True after a text chunk skips the rest of the text.
+        """
+        ax_model = self._get_accessibility_model()
+        if ax_model is not None:
+            yield from self._iter_accessible_description(ax_model)
+            return
+        for text in iter_text_elements(self.driver):
+            if (yield "text", prettify_text(text)):
+                break
+        links_text, buttons_text = self._get_interactable_texts()
+        if links_text:
+            yield "links", json.dumps(links_text)
+        if buttons_text:
+            yield "buttons", json.dumps(buttons_text)
+        yield "forms", self._find_form_fields()
 
+    def _iter_accessible_description(
+        self, ax_model: AccessibilityPageModel
+    ) -> Generator[Tuple[str, str], Optional[bool], None]:
+        """Stream the description from the accessibility tree, see above."""
+        for text in ax_model.texts:
+            if (yield "text", text):
+                break
+        links_text, buttons_text = self._split_links(
+            [
+                prettify_text(element.name, 50)
+                for element in ax_model.links + ax_model.buttons
+                if element.enabled
+            ]
+        )
+        if links_text:
+            yield "links", json.dumps(links_text)
+        if buttons_text:
+            yield "buttons", json.dumps(buttons_text)
+        yield "forms", self._get_accessible_fields(ax_model)
+
+    def _collect_website_description(self) -> str:
+        """Join the streamed description, stopping once the token budget is used."""
+        texts: List[str] = []
+        sections: Dict[str, str] = {}
+        used_tokens = 0
+        text_tokens = 0
+        text_budget = (
+            int(self.observation_budget * TEXT_BUDGET_SHARE)
+            if self.observation_budget
+            else None
+        )
+        truncated = False
+        omitted = 0
+        kind = "text"
+        chunks = self.iter_website_description()
+        stop_text: Optional[bool] = None
         try:
-            # Extract main content
-            main_content = self._get_website_main_content()
+            page_url = self.driver.current_url if self.site_templates else ""
+            while True:
+                try:
+                    kind, content = chunks.send(stop_text)
+                except StopIteration:
+                    break
+                stop_text = None
+                if self.site_templates and page_url:
+                    # Only page-specific content counts against the budget
+                    kept, count = self.site_templates.filter(page_url, kind, content)
+                    omitted += count
+                    if kept is None:
+                        continue
+                    content = kept
+                if kind == "text":
+                    texts.append(content)
+                    text_tokens += estimate_tokens(content)
+                    if text_budget and text_tokens >= text_budget:
+                        # Skip to the links, buttons and forms
+                        truncated = True
+                        stop_text = True
+                else:
+                    sections[kind] = content
+                used_tokens += estimate_tokens(content)
+                if self.observation_budget and used_tokens >= self.observation_budget:
+                    truncated = True
+                    break
         except WebDriverException:
+            if kind != "text":
+                raise
             return "Website still loading, please wait a few seconds and try again."
-        if main_content:
-            output += f"{main_content}\n"
+        finally:
+            chunks.close()
 
-        # Extract interactable components (buttons and links)
-        interactable_content = self._get_interactable_elements()
-        if interactable_content:
-            output += f"{interactable_content}\n"
-
-        # Extract form inputs
-        form_fields = self._find_form_fields()
-        if form_fields:
+        # The accessibility tree has the whole page, scrolling shows nothing new
+        whole_page = getattr(self, "page_model", "dom") == "accessibility"
+        output = ""
+        if texts and whole_page:
+            output += f"The page contains the following contents: {json.dumps(texts)}\n"
+        elif texts:
+            output += (
+                "Current window displays the following contents, try scrolling up or"
+                f" down to view more: {json.dumps(texts)}\n"
+            )
+        interactable_output = ""
+        if "links" in sections:
+            interactable_output += f"Goto these links: {sections['links']}\n"
+        if "buttons" in sections:
+            interactable_output += f"Click on these buttons: {sections['buttons']}"
+        if interactable_output:
+            output += f"{interactable_output}\n"
+        if "forms" in sections:
             output += (
                 "You can input text in these fields using fill_form function: "
-                + form_fields
+                + sections["forms"]
+            )
+        if omitted:
+            output += (
+                f"\n({omitted} texts, links and buttons repeated on every page of"
+                f" {domain_from_url(page_url)} are left out, see the earlier pages.)"
             )
+        if truncated and whole_page:
+            output += "\n(Description truncated to fit the observation budget.)"
+        elif truncated:
+            output += "\n(Description truncated, scroll to view the rest.)"
         return output
 
     def click_button_by_text(self, button_text: str) -> str:
@@ -152,7 +370,7 @@ class SeleniumWrapper:
             for result in google_search_results:
                 if button_text.lower() in result["title"].lower():
                     return self.describe_website(result["link"])
-        self.driver.switch_to.window(self.driver.window_handles[-1])
+        self._switch_to_working_tab()
         # If there are string surrounded by double quotes, extract them
         if button_text.count('"') > 1:
             try:
@@ -160,6 +378,33 @@ class SeleniumWrapper:
             except IndexError:
                 # No text surrounded by double quotes
                 pass
+        if self.locator_cache:
+            cached_element = self.locator_cache.lookup(
+                self.driver,
+                "button",
+                button_text,
+                check=lambda element: self._is_button_for(element, button_text),
+            )
+            if cached_element is not None:
+                return self._click_element(cached_element, button_text)
+        ax_model = self._get_accessibility_model()
+        if ax_model is not None:
+            ax_element = ax_model.find_button(button_text)
+            if ax_element is None:
+                all_buttons = [
+                    prettify_text(element.name)
+                    for element in ax_model.links + ax_model.buttons
+                    if element.enabled
+                ]
+                return (
+                    f"No interactable element found with text: {button_text}. Double"
+                    " check the button text and try again. Available buttons:"
+                    f" {json.dumps(all_buttons)}"
+                )
+            element = resolve_element(self.driver, ax_element)
+            if element is not None:
+                self._remember_locator("button", button_text, element)
+                return self._click_element(element, button_text)
         try:
             elements = self.driver.find_elements(
                 By.XPATH,
@@ -198,10 +443,18 @@ class SeleniumWrapper:
                     f" {json.dumps(all_buttons)}"
                 )
 
+            self._remember_locator("button", button_text, selected_element)
+            return self._click_element(selected_element, button_text)
+        except WebDriverException as e:
+            return f"Error clicking button with text '{button_text}', message: {e.msg}"
+
+    def _click_element(self, element: WebElement, button_text: str) -> str:
+        """Click ``element`` and describe what changed."""
+        try:
             # Scroll the element into view and Click the element using JavaScript
             before_content = self.describe_website()
             actions = ActionChains(self.driver)
-            actions.move_to_element(selected_element).click().perform()
+            actions.move_to_element(element).click().perform()
             after_content = self.describe_website()
             if before_content == after_content:
                 output = (
@@ -227,12 +480,15 @@ class SeleniumWrapper:
         """Find form fields on the website."""
         if url and url != self.driver.current_url and url.startswith("http"):
             try:
-                self.driver.switch_to.window(self.driver.window_handles[-1])
+                self._switch_to_working_tab()
                 self.driver.get(url)
                 # Let driver wait for website to load
                 time.sleep(1)  # Wait for website to load
             except WebDriverException as e:
                 return f"Error loading url {url}, message: {e.msg}"
+        ax_model = self._get_accessibility_model()
+        if ax_model is not None:
+            return self._get_accessible_fields(ax_model)
         fields = []
         for element in self.driver.find_elements(By.XPATH, "//textarea | //input"):
             label_txt = (
@@ -254,13 +510,16 @@ class SeleniumWrapper:
         """fill out form by form field name and input name"""
         filled_element = None
         if form_input and type(form_input) == str:
-            # Clean up form input
-            form_input_str = truncate_string_from_last_occurrence(
-                string=form_input, character="}"  # type: ignore
-            )
             try:
-                form_input = json.loads(form_input_str)
+                form_input = json.loads(form_input)
             except json.decoder.JSONDecodeError:
+                # Fix quotes, fences and braces here instead of another LLM round
+                try:
+                    form_input = loads_tolerant(form_input)  # type: ignore
+                    record_retry_saved("fill_form")
+                except ValueError:
+                    pass
+            if not isinstance(form_input, dict):
                 return (
                     "Invalid JSON input. Please check your input is JSON format and try"
                     " again. Make sure to use double quotes for strings. Example input:"
@@ -269,31 +528,23 @@ class SeleniumWrapper:
         elif not form_input:
             form_input = kwargs  # type: ignore
         try:
-            for element in self.driver.find_elements(By.XPATH, "//textarea | //input"):
-                label_txt = (
-                    element.get_attribute("name")
-                    or element.get_attribute("aria-label")
-                    or find_parent_element_text(element)
-                )
-                if label_txt:
-                    label_txt = prettify_text(label_txt)
-                    for key in form_input.keys():  # type: ignore
-                        if prettify_text(key) == label_txt:
-                            # Scroll the element into view
-                            self.driver.execute_script(
-                                "arguments[0].scrollIntoView();", element
-                            )
-                            time.sleep(0.5)  # Allow some time for the page to settle
-                            try:
-                                # Try clearing the input field
-                                element.send_keys(Keys.CONTROL + "a")
-                                element.send_keys(Keys.DELETE)
-                                element.clear()
-                            except WebDriverException:
-                                pass
-                            element.send_keys(form_input[key])  # type: ignore
-                            filled_element = element
-                            break
+            ax_model = self._get_accessibility_model()
+            for key in form_input.keys():  # type: ignore
+                element = self._find_form_element(key, ax_model)
+                if element is None:
+                    continue
+                # Scroll the element into view
+                self.driver.execute_script("arguments[0].scrollIntoView();", element)
+                time.sleep(0.5)  # Allow some time for the page to settle
+                try:
+                    # Try clearing the input field
+                    element.send_keys(Keys.CONTROL + "a")
+                    element.send_keys(Keys.DELETE)
+                    element.clear()
+                except WebDriverException:
+                    pass
+                element.send_keys(form_input[key])  # type: ignore
+                filled_element = element
             if not filled_element:
                 return (
                     f"Cannot find form with input: {form_input.keys()}."  # type: ignore
@@ -316,7 +567,268 @@ class SeleniumWrapper:
             # print(e)
             return f"Error filling out form with input {form_input}, message: {e.msg}"
 
+    def _find_form_element(
+        self, label: str, ax_model: Optional[AccessibilityPageModel] = None
+    ) -> Optional[WebElement]:
+        """Find the input or textarea labeled ``label`` as listed by find_form."""
+        if self.locator_cache:
+            cached_element = self.locator_cache.lookup(
+                self.driver,
+                "field",
+                label,
+                check=lambda element: self._is_field_for(element, label),
+            )
+            if cached_element is not None:
+                return cached_element
+        if ax_model is not None:
+            ax_element = ax_model.find_field(label)
+            element = resolve_element(self.driver, ax_element) if ax_element else None
+            if element is not None:
+                self._remember_locator("field", label, element)
+                return element
+        for element in self.driver.find_elements(By.XPATH, "//textarea | //input"):
+            label_txt = (
+                element.get_attribute("name")
+                or element.get_attribute("aria-label")
+                or find_parent_element_text(element)
+            )
+            if label_txt and prettify_text(label_txt) == prettify_text(label):
+                self._remember_locator("field", label, element)
+                return element
+        return None
+
+    def _is_button_for(self, element: WebElement, button_text: str) -> bool:
+        """Cheap check that a cached locator still finds the right button."""
+        text = find_parent_element_text(element)
+        button_text = prettify_text(button_text)
+        return (
+            element.is_displayed()
+            and element.is_enabled()
+            and button_text in text
+            and abs(len(text) - len(button_text)) < 50
+        )
+
+    def _is_field_for(self, element: WebElement, label: str) -> bool:
+        """Check that a cached locator still finds the field labeled ``label``.
+
+        A positional locator can match another input on another page of the site,
+        so one of the field's names must still be ``label``, as in the full scan.
+        """
+        if not (element.is_displayed() and element.is_enabled()):
+            return False
+        label = prettify_text(label)
+        names = self.driver.execute_script(_FIELD_NAMES_SCRIPT, element) or []
+        if any(name and prettify_text(str(name)) == label for name in names):
+            return True
+        return find_parent_element_text(element) == label
+
+    def _remember_locator(self, kind: str, text: str, element: WebElement) -> None:
+        if self.locator_cache:
+            self.locator_cache.record(self.driver, kind, text, element)
+
+    def _get_accessibility_model(self) -> Optional[AccessibilityPageModel]:
+        """Get the accessibility tree of the page, None to extract from the DOM."""
+        if self.page_model != "accessibility":
+            return None
+        ax_model = AccessibilityPageModel.from_driver(self.driver)
+        if ax_model is None:
+            # CDP is unavailable for this browser, don't try again on every page
+            self.page_model = "dom"
+        return ax_model
+
+    def _get_accessible_fields(self, ax_model: AccessibilityPageModel) -> str:
+        fields: List[str] = []
+        for element in ax_model.fields:
+            label_txt = prettify_text(element.name)
+            if element.enabled and len(label_txt) < 100 and label_txt not in fields:
+                fields.append(label_txt)
+        return str(fields)
+
+    def _sync_session_state(self) -> None:
+        """Restore stored session state for the current domain, then save it."""
+        if not self.session_store:
+            return
+        try:
+            if self.session_store.restore(self.driver):
+                self.driver.refresh()
+                time.sleep(1)  # Wait for website to reload
+        except WebDriverException:
+            return
+        self.session_store.snapshot(self.driver)
+
+    def _session_alive(self) -> bool:
+        """Check the browser still responds, remembering the page it shows."""
+        try:
+            self._last_url = self.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _move_session(self) -> None:
+        """Start a new session on another grid endpoint and reopen the last page."""
+        assert self.grid is not None and self.grid_node is not None
+        failed_node = self.grid_node
+        try:
+            # Don't leave an orphaned session on a node that is only half dead
+            self.driver.quit()
+        except Exception:
+            pass
+        self.grid.release(failed_node, failed=True)
+        self.driver, self.grid_node = self.grid.start_session(
+            self.chrome_options, exclude=failed_node
+        )
+        self.events.emit(
+            {"type": "failover", "from": failed_node.url, "to": self.grid_node.url}
+        )
+        self.driver.implicitly_wait(5)
+        self.tabs = TabManager(self.driver)
+        if self.prefetcher:
+            self.prefetcher = SearchResultPrefetcher(top_k=self.prefetcher.top_k)
+        if self.session_store:
+            self.session_store.reset()
+        if self._last_url and self._last_url.startswith("http"):
+            try:
+                self.driver.get(self._last_url)
+                self._sync_session_state()
+            except WebDriverException:
+                pass
+
+    def _switch_to_working_tab(self) -> None:
+        """Drop prefetched tabs and switch to the active tab."""
+        if self.prefetcher:
+            self.prefetcher.discard(self.driver)
+        self.tabs.switch_to_active()
+
+    def open_tab(self, url: str) -> str:
+        """Open a website in a new tab and make it the active tab."""
+        self._switch_to_working_tab()
+        if not validators.url(url):
+            return f"Invalid url {url}. Provide the full url starting with http."
+        try:
+            name = self.tabs.open(url)
+        except (ValueError, WebDriverException):
+            return f"Cannot open a new tab for {url}. Try goto instead."
+        self.tabs.switch(name)
+        return f"Opened tab '{name}'. " + self.describe_website()
+
+    def switch_tab(self, name: str) -> str:
+        """Switch to an open tab by name."""
+        self._switch_to_working_tab()
+        name = name.strip().strip("'\"")
+        if not self.tabs.switch(name):
+            return f"No tab named '{name}'. Open tabs: {json.dumps(self.tabs.names())}"
+        return f"Switched to tab '{name}'. " + self.describe_website()
+
+    def compare_pages(self, urls: str, max_chars_per_page: int = 2000) -> str:
+        """Load several websites in parallel tabs and describe them together.
+
+        All urls are opened at once so the browser loads them concurrently, each tab
+        is then described in turn and the tabs are kept open so the agent can
+        ``switch_tab`` to the one it wants to continue with.
+        """
+        self._switch_to_working_tab()
+        try:
+            url_list = json.loads(urls)
+        except json.decoder.JSONDecodeError:
+            url_list = re.split(r"[\s,]+", urls)
+        if not isinstance(url_list, list):
+            url_list = [url_list]
+        url_list = [str(url) for url in url_list if validators.url(str(url))]
+        # Keep the active tab open next to the compared pages
+        url_list = url_list[: self.tabs.max_tabs - 1]
+        if not url_list:
+            return (
+                "No valid urls to compare. Input should be a comma separated list of"
+                " full urls starting with http or https."
+            )
+
+        opened = []
+        for url in url_list:
+            try:
+                opened.append((self.tabs.open(url), url))
+            except (ValueError, WebDriverException):
+                opened.append(("", url))
+        output = ""
+        for name, url in opened:
+            if not name:
+                output += f"Cannot load website {url}.\n\n"
+                continue
+            self.tabs.focus(name)
+            description = self.describe_website()
+            if len(description) > max_chars_per_page:
+                description = description[:max_chars_per_page] + "..."
+            output += f"Tab '{name}' ({url}): {description}\n\n"
+        self.tabs.switch_to_active()
+        output += "Use switch_tab with a tab name to continue on one of these pages."
+        return output
+
     def scroll(self, direction: str) -> str:
+        self._scroll_window(direction)
+        return self.describe_website()
+
+    def run_script(self, steps: Union[str, List[Dict[str, Any]]]) -> str:
+        """Run goto/click/fill_form/scroll steps back to back in one tool call.
+
+        Steps run until one fails, the rest are skipped. Returns the status of each
+        step and the description of the page the script ended on.
+        """
+        try:
+            script = parse_script(steps)
+        except ValueError as e:
+            return (
+                f"Cannot run script: {e}. Input should be a json object with a list"
+                ' of steps, e.g. {"steps": [{"action": "goto", "input":'
+                ' "https://example.com"}, {"action": "click", "input": "Contact"},'
+                ' {"action": "fill_form", "input": {"email": "foo@bar.com"}}]}'
+            )
+        statuses = []
+        header = "Script steps:"
+        for i, step in enumerate(script):
+            output = self._run_script_step(step)
+            failed = output.startswith(ERROR_PREFIXES)
+            status = re.split(r"\.\s", output, 1)[0][:200]
+            statuses.append(f"{i + 1}. {step}: {'FAILED ' if failed else ''}{status}")
+            if failed:
+                # Starts with an error prefix so trajectories don't replay it
+                header = f"Error running script, step {i + 1} failed. Script steps:"
+                statuses += [
+                    f"{j + 1}. {skipped}: skipped"
+                    for j, skipped in enumerate(script[i + 1 :], start=i + 1)
+                ]
+                break
+        return (
+            header
+            + "\n"
+            + "\n".join(statuses)
+            + "\nNow "
+            + self._collect_website_description()
+        )
+
+    def _run_script_step(self, step: "ScriptStep") -> str:
+        if step.action == "goto":
+            url = str(step.input)
+            try:
+                self._switch_to_working_tab()
+                self.driver.get(url)
+            except WebDriverException:
+                return f"Cannot load website {url}."
+            time.sleep(1)  # Wait for website to load
+            self._sync_session_state()
+            return f"Loaded {url}."
+        if step.action == "click":
+            return self.click_button_by_text(str(step.input))
+        if step.action == "fill_form":
+            form_input = step.input
+            return self.fill_out_form(
+                form_input if isinstance(form_input, str) else json.dumps(form_input)
+            )
+        try:
+            self._scroll_window(str(step.input))
+        except WebDriverException as e:
+            return f"Error scrolling {step.input}, message: {e.msg}"
+        return f"Scrolled {step.input}."
+
+    def _scroll_window(self, direction: str) -> None:
         # Get the height of the current window
         window_height = self.driver.execute_script("return window.innerHeight")
         if direction == "up":
@@ -325,24 +837,8 @@ class SeleniumWrapper:
         # Scroll by 1 window height
         self.driver.execute_script(f"window.scrollBy(0, {window_height})")
 
-        return self.describe_website()
-
-    def _get_website_main_content(self) -> str:
-        texts = get_all_text_elements(self.driver)
-        pretty_texts = [prettify_text(text) for text in texts]
-        if not pretty_texts:
-            return ""
-
-        description = (
-            "Current window displays the following contents, try scrolling up or down"
-            " to view more: "
-        )
-        description += json.dumps(pretty_texts)
-
-        return description
-
-    def _get_interactable_elements(self) -> str:
-        # Extract interactable components (buttons and links)
+    def _get_interactable_texts(self) -> Tuple[List[str], List[str]]:
+        """Get the texts of visible links and buttons."""
         interactable_elements = self.driver.find_elements(
             By.XPATH,
             "//button | //div[@role='button'] | //a | //input[@type='checkbox']",
@@ -359,8 +855,12 @@ class SeleniumWrapper:
                 and element.is_enabled()
             ):
                 interactable_texts.append(button_text)
+        return self._split_links(interactable_texts)
 
-        # Split up the links and the buttons
+    def _split_links(
+        self, interactable_texts: List[str]
+    ) -> Tuple[List[str], List[str]]:
+        """Split up the links and the buttons."""
         buttons_text = []
         links_text = []
         for text in interactable_texts:
@@ -368,12 +868,7 @@ class SeleniumWrapper:
                 links_text.append(text)
             else:
                 buttons_text.append(text)
-        interactable_output = ""
-        if links_text:
-            interactable_output += f"Goto these links: {json.dumps(links_text)}\n"
-        if buttons_text:
-            interactable_output += f"Click on these buttons: {json.dumps(buttons_text)}"
-        return interactable_output
+        return links_text, buttons_text
 
 
 class GoogleSearchInput(BaseModel):
@@ -428,3 +923,115 @@ class ScrollInput(BaseModel):
     direction: str = Field(
         default="down", description="direction to scroll, either 'up' or 'down'"
     )
+
+
+class OpenTabInput(BaseModel):
+    """Open tab input model."""
+
+    url: str = Field(
+        ...,
+        description="full URL starting with http or https",
+        example="https://www.google.com/",
+    )
+
+
+class SwitchTabInput(BaseModel):
+    """Switch tab input model."""
+
+    name: str = Field(
+        ...,
+        description="name of the tab to switch to",
+        example="google.com",
+    )
+
+
+class ComparePagesInput(BaseModel):
+    """Compare pages input model."""
+
+    urls: str = Field(
+        ...,
+        description="comma separated list of full URLs to load and compare",
+        example="https://www.example.com/, https://www.example.org/",
+    )
+
+
+SCRIPT_ACTIONS = ("goto", "click", "fill_form", "scroll")
+MAX_SCRIPT_STEPS = 8
+
+
+class ScriptStep(BaseModel):
+    """One step of a script, ``input`` as the tool of the same name takes it."""
+
+    action: str
+    input: Union[Dict[str, Any], str] = ""
+
+    @root_validator(pre=True)
+    def _accept_tool_keys(cls, values: Dict[str, Any]) -> Dict[str, Any]:
+        if "input" not in values and "action_input" in values:
+            values["input"] = values.pop("action_input")
+        return values
+
+    @validator("action")
+    def _check_action(cls, action: str) -> str:
+        action = action.strip().lower()
+        if action not in SCRIPT_ACTIONS:
+            raise ValueError(f"action must be one of {', '.join(SCRIPT_ACTIONS)}")
+        return action
+
+    @root_validator(skip_on_failure=True)
+    def _check_input(cls, values: Dict[str, Any]) -> Dict[str, Any]:
+        action, step_input = values["action"], values["input"]
+        if action == "goto" and not validators.url(str(step_input)):
+            raise ValueError(f"goto needs a full url, got {step_input!r}")
+        if action == "click" and not (isinstance(step_input, str) and step_input):
+            raise ValueError("click needs the text of the button or link")
+        if action == "fill_form" and not step_input:
+            raise ValueError("fill_form needs the fields and values to fill in")
+        if action == "scroll":
+            values["input"] = step_input if step_input in ("up", "down") else "down"
+        return values
+
+    def __str__(self) -> str:
+        step_input = (
+            self.input if isinstance(self.input, str) else json.dumps(self.input)
+        )
+        return f"{self.action} {step_input}"
+
+
+def parse_script(steps: Union[str, List[Dict[str, Any]]]) -> List[ScriptStep]:
+    """Validate the steps of a ``run_script`` input, raises ``ValueError``."""
+    if isinstance(steps, str):
+        steps = loads_tolerant(steps)
+    if isinstance(steps, dict) and "steps" in steps:
+        steps = steps["steps"]
+    if not isinstance(steps, list) or not steps:
+        raise ValueError("expected a non-empty list of steps")
+    if len(steps) > MAX_SCRIPT_STEPS:
+        raise ValueError(f"at most {MAX_SCRIPT_STEPS} steps are allowed")
+    script = []
+    for i, step in enumerate(steps):
+        if not isinstance(step, dict):
+            raise ValueError(f"step {i + 1} is not an object")
+        try:
+            script.append(ScriptStep(**step))
+        except ValueError as e:
+            message = e.errors()[0]["msg"] if hasattr(e, "errors") else str(e)
+            raise ValueError(f"step {i + 1}: {message}")
+    return script
+
+
+class RunScriptInput(BaseModel):
+    """Run script input model."""
+
+    steps: Union[List[Dict[str, Any]], str] = Field(
+        ...,
+        description=(
+            "json list of steps, each with an action (goto, click, fill_form or"
+            " scroll) and its input"
+        ),
+        example=(
+            '[{"action": "goto", "input": "https://example.com"}, {"action": "click",'
+            ' "input": "Contact"}, {"action": "fill_form", "input": {"email":'
+            ' "foo@bar.com"}}]'
+        ),
+    )
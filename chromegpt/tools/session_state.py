@@ -0,0 +1,178 @@
+"""Persist browser session state (cookies, storage) across runs."""
+import hashlib
+import json
+import os
+import tempfile
+import time
+import urllib.parse
+from typing import Any, Dict, Optional, Set, Union
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.webdriver import WebDriver
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+
+from chromegpt.tools.utils import safe_filename
+
+_READ_STORAGE_SCRIPT = """
+const read = (storage) => {
+    const items = {};
+    for (let i = 0; i < storage.length; i++) {
+        const key = storage.key(i);
+        items[key] = storage.getItem(key);
+    }
+    return items;
+};
+return {localStorage: read(window.localStorage),
+        sessionStorage: read(window.sessionStorage)};
+"""
+
+_WRITE_STORAGE_SCRIPT = """
+const state = arguments[0];
+for (const [key, value] of Object.entries(state.localStorage || {})) {
+    window.localStorage.setItem(key, value);
+}
+for (const [key, value] of Object.entries(state.sessionStorage || {})) {
+    window.sessionStorage.setItem(key, value);
+}
+"""
+
+
+def domain_from_url(url: str) -> str:
+    """Return the host of ``url`` without a leading ``www.``."""
+    host = urllib.parse.urlparse(url).hostname or ""
+    if host.startswith("www."):
+        host = host[len("www.") :]
+    return host
+
+
+class SessionStateStore:
+    """Store cookies, localStorage and sessionStorage per domain on disk.
+
+    State is kept in ``<root_dir>/<tenant>-<hash>/<domain>.json`` so that tenants
+    never see each other's logins, and entries older than ``ttl`` seconds are
+    ignored.
+
+    Example:
+        .. code-block:: python
+
+            store = SessionStateStore("~/.chromegpt/sessions", tenant="acme")
+            selenium = SeleniumWrapper(session_store=store)
+    """
+
+    def __init__(
+        self,
+        root_dir: str = "~/.chromegpt/sessions",
+        tenant: str = "default",
+        ttl: float = 7 * 24 * 3600,
+    ) -> None:
+        self.directory = os.path.join(
+            os.path.expanduser(root_dir), self._tenant_dirname(tenant)
+        )
+        self.ttl = ttl
+        self._restored: Set[str] = set()
+        self._saved_digests: Dict[str, str] = {}
+
+    def load(self, domain: str) -> Optional[Dict[str, Any]]:
+        """Load the stored state for ``domain``, None if missing or expired."""
+        path = self._path(domain)
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(state, dict):
+            return None
+        if time.time() - state.get("saved_at", 0) > self.ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return state
+
+    def save(self, domain: str, state: Dict[str, Any]) -> None:
+        """Write ``state`` for ``domain``, skipping the write if nothing changed."""
+        digest = hashlib.sha1(
+            json.dumps(state, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        if self._saved_digests.get(domain) == digest:
+            return
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            # A temp file per write, pooled sessions may save the same domain at
+            # once. mkstemp keeps it readable by the owner only, cookies are
+            # credentials.
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump({**state, "saved_at": time.time()}, f)
+                os.replace(tmp_path, self._path(domain))
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        except OSError:
+            return
+        self._saved_digests[domain] = digest
+
+    def snapshot(self, driver: Union[WebDriver, RemoteWebDriver]) -> None:
+        """Save the state of the website currently open in ``driver``."""
+        domain = domain_from_url(driver.current_url)
+        if not domain:
+            return
+        try:
+            storage = driver.execute_script(_READ_STORAGE_SCRIPT) or {}
+            state = {
+                "cookies": driver.get_cookies(),
+                "localStorage": storage.get("localStorage", {}),
+                "sessionStorage": storage.get("sessionStorage", {}),
+            }
+        except WebDriverException:
+            return
+        self.save(domain, state)
+
+    def restore(self, driver: Union[WebDriver, RemoteWebDriver]) -> bool:
+        """Apply the stored state to the website currently open in ``driver``.
+
+        State is applied at most once per domain for the lifetime of the store, so
+        newer state from the running session is never overwritten. Returns True if
+        anything was restored, in which case the page should be reloaded.
+        """
+        domain = domain_from_url(driver.current_url)
+        if not domain or domain in self._restored:
+            return False
+        self._restored.add(domain)
+        state = self.load(domain)
+        if not state:
+            return False
+        now = time.time()
+        for cookie in state.get("cookies", []):
+            if cookie.get("expiry") and cookie["expiry"] < now:
+                continue
+            try:
+                driver.add_cookie(cookie)
+            except WebDriverException:
+                # Cookie belongs to a parent/sibling domain the page can't set
+                continue
+        try:
+            driver.execute_script(_WRITE_STORAGE_SCRIPT, state)
+        except WebDriverException:
+            pass
+        return True
+
+    def reset(self) -> None:
+        """Allow restoring every domain again, e.g. in a new browser."""
+        self._restored.clear()
+
+    def _path(self, domain: str) -> str:
+        return os.path.join(self.directory, f"{self._safe_name(domain)}.json")
+
+    @staticmethod
+    def _safe_name(name: str) -> str:
+        return safe_filename(name)
+
+    @staticmethod
+    def _tenant_dirname(tenant: str) -> str:
+        """Readable directory name, plus a hash of ``tenant`` so that names that
+        only differ in unsafe characters ("a/b", "a_b") stay apart."""
+        digest = hashlib.sha1(tenant.encode("utf-8")).hexdigest()[:8]
+        return f"{safe_filename(tenant)}-{digest}"
@@ -0,0 +1,119 @@
+"""Named tab management for a Selenium session."""
+import urllib.parse
+from typing import Dict, List, Optional, Union
+
+from selenium.webdriver.chrome.webdriver import WebDriver
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+
+
+class TabManager:
+    """Keep track of named browser tabs for one WebDriver session.
+
+    The active tab is the one every tool works on. Tabs opened by the website itself
+    (e.g. links with ``target="_blank"``) are picked up on the next ``sync`` and become
+    active, matching the previous "always use the newest tab" behaviour. Opening a
+    tab when ``max_tabs`` are open closes the least recently used one.
+    """
+
+    def __init__(
+        self, driver: Union[WebDriver, RemoteWebDriver], max_tabs: int = 8
+    ) -> None:
+        self.driver = driver
+        self.max_tabs = max_tabs
+        self.active = "main"
+        self.tabs: Dict[str, str] = {self.active: driver.current_window_handle}
+        self._known_handles = set(driver.window_handles)
+
+    def names(self) -> List[str]:
+        """Names of the open tabs."""
+        self.sync()
+        return list(self.tabs)
+
+    def sync(self) -> None:
+        """Pick up tabs that were opened or closed outside of the manager."""
+        handles = self.driver.window_handles
+        open_handles = set(handles)
+        for name, handle in list(self.tabs.items()):
+            if handle not in open_handles:
+                del self.tabs[name]
+        new_handles = [
+            handle for handle in handles if handle not in self._known_handles
+        ]
+        for handle in new_handles:
+            # A replaced active tab keeps its name, popups get a fresh one
+            name = self.active if self.active not in self.tabs else self._unique("tab")
+            self.tabs[name] = handle
+            self.active = name
+        if self.active not in self.tabs:
+            if not self.tabs:
+                self.tabs[self.active] = handles[-1]
+            else:
+                self.active = list(self.tabs)[-1]
+        self._known_handles = open_handles
+
+    def switch_to_active(self) -> None:
+        """Focus the driver on the active tab."""
+        self.sync()
+        self.driver.switch_to.window(self.tabs[self.active])
+
+    def open(self, url: str, name: Optional[str] = None) -> str:
+        """Open ``url`` in a new tab without waiting for it to load.
+
+        Returns the tab name, which defaults to the website's domain.
+        """
+        self.sync()
+        while len(self.tabs) >= max(self.max_tabs, 2):
+            self.close(next(tab for tab in self.tabs if tab != self.active))
+        name = self._unique(name or self._name_from_url(url))
+        known_handles = set(self.driver.window_handles)
+        self.driver.execute_script("window.open(arguments[0], '_blank');", url)
+        new_handles = [
+            handle
+            for handle in self.driver.window_handles
+            if handle not in known_handles
+        ]
+        if not new_handles:
+            raise ValueError(f"Could not open a new tab for {url}")
+        self.tabs[name] = new_handles[-1]
+        self._known_handles.add(new_handles[-1])
+        return name
+
+    def switch(self, name: str) -> bool:
+        """Make ``name`` the active tab. Returns False if there is no such tab."""
+        self.sync()
+        if name not in self.tabs:
+            return False
+        self.active = name
+        self.tabs[name] = self.tabs.pop(name)  # Most recently used last
+        self.driver.switch_to.window(self.tabs[name])
+        return True
+
+    def focus(self, name: str) -> None:
+        """Point the driver at ``name`` without changing the active tab."""
+        self.driver.switch_to.window(self.tabs[name])
+
+    def close(self, name: str) -> None:
+        """Close tab ``name``; the active tab moves to the newest remaining tab."""
+        self.sync()
+        if name not in self.tabs or len(self.tabs) == 1:
+            return
+        self.driver.switch_to.window(self.tabs.pop(name))
+        self.driver.close()
+        self._known_handles = set(self.driver.window_handles)
+        if name == self.active:
+            self.active = list(self.tabs)[-1]
+        self.driver.switch_to.window(self.tabs[self.active])
+
+    def _name_from_url(self, url: str) -> str:
+        netloc = urllib.parse.urlparse(url).netloc
+        if netloc.startswith("www."):
+            netloc = netloc[len("www.") :]
+        return netloc or "tab"
+
+    def _unique(self, name: str) -> str:
+        if name not in self.tabs:
+            return name
+        index = 2
+        while f"{name}-{index}" in self.tabs:
+            index += 1
+        return f"{name}-{index}"
@@ -1,7 +1,7 @@
 """Utils for chromegpt tools."""
 
 import re
-from typing import List, Optional, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 
 from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.common.by import By
@@ -9,6 +9,16 @@ from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
 from selenium.webdriver.remote.webelement import WebElement
 from unidecode import unidecode
 
+# Observations of failed tool calls
+ERROR_PREFIXES = (
+    "Cannot ",
+    "Error ",
+    "Invalid JSON",
+    "No interactable",
+    "No form inputs found",
+    "Website still loading",
+)
+
 
 ### Main Content Extraction ###
 def is_complete_sentence(text: str) -> bool:
@@ -16,19 +26,24 @@ def is_complete_sentence(text: str) -> bool:
 
 
 def get_all_text_elements(driver: Union[WebDriver, RemoteWebDriver]) -> List[str]:
+    return list(iter_text_elements(driver))
+
+
+def iter_text_elements(driver: Union[WebDriver, RemoteWebDriver]) -> Iterator[str]:
+    """Lazily yield the texts of the elements visible in the browser window."""
     xpath = (
         "//*[not(self::script or self::style or"
         " self::noscript)][string-length(normalize-space(text())) > 0]"
     )
     elements = driver.find_elements(By.XPATH, xpath)
-    texts = [
-        element.text.strip()
-        for element in elements
-        if element.text.strip()
-        and element.is_displayed()
-        and element_completely_viewable(driver, element)
-    ]
-    return texts
+    for element in elements:
+        text = element.text.strip()
+        if (
+            text
+            and element.is_displayed()
+            and element_completely_viewable(driver, element)
+        ):
+            yield text
 
 
 def find_interactable_elements(driver: Union[WebDriver, RemoteWebDriver]) -> List[str]:
@@ -108,11 +123,24 @@ def find_parent_element_text(elem: WebElement, prettify: bool = True) -> str:
     return ""
 
 
-def truncate_string_from_last_occurrence(string: str, character: str) -> str:
-    """Truncate a string from the last occurrence of a character."""
-    last_occurrence_index = string.rfind(character)
-    if last_occurrence_index != -1:
-        truncated_string = string[: last_occurrence_index + 1]
-        return truncated_string
-    else:
-        return string
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of LLM tokens in a text (~4 chars per token)."""
+    return len(text) // 4 + 1
+
+
+def percentiles(values: Iterable[float]) -> Dict[str, Optional[float]]:
+    """Nearest-rank p50, p90 and p99 of ``values``."""
+    ordered = sorted(values)
+    result: Dict[str, Optional[float]] = {}
+    for p in (50, 90, 99):
+        if not ordered:
+            result[f"p{p}"] = None
+            continue
+        rank = max(0, -(-p * len(ordered) // 100) - 1)
+        result[f"p{p}"] = round(ordered[rank], 3)
+    return result
+
+
+def safe_filename(name: str) -> str:
+    """Turn ``name`` (a domain, tenant...) into a file name without path parts."""
+    return re.sub(r"[^A-Za-z0-9._-]", "_", name).lstrip(".") or "_"
@@ -0,0 +1,95 @@
+"""WebDriver stand-ins and a SeleniumWrapper without a browser for the tests."""
+from typing import Any, Dict, List, Optional
+
+from chromegpt.tools.events import ToolEvents
+from chromegpt.tools.selenium import SeleniumWrapper
+
+
+class FakeDriver:
+    """Driver on a single page, tests add the calls they need."""
+
+    def __init__(self, url: str = "https://shop.com") -> None:
+        self.current_url = url
+
+    def close(self) -> None:
+        pass
+
+    def quit(self) -> None:
+        pass
+
+    def implicitly_wait(self, seconds: float) -> None:
+        pass
+
+
+def make_selenium(driver: Optional[Any] = None, **attributes: Any) -> Any:
+    """SeleniumWrapper on ``driver`` that doesn't start a browser.
+
+    Attributes are set as the constructor would set them by default, ``attributes``
+    replaces them, e.g. methods of the wrapper.
+    """
+    selenium: Any = object.__new__(SeleniumWrapper)
+    defaults = {
+        "chrome_options": None,
+        "grid": None,
+        "grid_node": None,
+        "driver": FakeDriver() if driver is None else driver,
+        "tabs": None,
+        "session_store": None,
+        "observation_budget": None,
+        "page_model": "dom",
+        "locator_cache": None,
+        "events": ToolEvents(),
+        "site_templates": None,
+        "prefetcher": None,
+        "_last_url": None,
+    }
+    for name, value in {**defaults, **attributes}.items():
+        setattr(selenium, name, value)
+    return selenium
+
+
+class SwitchTo:
+    def __init__(self, driver: "TabbedDriver") -> None:
+        self.driver = driver
+
+    def window(self, handle: str) -> None:
+        assert handle in self.driver.urls, f"no window {handle}"
+        self.driver.current_window_handle = handle
+
+
+class TabbedDriver:
+    """Keeps the url of every window, ``window.open`` adds one."""
+
+    def __init__(self, url: str = "about:blank") -> None:
+        self.urls: Dict[str, str] = {"w0": url}
+        self.current_window_handle = "w0"
+        self.switch_to = SwitchTo(self)
+        self.loaded: List[str] = []
+        self._next = 1
+
+    @property
+    def window_handles(self) -> List[str]:
+        return list(self.urls)
+
+    @property
+    def current_url(self) -> str:
+        return self.urls[self.current_window_handle]
+
+    def get(self, url: str) -> None:
+        self.loaded.append(url)
+        self.urls[self.current_window_handle] = url
+
+    def execute_script(self, script: str, *args: Any) -> Any:
+        if script.startswith("window.open"):
+            self.urls[f"w{self._next}"] = args[0]
+            self._next += 1
+        return None
+
+    def close(self) -> None:
+        del self.urls[self.current_window_handle]
+
+    def quit(self) -> None:
+        pass
+
+    def implicitly_wait(self, seconds: float) -> None:
+        pass
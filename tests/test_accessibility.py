@@ -0,0 +1,125 @@
+"""Unit tests for the accessibility tree page model."""
+from typing import Any, Dict, Sequence
+
+from selenium.common.exceptions import WebDriverException
+
+from chromegpt.tools.accessibility import (
+    AccessibilityPageModel,
+    get_full_ax_tree,
+    resolve_element,
+)
+from tests.fake_driver import FakeDriver, make_selenium
+
+
+def node(
+    node_id: str, role: str, name: str = "", children: Sequence[str] = (), **extra: Any
+) -> Dict[str, Any]:
+    return {
+        "nodeId": node_id,
+        "role": {"type": "role", "value": role},
+        "name": {"type": "computedString", "value": name},
+        "childIds": list(children),
+        "backendDOMNodeId": int(node_id),
+        **extra,
+    }
+
+
+NODES = [
+    node("1", "RootWebArea", "Shop", ["2", "3", "5", "7", "9", "10"]),
+    node("2", "heading", "Welcome", ["20"], parentId="1"),
+    node("20", "StaticText", "Welcome", parentId="2"),
+    node("3", "generic", "", ["30", "4"], parentId="1"),
+    node("30", "StaticText", "Great deals  every day", parentId="3"),
+    node("4", "link", "Sign in", ["40"], parentId="3"),
+    node("40", "StaticText", "Sign in", parentId="4"),
+    node("5", "button", "Add to cart", parentId="1"),
+    node(
+        "7",
+        "button",
+        "Checkout",
+        parentId="1",
+        properties=[{"name": "disabled", "value": {"type": "boolean", "value": True}}],
+    ),
+    node("9", "textbox", "Email", parentId="1"),
+    node("10", "generic", "", ["11"], parentId="1", ignored=True),
+    node("11", "StaticText", "Footer", parentId="10"),
+]
+
+
+def test_page_model_prunes_tree() -> None:
+    model = AccessibilityPageModel(NODES)
+    assert model.texts == ["welcome", "great deals every day", "footer"]
+    assert [element.name for element in model.links] == ["Sign in"]
+    assert [element.name for element in model.buttons] == ["Add to cart", "Checkout"]
+    assert [element.name for element in model.fields] == ["Email"]
+
+
+def test_find_elements() -> None:
+    model = AccessibilityPageModel(NODES)
+    assert model.find_button("sign in").backend_node_id == 4  # type: ignore
+    assert model.find_button("add to").name == "Add to cart"  # type: ignore
+    # disabled buttons can't be clicked
+    assert model.find_button("Checkout") is None
+    assert model.find_field("email").role == "textbox"  # type: ignore
+    assert model.find_field("password") is None
+
+
+class FakeCDPDriver:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+
+    def execute_cdp_cmd(self, cmd: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if self.fail:
+            raise WebDriverException("unknown command")
+        assert cmd == "Accessibility.getFullAXTree"
+        return {"nodes": NODES}
+
+
+def test_get_full_ax_tree_falls_back() -> None:
+    assert get_full_ax_tree(FakeCDPDriver()) == NODES  # type: ignore
+    assert get_full_ax_tree(FakeCDPDriver(fail=True)) is None  # type: ignore
+    assert get_full_ax_tree(object()) is None  # type: ignore
+
+
+class FakeDOMDriver(FakeDriver):
+    """Page of elements with attributes, addressed by backend node id."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.attributes: Dict[int, Dict[str, str]] = {4: {}, 5: {}}
+
+    def execute_cdp_cmd(self, cmd: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if cmd == "Accessibility.getFullAXTree":
+            return {"nodes": NODES}
+        if cmd == "DOM.resolveNode":
+            return {"object": {"objectId": params["backendNodeId"]}}
+        assert cmd == "Runtime.callFunctionOn"
+        marker = params["arguments"][0]["value"]
+        self.attributes[params["objectId"]]["data-chromegpt-ax"] = marker
+        return {}
+
+    def find_element(self, by: str, selector: str) -> int:
+        marker = selector.split("'")[1]
+        return next(
+            node_id
+            for node_id, attributes in self.attributes.items()
+            if attributes.get("data-chromegpt-ax") == marker
+        )
+
+    def execute_script(self, script: str, node_id: int) -> None:
+        assert "removeAttribute('data-chromegpt-ax')" in script
+        del self.attributes[node_id]["data-chromegpt-ax"]
+
+
+def test_resolve_element_leaves_no_marker() -> None:
+    driver: Any = FakeDOMDriver()
+    button = AccessibilityPageModel(NODES).find_button("add to cart")
+    assert resolve_element(driver, button) == 5  # type: ignore
+    assert driver.attributes == {4: {}, 5: {}}
+
+
+def test_description_covers_whole_page() -> None:
+    selenium = make_selenium(FakeDOMDriver(), page_model="accessibility")
+    description = selenium._collect_website_description()
+    assert description.startswith("The page contains the following contents:")
+    assert "footer" in description and "scroll" not in description
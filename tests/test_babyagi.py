@@ -0,0 +1,118 @@
+"""Tests for running BabyAGI tasks in concurrent batches."""
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from langchain.chains.base import Chain
+from langchain.docstore.document import Document
+from langchain.vectorstores.base import VectorStore
+
+from chromegpt.agent.babyagi import ConcurrentBabyAGI, LazyChain
+
+
+class FakeChain(Chain):
+    keys: List[str]
+    respond: Callable[[Dict[str, Any]], str]
+    calls: List[Dict[str, Any]] = []
+
+    @property
+    def input_keys(self) -> List[str]:
+        return self.keys
+
+    @property
+    def output_keys(self) -> List[str]:
+        return ["text"]
+
+    def _call(self, inputs: Dict[str, Any], run_manager: Any = None) -> Dict[str, str]:
+        self.calls.append(inputs)
+        return {"text": self.respond(inputs)}
+
+
+class ListStore(VectorStore):
+    def __init__(self) -> None:
+        self.texts: List[str] = []
+
+    def add_texts(
+        self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **_: Any
+    ) -> List[str]:
+        self.texts += list(texts)
+        return []
+
+    def similarity_search(self, query: str, k: int = 4, **_: Any) -> List[Document]:
+        return []
+
+    @classmethod
+    def from_texts(cls, *args: Any, **kwargs: Any) -> "ListStore":
+        return cls()
+
+
+def make_baby_agi(**kwargs: Any) -> Any:
+    # Both tasks of the second batch must be running at once to get past this
+    both_running = threading.Barrier(2, timeout=5)
+
+    def execute(inputs: Dict[str, Any]) -> str:
+        if inputs["task"] != "Make a todo list":
+            both_running.wait()
+        return f"done {inputs['task']}"
+
+    def execution_chain() -> FakeChain:
+        return FakeChain(keys=["objective", "context", "task"], respond=execute)
+
+    creation = FakeChain(
+        keys=["result", "task_description", "incomplete_tasks", "objective"],
+        respond=lambda inputs: "search\ncompare",
+    )
+    prioritization = FakeChain(
+        keys=["task_names", "next_task_id", "objective"],
+        respond=lambda inputs: "\n".join(
+            f"{i}. {name}" for i, name in enumerate(inputs["task_names"].split(", "))
+        ),
+    )
+    return ConcurrentBabyAGI(  # type: ignore
+        task_creation_chain=creation,
+        task_prioritization_chain=prioritization,
+        execution_chain=execution_chain(),
+        extra_execution_chains=[execution_chain()],
+        vectorstore=ListStore(),
+        **kwargs,
+    )
+
+
+def test_batches_run_concurrently_and_count_tasks() -> None:
+    baby_agi = make_baby_agi(max_iterations=3, prioritize_every=2)
+    output = baby_agi({"objective": "find a venue"})
+    timings = output["task_timings"]
+    assert [t["task_name"] for t in timings[:1]] == ["Make a todo list"]
+    assert sorted((t["task_name"], t["session"]) for t in timings[1:]) == [
+        ("compare", 1),
+        ("search", 0),
+    ]
+    assert all(t["seconds"] >= 0 for t in timings)
+    # Three tasks in two batches, the list was prioritized after the second only
+    assert len(baby_agi.task_creation_chain.calls) == 2
+    assert len(baby_agi.task_prioritization_chain.calls) == 1
+    assert sorted(baby_agi.vectorstore.texts) == [
+        "done Make a todo list",
+        "done compare",
+        "done search",
+    ]
+
+
+def test_max_iterations_limits_the_last_batch() -> None:
+    baby_agi = make_baby_agi(max_iterations=1)
+    output = baby_agi({"objective": "find a venue"})
+    assert [t["task_name"] for t in output["task_timings"]] == ["Make a todo list"]
+    assert len(baby_agi.task_prioritization_chain.calls) == 1
+
+
+def test_lazy_chain_is_built_on_first_run() -> None:
+    built: List[FakeChain] = []
+
+    def factory() -> FakeChain:
+        built.append(FakeChain(keys=["task"], respond=lambda inputs: inputs["task"]))
+        return built[-1]
+
+    chain = LazyChain(factory=factory, inputs=["task"], outputs=["text"])
+    assert not built
+    assert chain.run(task="search") == "search"
+    assert chain.run(task="compare") == "compare"
+    assert len(built) == 1
@@ -0,0 +1,55 @@
+"""Tests for the site template detector."""
+import json
+from typing import Generator, List, Tuple
+
+from chromegpt.tools.boilerplate import SiteTemplates
+from tests.fake_driver import FakeDriver, make_selenium
+
+NAV = ["Home", "Products", "Accept cookies"]
+
+
+def test_blocks_repeated_on_other_pages_are_left_out() -> None:
+    templates = SiteTemplates()
+    first = "https://shop.com/a"
+    assert templates.filter(first, "buttons", json.dumps(NAV + ["Buy"])) == (
+        json.dumps(NAV + ["Buy"]),
+        0,
+    )
+    assert templates.filter(first, "text", "Welcome to Shop") == ("Welcome to Shop", 0)
+    # Scrolling the same page doesn't make anything a template
+    assert templates.filter(first + "#reviews", "buttons", json.dumps(NAV))[1] == 0
+
+    second = "https://www.shop.com/b"
+    kept, omitted = templates.filter(second, "buttons", json.dumps(NAV + ["Add"]))
+    assert json.loads(kept or "") == ["Add"] and omitted == 3
+    assert templates.filter(second, "text", "Welcome to Shop") == (None, 1)
+    assert templates.filter(second, "forms", '{"q": ""}') == ('{"q": ""}', 0)
+    # Other sites have their own template
+    assert templates.filter("https://other.com/", "buttons", json.dumps(NAV))[1] == 0
+    assert templates.omitted == 4 and templates.tokens_saved > 0
+
+    templates.reset()
+    assert templates.filter(second, "text", "Welcome to Shop")[1] == 0
+
+
+def test_description_lists_only_page_specific_content() -> None:
+    selenium = make_selenium(
+        FakeDriver("https://shop.com/a"), site_templates=SiteTemplates()
+    )
+    page: List[Tuple[str, str]] = []
+
+    def iter_description() -> Generator[Tuple[str, str], None, None]:
+        yield from page
+
+    selenium.iter_website_description = iter_description
+    page[:] = [("text", "Shoes"), ("buttons", json.dumps(NAV))]
+    assert "Accept cookies" in selenium._collect_website_description()
+
+    selenium.driver.current_url = "https://shop.com/b"
+    page[:] = [("text", "Hats"), ("buttons", json.dumps(NAV + ["Add to cart"]))]
+    description = selenium._collect_website_description()
+    assert "Accept cookies" not in description
+    assert '["Add to cart"]' in description and "Hats" in description
+    assert "3 texts, links and buttons repeated on every page of shop.com" in (
+        description
+    )
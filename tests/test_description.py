@@ -0,0 +1,27 @@
+"""Tests for building website descriptions within the observation budget."""
+import json
+from typing import Generator, List, Optional, Tuple
+
+from tests.fake_driver import make_selenium
+
+
+def test_long_text_leaves_budget_for_interactables() -> None:
+    selenium = make_selenium(observation_budget=100)
+    extracted: List[str] = []
+
+    def iter_description() -> Generator[Tuple[str, str], Optional[bool], None]:
+        for i in range(50):
+            extracted.append(f"paragraph {i}")
+            if (yield "text", f"paragraph {i} " + "lorem ipsum " * 5):
+                break
+        yield "links", json.dumps(["https://shop.com/cart"])
+        yield "buttons", json.dumps(["Add to cart"])
+        yield "forms", str(["Email"])
+
+    selenium.iter_website_description = iter_description
+    description = selenium._collect_website_description()
+    # The rest of the text is never extracted
+    assert 1 < len(extracted) < 50
+    assert '"Add to cart"' in description and "https://shop.com/cart" in description
+    assert "fill_form function: ['Email']" in description
+    assert description.endswith("(Description truncated, scroll to view the rest.)")
@@ -0,0 +1,201 @@
+"""Tests for the LLM gateway against a local fake OpenAI-compatible server."""
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator, List
+
+import openai
+import pytest
+from langchain.schema import HumanMessage
+
+from chromegpt.agent.gateway import (
+    GatewayChatOpenAI,
+    LLMGateway,
+    ModelLimits,
+    TokenBucket,
+    set_gateway,
+)
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    server: "FakeOpenAIServer"
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            rate_limited = server.requests <= server.rate_limit_first
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(0.05)
+        with server.lock:
+            server.in_flight -= 1
+        if rate_limited:
+            data = {"error": {"message": "Rate limit reached", "type": "requests"}}
+            self._send(429, data, {"Retry-After": "0.05"})
+            return
+        content = "echo: " + body["messages"][-1]["content"]
+        self._send(
+            200,
+            {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 5,
+                    "completion_tokens": 5,
+                    "total_tokens": 10,
+                },
+            },
+        )
+
+    def _send(self, status: int, data: Any, headers: Any = {}) -> None:
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, rate_limit_first: int = 0) -> None:
+        super().__init__(("127.0.0.1", 0), FakeOpenAIHandler)
+        self.lock = threading.Lock()
+        self.rate_limit_first = rate_limit_first
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+@pytest.fixture
+def fake_openai(monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeOpenAIServer]:
+    server = FakeOpenAIServer(rate_limit_first=2)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(
+        openai, "api_base", f"http://127.0.0.1:{server.server_address[1]}/v1"
+    )
+    yield server
+    set_gateway(None)
+    server.shutdown()
+    server.server_close()
+
+
+def test_gateway_limits_concurrency_and_retries(
+    fake_openai: FakeOpenAIServer,
+) -> None:
+    gateway = LLMGateway(
+        default_limits=ModelLimits(max_concurrency=2), min_backoff=0.01
+    )
+    set_gateway(gateway)
+    llm = GatewayChatOpenAI(openai_api_key="test", max_retries=0)  # type: ignore
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        outputs = list(
+            executor.map(
+                lambda i: llm([HumanMessage(content=f"task {i}")]).content, range(6)
+            )
+        )
+    assert outputs == [f"echo: task {i}" for i in range(6)]
+    assert fake_openai.max_in_flight <= 2
+    stats = gateway.stats()["gpt-3.5-turbo"]
+    assert stats["rate_limited"] == 2 and stats["retries"] == 2
+    assert stats["requests"] == 8 and stats["in_flight"] == 0
+    # every 429 halves the concurrency, it grows back with successes
+    assert 1 <= stats["concurrency"] <= 2
+
+
+def test_async_requests_go_through_the_gateway(
+    fake_openai: FakeOpenAIServer,
+) -> None:
+    gateway = LLMGateway(
+        default_limits=ModelLimits(max_concurrency=2), min_backoff=0.01
+    )
+    set_gateway(gateway)
+    llm = GatewayChatOpenAI(openai_api_key="test", max_retries=0)  # type: ignore
+
+    async def run() -> List[str]:
+        results = await asyncio.gather(
+            *(llm.agenerate([[HumanMessage(content=f"task {i}")]]) for i in range(6))
+        )
+        return [result.generations[0][0].text for result in results]
+
+    assert asyncio.run(run()) == [f"echo: task {i}" for i in range(6)]
+    assert fake_openai.max_in_flight <= 2
+    stats = gateway.stats()["gpt-3.5-turbo"]
+    assert stats["rate_limited"] == 2 and stats["requests"] == 8
+    assert stats["in_flight"] == 0
+
+
+def test_stream_holds_slot_until_done() -> None:
+    gateway = LLMGateway()
+    stream = gateway.call("m", lambda: iter(["a", "b"]))
+    assert gateway.stats()["m"]["in_flight"] == 1
+    assert list(stream) == ["a", "b"]
+    assert gateway.stats()["m"]["in_flight"] == 0
+    # a stream that is dropped before it is read gives its slot back too
+    stream = gateway.call("m", lambda: iter(["a"]))
+    del stream
+    assert gateway.stats()["m"]["in_flight"] == 0
+
+
+def test_token_bucket() -> None:
+    now = [0.0]
+    bucket = TokenBucket(60, clock=lambda: now[0])
+    assert bucket.wait_time(60) == 0
+    bucket.consume(60)
+    assert bucket.wait_time(30) == pytest.approx(30)
+    now[0] = 10.0
+    assert bucket.wait_time(30) == pytest.approx(20)
+    bucket.refund(20)
+    assert bucket.wait_time(30) == 0
+
+
+def test_priority_order() -> None:
+    gateway = LLMGateway(default_limits=ModelLimits(max_concurrency=1))
+    release = threading.Event()
+    order: List[str] = []
+
+    def request(name: str) -> Any:
+        if name == "first":
+            release.wait(5)
+        order.append(name)
+        return {}
+
+    threads = [
+        threading.Thread(target=gateway.call, args=("m", lambda: request("first")))
+    ]
+    threads[0].start()
+    while not gateway.stats().get("m", {}).get("in_flight"):
+        time.sleep(0.01)
+    for name, priority in [("background", 1), ("action", 0)]:
+        thread = threading.Thread(
+            target=gateway.call,
+            args=("m", lambda name=name: request(name)),
+            kwargs={"priority": priority},
+        )
+        thread.start()
+        threads.append(thread)
+        while gateway.stats()["m"]["queued"] < len(threads) - 1:
+            time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert order == ["first", "action", "background"]
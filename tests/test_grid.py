@@ -0,0 +1,143 @@
+"""Tests for the grid scheduler against local stand-in WebDriver endpoints."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator, List
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from chromegpt.tools.grid import GridScheduler
+from chromegpt.tools.selenium import SeleniumWrapper
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    server: "StandInEndpoint"
+
+    def do_GET(self) -> None:
+        payload = json.dumps({"value": {"ready": self.server.ready}}).encode()
+        self.send_response(200 if self.path.endswith("/status") else 404)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+class StandInEndpoint(ThreadingHTTPServer):
+    def __init__(self, ready: bool = True) -> None:
+        super().__init__(("127.0.0.1", 0), StatusHandler)
+        self.ready = ready
+        self.url = f"http://127.0.0.1:{self.server_address[1]}/wd/hub"
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+
+
+class FakeDriver:
+    def __init__(self, url: str, options: Any = None) -> None:
+        self.url = url
+        self.page = "about:blank"
+        self.alive = True
+        self.current_window_handle = "main"
+        self.window_handles = ["main"]
+        self.quit_called = False
+
+    @property
+    def current_url(self) -> str:
+        if not self.alive:
+            raise WebDriverException("invalid session id")
+        return self.page
+
+    def get(self, url: str) -> None:
+        if not self.alive:
+            raise WebDriverException("invalid session id")
+        self.page = url
+
+    def implicitly_wait(self, seconds: float) -> None:
+        pass
+
+    def close(self) -> None:
+        if not self.alive:
+            raise WebDriverException("invalid session id")
+
+    def quit(self) -> None:
+        self.quit_called = True
+        if not self.alive:
+            raise WebDriverException("invalid session id")
+
+
+def fake_driver(url: str, options: Any) -> Any:
+    return FakeDriver(url, options)
+
+
+@pytest.fixture
+def endpoints() -> Iterator[List[StandInEndpoint]]:
+    servers = [StandInEndpoint(), StandInEndpoint(), StandInEndpoint(ready=False)]
+    yield servers
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_routes_to_least_loaded_healthy_node(endpoints: List[StandInEndpoint]) -> None:
+    grid = GridScheduler(
+        [e.url for e in endpoints], capacity=2, driver_factory=fake_driver
+    )
+    urls = [grid.start_session(None)[1].url for _ in range(4)]  # type: ignore
+    # Spread over the two ready nodes, never the third
+    assert sorted(urls) == sorted([endpoints[0].url, endpoints[1].url] * 2)
+    with pytest.raises(WebDriverException):
+        grid.start_session(None)  # type: ignore
+    stats = grid.stats()
+    assert stats[endpoints[2].url]["healthy"] is False
+    assert stats[endpoints[0].url]["sessions"] == 2
+
+
+def test_falls_back_when_session_fails_to_start(
+    endpoints: List[StandInEndpoint],
+) -> None:
+    def factory(url: str, options: Any) -> Any:
+        if url == endpoints[0].url:
+            raise WebDriverException("node is gone")
+        return FakeDriver(url)
+
+    grid = GridScheduler([endpoints[0].url, endpoints[1].url], driver_factory=factory)
+    # The second session goes to the emptier node first, whichever that is
+    for _ in range(2):
+        driver, node = grid.start_session(None)  # type: ignore
+        assert node.url == endpoints[1].url
+    assert grid.stats()[endpoints[0].url]["failures"] == 1
+
+
+def test_dead_session_moves_to_another_node(endpoints: List[StandInEndpoint]) -> None:
+    grid = GridScheduler([e.url for e in endpoints[:2]], driver_factory=fake_driver)
+    selenium = SeleniumWrapper(grid=grid)
+    events: List[Any] = []
+    selenium.events.listeners.append(events.append)
+    first_node = selenium.grid_node
+    selenium.driver.get("https://example.com/cart")
+
+    def read_page() -> str:
+        return f"{selenium.driver.current_url} on {selenium.driver.url}"  # type: ignore
+
+    tool = selenium.with_failover(read_page)
+    assert tool().startswith("https://example.com/cart")
+    first_driver: Any = selenium.driver
+    first_driver.alive = False
+    output = tool()
+    assert first_driver.quit_called
+    second_node: Any = selenium.grid_node
+    assert second_node is not first_node
+    assert output == f"https://example.com/cart on {second_node.url}"
+    assert events[0]["type"] == "failover"
+
+
+def test_dead_session_releases_its_slot(endpoints: List[StandInEndpoint]) -> None:
+    grid = GridScheduler([endpoints[0].url], capacity=1, driver_factory=fake_driver)
+    selenium = SeleniumWrapper(grid=grid)
+    selenium.driver.alive = False  # type: ignore
+    with pytest.raises(WebDriverException):
+        selenium.__del__()
+    assert grid.stats()[endpoints[0].url]["sessions"] == 0
+    selenium.driver = None  # type: ignore
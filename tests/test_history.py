@@ -0,0 +1,86 @@
+"""Unit tests for the compact AutoGPT message history."""
+import os
+from pathlib import Path
+from typing import Any, List
+
+from langchain.docstore.document import Document
+from langchain.schema import AIMessage, HumanMessage, SystemMessage
+
+from chromegpt.agent.autogpt.history import MessageHistory, ObservationStore
+from chromegpt.agent.autogpt.prompt import AutoGPTPrompt
+
+
+def test_history_behaves_like_a_list() -> None:
+    history = MessageHistory()
+    history.append(HumanMessage(content="Determine which next command to use"))
+    history.append(AIMessage(content='{"command": {"name": "goto"}}'))
+    history.append(SystemMessage(content="Command goto returned: a page"))
+    assert len(history) == 3
+    assert isinstance(history[-1], SystemMessage)
+    assert history[-1].content == "Command goto returned: a page"
+    assert [type(m) for m in history[-2:]] == [AIMessage, SystemMessage]
+
+
+def test_observations_stored_once_and_spilled(tmp_path: Path) -> None:
+    store = ObservationStore(max_memory_bytes=200, spill_dir=str(tmp_path))
+    history = MessageHistory(store, digest_size=2, digest_chars=21)
+    pages = [f"Command goto returned: page {i} " + "x" * 500 for i in range(5)]
+    for page in pages + pages:
+        history.append(SystemMessage(content=page))
+    # each page is stored once, the old ones on disk
+    assert len(store._blobs) + len(store._spilled) == 5
+    assert len(os.listdir(tmp_path)) == len(store._spilled) > 0
+    assert store.memory_bytes <= 200 or len(store._blobs) == 1
+    assert [m.content for m in history] == pages + pages
+    # the digest only covers the last replies, cut short
+    assert history.digest() == "Command goto returned\nCommand goto returned"
+
+
+def test_temporary_spill_dir_removed() -> None:
+    store = ObservationStore(max_memory_bytes=10)
+    store.put("a" * 100)
+    store.put("b" * 100)
+    spill_dir = store.spill_dir
+    assert spill_dir and os.path.isdir(spill_dir)
+    assert store.get(store.put("a" * 100)) == "a" * 100
+    store.close()
+    assert not os.path.exists(spill_dir)
+
+
+def test_history_is_capped_and_releases_old_contents(tmp_path: Path) -> None:
+    store = ObservationStore(max_memory_bytes=200, spill_dir=str(tmp_path))
+    history = MessageHistory(store, max_messages=3)
+    pages = [f"Command goto returned: page {i} " + "x" * 500 for i in range(10)]
+    for page in pages:
+        history.append(HumanMessage(content="Determine which next command to use"))
+        history.append(SystemMessage(content=page))
+    assert len(history) == 3
+    assert [m.content for m in history[-2:]] == [
+        "Determine which next command to use",
+        pages[-1],
+    ]
+    # Only the retained messages' contents are stored, in memory or on disk
+    assert len(store._blobs) + len(store._spilled) == 3
+    assert len(os.listdir(tmp_path)) == len(store._spilled)
+
+
+def test_first_step_recalls_memory_by_goals() -> None:
+    queries: List[str] = []
+
+    class Memory:
+        def get_relevant_documents(self, query: str) -> List[Document]:
+            queries.append(query)
+            return []
+
+    prompt = AutoGPTPrompt(
+        ai_name="Tom",
+        ai_role="Assistant",
+        tools=[],
+        input_variables=["memory", "messages", "goals", "user_input"],
+        token_counter=len,
+    )
+    memory: Any = Memory()
+    prompt._format_memory_messages(
+        1000, memory=memory, messages=MessageHistory(), goals=["Buy a lamp"]
+    )
+    assert queries == ["Buy a lamp"]
@@ -0,0 +1,166 @@
+"""Unit tests for the per-site locator cache."""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from chromegpt.tools.locator_cache import LocatorCache
+from tests.fake_driver import FakeDriver as BaseFakeDriver
+from tests.fake_driver import make_selenium
+
+
+class FakeElement:
+    def __init__(self, selector: str, text: str) -> None:
+        self.selector = selector
+        self.text = text
+
+
+class FakeDriver(BaseFakeDriver):
+    """Page made of elements that are found by their exact selector."""
+
+    def __init__(self, url: str, elements: List[FakeElement]) -> None:
+        super().__init__(url)
+        self.elements: Dict[str, FakeElement] = {e.selector: e for e in elements}
+        self.lookups = 0
+        self.waits: List[float] = []
+
+    def implicitly_wait(self, seconds: float) -> None:
+        self.waits.append(seconds)
+
+    def find_elements(self, by: str, value: str) -> List[FakeElement]:
+        self.lookups += 1
+        return [self.elements[value]] if value in self.elements else []
+
+    def execute_script(self, script: str, element: Any) -> str:
+        return element.selector
+
+
+def found(element: Any) -> bool:
+    return True
+
+
+def moved(element: Any) -> bool:
+    return False
+
+
+def test_hit_after_record_and_persisted(tmp_path: Path) -> None:
+    button: Any = FakeElement("#buy", "Buy now")
+    driver: Any = FakeDriver("https://www.shop.com/item/1", [button])
+    cache = LocatorCache(str(tmp_path))
+    assert cache.lookup(driver, "button", "Buy now", check=found) is None
+    cache.record(driver, "button", "Buy now", button)
+    assert cache.lookup(driver, "button", " BUY  NOW ", check=found) is button
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 1,
+        "stale": 0,
+        "save_errors": 0,
+        "hit_rate": 0.5,
+    }
+
+    # another process picks up the locator for the same site
+    other = LocatorCache(str(tmp_path))
+    driver = FakeDriver("https://shop.com/item/2", [button])
+    assert other.lookup(driver, "button", "buy now", check=found) is button
+    assert driver.lookups == 1
+    # the lookup doesn't wait for a missing element, then restores the wait
+    assert driver.waits == [0, 5]
+
+
+def test_stale_locator_is_dropped(tmp_path: Path) -> None:
+    field: Any = FakeElement("form > input:nth-of-type(2)", "")
+    driver: Any = FakeDriver("https://shop.com/checkout", [field])
+    cache = LocatorCache(str(tmp_path))
+    cache.record(driver, "field", "email", field)
+    # the element at the locator no longer passes the check
+    assert cache.lookup(driver, "field", "email", check=moved) is None
+    assert cache.stats()["stale"] == 1
+    assert cache.lookup(driver, "field", "email", check=found) is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_evicts_least_recently_used(tmp_path: Path) -> None:
+    elements: Any = [FakeElement(f"#b{i}", str(i)) for i in range(3)]
+    driver: Any = FakeDriver("https://shop.com", elements)
+    cache = LocatorCache(str(tmp_path), max_entries=2)
+    for element in elements:
+        cache.record(driver, "button", element.text, element)
+    assert cache.lookup(driver, "button", "0", check=found) is None
+    assert cache.lookup(driver, "button", "2", check=found) is elements[2]
+
+
+def test_usage_is_persisted_for_eviction(tmp_path: Path) -> None:
+    elements: Any = [FakeElement(f"#b{i}", str(i)) for i in range(3)]
+    driver: Any = FakeDriver("https://shop.com", elements)
+    cache = LocatorCache(str(tmp_path), max_entries=2)
+    cache.record(driver, "button", "0", elements[0])
+    cache.record(driver, "button", "1", elements[1])
+    assert cache.lookup(driver, "button", "0", check=found) is elements[0]
+    cache.flush()
+    # the next run knows "0" was used last and evicts "1"
+    other = LocatorCache(str(tmp_path), max_entries=2)
+    other.record(driver, "button", "2", elements[2])
+    assert other.lookup(driver, "button", "1", check=found) is None
+    assert other.lookup(driver, "button", "0", check=found) is elements[0]
+
+
+def test_hits_are_written_in_batches(tmp_path: Path) -> None:
+    button: Any = FakeElement("#buy", "Buy now")
+    driver: Any = FakeDriver("https://shop.com", [button])
+    cache = LocatorCache(str(tmp_path), flush_every=3)
+    cache.record(driver, "button", "Buy now", button)
+    (path,) = tmp_path.iterdir()
+    saved = path.read_text()
+    for _ in range(2):
+        assert cache.lookup(driver, "button", "Buy now", check=found) is button
+    assert path.read_text() == saved
+    assert cache.lookup(driver, "button", "Buy now", check=found) is button
+    assert '"hits": 3' in path.read_text()
+    cache.lookup(driver, "button", "Buy now", check=found)
+    cache.flush()
+    assert '"hits": 4' in path.read_text()
+
+
+def test_unwritable_directory_is_ignored(tmp_path: Path) -> None:
+    not_a_dir = tmp_path / "file"
+    not_a_dir.write_text("")
+    button: Any = FakeElement("#buy", "Buy now")
+    driver: Any = FakeDriver("https://shop.com", [button])
+    cache = LocatorCache(str(not_a_dir), flush_every=1)
+    cache.record(driver, "button", "Buy now", button)
+    assert cache.lookup(driver, "button", "Buy now", check=found) is button
+    assert cache.stats()["save_errors"] == 2
+
+
+class FakeField(FakeElement):
+    def __init__(self, selector: str, names: List[Optional[str]]) -> None:
+        super().__init__(selector, "")
+        self.names = names
+
+    def is_displayed(self) -> bool:
+        return True
+
+    def is_enabled(self) -> bool:
+        return True
+
+    def find_elements(self, by: str, value: str) -> List[Any]:
+        return []
+
+
+class FormDriver(FakeDriver):
+    def execute_script(self, script: str, element: Any) -> Any:
+        if "el.labels" in script:
+            return element.names
+        return element.selector
+
+
+def test_cached_field_must_still_have_the_label(tmp_path: Path) -> None:
+    selector = "form > input:nth-of-type(1)"
+    email: Any = FakeField(selector, ["user_email", "", "", None, "E-mail"])
+    driver: Any = FormDriver("https://shop.com/signup", [email])
+    selenium = make_selenium(driver, locator_cache=LocatorCache(str(tmp_path)))
+    selenium.locator_cache.record(driver, "field", "e-mail", email)
+    assert selenium._find_form_element("E-mail") is email
+    # Same position on another page of the site is the phone number
+    phone: Any = FakeField(selector, ["phone", "phone", "Your phone", None])
+    selenium.driver = FormDriver("https://shop.com/contact", [phone])
+    assert selenium._find_form_element("E-mail") is None
+    assert selenium.locator_cache.stats()["stale"] == 1
@@ -0,0 +1,113 @@
+"""Unit tests for running several agent actions per turn."""
+import threading
+import time
+from typing import Any, List
+
+from langchain.agents.chat.base import ChatAgent
+from langchain.llms.fake import FakeListLLM
+
+from chromegpt.agent.parallel import (
+    PARALLEL_FORMAT_INSTRUCTIONS,
+    MultiActionOutputParser,
+    ParallelAgentExecutor,
+)
+from chromegpt.agent.utils import get_agent_tools
+from chromegpt.tools.events import ToolEvents
+from chromegpt.tools.pool import SeleniumPool
+
+
+class FakeSelenium:
+    """Stand-in for SeleniumWrapper that records which thread loaded a page."""
+
+    def __init__(self, name: str, visits: List[Any]) -> None:
+        self.name = name
+        self.visits = visits
+        self.events = ToolEvents()
+
+    def describe_website(self, url: str) -> str:
+        started = time.monotonic()
+        time.sleep(0.2)
+        self.visits.append(
+            (self.name, url, threading.get_ident(), started, time.monotonic())
+        )
+        return f"{self.name} shows {url}"
+
+    def with_failover(self, func: Any) -> Any:
+        return func
+
+    def __getattr__(self, attr: str) -> Any:
+        return lambda *args, **kwargs: f"{self.name} {attr}"
+
+
+def test_parse_action_list() -> None:
+    """Test that a list of actions is parsed into several actions"""
+    text = (
+        "Thought: compare\nAction:\n```\n"
+        '[{"action": "goto", "action_input": "https://a.com"},'
+        ' {"action": "goto", "action_input": "https://b.com"}]\n```'
+    )
+    actions = MultiActionOutputParser().parse(text)
+    assert isinstance(actions, list)
+    assert [action.tool_input for action in actions] == [
+        "https://a.com",
+        "https://b.com",
+    ]
+    assert actions[0].log == text and "https://b.com" in actions[1].log
+
+
+def test_parallel_gotos_use_pooled_sessions() -> None:
+    """Test that independent actions run concurrently on separate browsers"""
+    visits: List[Any] = []
+    main = FakeSelenium("main", visits)
+    pool = SeleniumPool(
+        lambda: FakeSelenium(f"pooled-{len(visits)}", visits), size=2  # type: ignore
+    )
+    tools = get_agent_tools(main)  # type: ignore
+    llm = FakeListLLM(
+        responses=[
+            (
+                "Action:\n```\n"
+                '[{"action": "goto", "action_input": "https://a.com"},'
+                ' {"action": "goto", "action_input": "https://b.com"},'
+                ' {"action": "scroll", "action_input": "down"}]\n```'
+            ),
+            "Final Answer: done",
+        ]
+    )
+    agent = ChatAgent.from_llm_and_tools(
+        llm,
+        tools,
+        output_parser=MultiActionOutputParser(),
+        format_instructions=PARALLEL_FORMAT_INSTRUCTIONS,
+    )
+    executor = ParallelAgentExecutor.from_agent_and_tools(
+        agent=agent, tools=tools, pool=pool, return_intermediate_steps=True
+    )
+    result = executor({"input": "compare a and b"})
+    observations = [observation for _, observation in result["intermediate_steps"]]
+    assert observations[0] == "main shows https://a.com"
+    assert "separate browser" in observations[1] and "https://b.com" in observations[1]
+    assert observations[2] == "main scroll"
+    assert len({thread for _, _, thread, _, _ in visits}) == 2
+    # The two page loads overlapped
+    assert max(start for *_, start, _ in visits) < min(end for *_, end in visits)
+
+
+def test_unparsable_output_is_sent_back_to_the_agent() -> None:
+    main = FakeSelenium("main", [])
+    tools = get_agent_tools(main)  # type: ignore
+    llm = FakeListLLM(responses=["I should look at a.com", "Final Answer: done"])
+    agent = ChatAgent.from_llm_and_tools(
+        llm, tools, output_parser=MultiActionOutputParser()
+    )
+    executor = ParallelAgentExecutor.from_agent_and_tools(
+        agent=agent,
+        tools=tools,
+        pool=SeleniumPool(lambda: main, size=0),  # type: ignore
+        handle_parsing_errors=True,
+        return_intermediate_steps=True,
+    )
+    result = executor({"input": "open a"})
+    assert result["output"] == "done"
+    action, observation = result["intermediate_steps"][0]
+    assert action.tool == "_Exception" and "I should look at a.com" in action.log
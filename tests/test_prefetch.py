@@ -0,0 +1,77 @@
+"""Tests for loading search results in background tabs."""
+from typing import Any, List
+
+from chromegpt.tools.prefetch import SearchResultPrefetcher
+from chromegpt.tools.tabs import TabManager
+from tests.fake_driver import TabbedDriver
+from tests.fake_driver import make_selenium as make_wrapper
+
+LINKS = ["https://a.com/", "https://b.com", "https://c.com", "/relative"]
+
+
+def make_selenium(top_k: int = 2) -> Any:
+    driver: Any = TabbedDriver("https://google.com/search?q=x")
+    selenium = make_wrapper(
+        driver,
+        tabs=TabManager(driver),
+        prefetcher=SearchResultPrefetcher(top_k=top_k),
+    )
+    described: List[str] = []
+
+    def describe() -> str:
+        described.append(selenium.driver.current_url)
+        return f"Website: {selenium.driver.current_url}"
+
+    selenium._collect_website_description = describe
+    selenium.described = described
+    return selenium
+
+
+def test_prefetch_opens_tabs_without_waiting() -> None:
+    selenium = make_selenium()
+    selenium.prefetcher.prefetch(selenium.driver, LINKS)
+    driver = selenium.driver
+    assert list(driver.urls.values()) == [
+        "https://google.com/search?q=x",
+        "https://a.com/",
+        "https://b.com",
+    ]
+    # Nothing is described up front and the search tab keeps the focus
+    assert selenium.described == [] and driver.current_window_handle == "w0"
+
+
+def test_goto_prefetched_link_uses_its_tab() -> None:
+    selenium = make_selenium()
+    selenium.prefetcher.prefetch(selenium.driver, LINKS)
+    assert selenium.describe_website("https://a.com") == "Website: https://a.com/"
+    driver = selenium.driver
+    # The other prefetched tab and the search tab are closed, nothing was reloaded
+    assert driver.urls == {"w1": "https://a.com/"} and driver.loaded == []
+    assert selenium.prefetcher.pages == {}
+    selenium._switch_to_working_tab()
+    assert selenium.tabs.tabs == {"main": "w1"}
+
+
+def test_goto_other_link_discards_prefetched_tabs() -> None:
+    selenium = make_selenium()
+    selenium.prefetcher.prefetch(selenium.driver, LINKS)
+    selenium.prefetcher.ttl = -1  # expired tabs are not used either
+    assert not selenium.prefetcher.take(selenium.driver, "https://a.com")
+    selenium.prefetcher.ttl = 120
+    selenium._switch_to_working_tab()
+    driver = selenium.driver
+    assert driver.urls == {"w0": "https://google.com/search?q=x"}
+    assert driver.current_window_handle == "w0"
+    assert selenium.prefetcher.pages == {} and selenium.tabs.tabs == {"main": "w0"}
+    assert not selenium.prefetcher.take(driver, "https://b.com")
+
+
+def test_switch_to_working_tab_returns_to_active_tab() -> None:
+    selenium = make_selenium()
+    name = selenium.tabs.open("https://shop.com")
+    selenium.tabs.switch(name)
+    selenium.prefetcher.prefetch(selenium.driver, LINKS)
+    selenium.driver.switch_to.window("w0")
+    selenium._switch_to_working_tab()
+    assert selenium.driver.current_url == "https://shop.com"
+    assert set(selenium.driver.urls) == {"w0", "w1"}
@@ -0,0 +1,119 @@
+"""Tests for repairing malformed LLM actions and JSON."""
+import pytest
+from langchain.agents import Tool
+from langchain.schema import AgentAction, OutputParserException
+
+from chromegpt.agent.parallel import MultiActionOutputParser
+from chromegpt.agent.repair import (
+    ActionRepairer,
+    RepairingAutoGPTOutputParser,
+    RepairingChatOutputParser,
+)
+from chromegpt.tools.json_repair import loads_tolerant, retries_saved
+from chromegpt.tools.selenium import (
+    ClickButtonInput,
+    DescribeWebsiteInput,
+    FillOutFormInput,
+    ScrollInput,
+)
+
+
+def noop(*args: str, **kwargs: str) -> str:
+    return ""
+
+
+TOOLS = [
+    Tool(name="goto", func=noop, description="", args_schema=DescribeWebsiteInput),
+    Tool(name="click", func=noop, description="", args_schema=ClickButtonInput),
+    Tool(name="fill_form", func=noop, description="", args_schema=FillOutFormInput),
+    Tool(name="scroll", func=noop, description="", args_schema=ScrollInput),
+]
+
+
+FENCED = '```json\n{"action": "goto", "action_input": "x"}\n```'
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("{'name': 'a', 'last': \"O'Brien\"}", {"name": "a", "last": "O'Brien"}),
+        ('{"a": 1} and some trailing text }', {"a": 1}),
+        ('{"a": {"b": [1, 2,', {"a": {"b": [1, 2]}}),
+        (FENCED, {"action": "goto", "action_input": "x"}),
+        ('{"done": True, "error": None,}', {"done": True, "error": None}),
+        ("{'msg': 'it\\'s'}", {"msg": "it's"}),
+        ('{"path": "C:\\dir"}', {"path": "C:\\dir"}),
+    ],
+)
+def test_loads_tolerant(text: str, expected: object) -> None:
+    assert loads_tolerant(text) == expected
+
+
+def test_loads_tolerant_gives_up_without_json() -> None:
+    with pytest.raises(ValueError):
+        loads_tolerant("I will click the login button")
+
+
+def test_repairer_matches_tools_and_arguments() -> None:
+    repairer = ActionRepairer(TOOLS)
+    assert repairer.fix("Go To", {"url": "https://a.com"})[:2] == (
+        "goto",
+        {"url": "https://a.com"},
+    )
+    assert repairer.fix("goto", {"link": "https://a.com"})[:2] == (
+        "goto",
+        {"url": "https://a.com"},
+    )
+    assert repairer.fix("scroll", {"dir": "up"})[:2] == ("scroll", {"direction": "up"})
+    # Form fields are passed through, they are not tool arguments
+    assert repairer.fix("fill_form", {"email": "a@b.com"}) == (
+        "fill_form",
+        {"email": "a@b.com"},
+        False,
+    )
+    assert repairer.fix("previous_page", "")[0] == "previous_page"
+
+
+def test_chat_parser_repairs_and_counts() -> None:
+    parser = RepairingChatOutputParser(repairer=ActionRepairer(TOOLS))
+    before = retries_saved().get("chat", 0)
+    valid = 'Action:\n```\n{"action": "goto", "action_input": "https://a.com"}\n```'
+    assert parser.parse(valid) == AgentAction("goto", "https://a.com", valid)
+    assert retries_saved().get("chat", 0) == before
+
+    broken = (
+        "Thought: login\nAction:\n```json\n{'action': 'Click', 'action_input': 'Log in'"
+    )
+    action = parser.parse(broken)
+    assert isinstance(action, AgentAction)
+    assert (action.tool, action.tool_input) == ("click", "Log in")
+    assert retries_saved()["chat"] == before + 1
+
+    with pytest.raises(OutputParserException):
+        parser.parse("I should click the login button")
+
+
+def test_multi_action_parser_repairs_lists() -> None:
+    parser = MultiActionOutputParser(repairer=ActionRepairer(TOOLS))
+    actions = parser.parse(
+        "Action:\n```\n[{'action': 'goto', 'action_input': 'https://a.com'},"
+        " {'action': 'goto', 'action_input': 'https://b.com'},]\n```"
+    )
+    assert isinstance(actions, list)
+    assert [action.tool_input for action in actions] == [
+        "https://a.com",
+        "https://b.com",
+    ]
+
+
+def test_autogpt_parser_repairs_command() -> None:
+    parser = RepairingAutoGPTOutputParser(
+        repairer=ActionRepairer(TOOLS, extra_names=["finish"])
+    )
+    action = parser.parse(
+        "Here is my response:\n{'thoughts': {'text': 'search'},"
+        " 'command': {'name': 'Goto', 'args': {'link': 'https://a.com'}}}"
+    )
+    assert (action.name, action.args) == ("goto", {"url": "https://a.com"})
+    assert parser.parse('{"command": {"name": "finish", "args": {}}}').name == "finish"
+    assert parser.parse("no json at all").name == "ERROR"
@@ -0,0 +1,142 @@
+"""Tests for routing agent steps to model tiers."""
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import pytest
+from langchain.chat_models.base import BaseChatModel
+from langchain.schema import (
+    AIMessage,
+    BaseMessage,
+    ChatGeneration,
+    ChatResult,
+    HumanMessage,
+    SystemMessage,
+)
+
+from chromegpt.agent.routing import (
+    STEP_EXTRACTION,
+    STEP_FORM,
+    STEP_NAVIGATION,
+    STEP_PLANNING,
+    ModelRouter,
+    RoutedChatModel,
+    classify_step,
+    escalation_reason,
+)
+from chromegpt.main import get_model_router
+
+SYSTEM = SystemMessage(content="Tools: goto, click, google_search, find_form, scroll")
+
+GOTO = 'Action:\n```\n{"action": "goto", "action_input": "https://example.com"}\n```'
+
+
+def step(action: str, observation: str) -> List[BaseMessage]:
+    scratchpad = (
+        f'Thought: next\nAction:\n```\n{{"action": "{action}", "action_input":'
+        f' "x"}}\n```\nObservation: {observation}\nThought:'
+    )
+    return [SYSTEM, HumanMessage(content=f"Question: task\n\n{scratchpad}")]
+
+
+class ScriptedChatModel(BaseChatModel):
+    replies: List[str]
+    calls: int = 0
+
+    def _generate(
+        self, messages: List[BaseMessage], stop: Any = None, run_manager: Any = None
+    ) -> ChatResult:
+        reply = self.replies[min(self.calls, len(self.replies) - 1)]
+        self.calls += 1
+        generation = ChatGeneration(message=AIMessage(content=reply))  # type: ignore
+        return ChatResult(generations=[generation])
+
+    async def _agenerate(
+        self, messages: List[BaseMessage], stop: Any = None, run_manager: Any = None
+    ) -> ChatResult:
+        return self._generate(messages, stop=stop, run_manager=run_manager)
+
+
+def scripted(replies: Dict[str, List[str]]) -> Any:
+    def factory(model: str) -> ScriptedChatModel:
+        return ScriptedChatModel(replies=replies[model])
+
+    return factory
+
+
+def test_classify_step() -> None:
+    assert classify_step([SYSTEM, HumanMessage(content="Question: task")]) == (
+        STEP_PLANNING
+    )
+    assert classify_step(step("google_search", "1. result")) == STEP_NAVIGATION
+    assert classify_step(step("find_form", '{"email": ""}')) == STEP_FORM
+    assert classify_step(step("goto", "Website: example")) == STEP_EXTRACTION
+    assert classify_step(step("goto", "Cannot load website x.")) == STEP_PLANNING
+    autogpt = [
+        SYSTEM,
+        AIMessage(content='{"command": {"name": "scroll", "args": {}}}'),
+        SystemMessage(content="Command scroll returned: more text"),
+    ]
+    assert classify_step(autogpt) == STEP_NAVIGATION
+
+
+def test_escalation_reason() -> None:
+    messages = step("goto", "page")
+    assert escalation_reason(GOTO, messages) is None
+    assert escalation_reason("Final Answer: 42", messages) is None
+    assert escalation_reason("I will click the first link", messages) == "parse failure"
+    unknown = GOTO.replace('"goto"', '"previous_page"')
+    assert escalation_reason(unknown, messages) == "unknown action previous_page"
+    hedged = "Thought: I'm not sure which link is right\n" + GOTO
+    assert escalation_reason(hedged, messages) == "low confidence"
+    assert escalation_reason("Action: scroll\nAction Input: down", messages) is None
+
+
+def test_router_escalates_and_reports_per_tier() -> None:
+    router = ModelRouter(
+        ["gpt-3.5-turbo", "gpt-4"],
+        llm_factory=scripted(
+            {"gpt-3.5-turbo": [GOTO, "no idea what to do"], "gpt-4": [GOTO]}
+        ),
+    )
+    llm = RoutedChatModel(router=router)
+    # Navigation goes to the fast tier and its output is kept
+    assert llm(step("google_search", "results")).content == GOTO
+    # Extraction output that doesn't parse is retried on gpt-4
+    assert llm(step("goto", "page")).content == GOTO
+    # Planning starts on gpt-4
+    llm([SYSTEM, HumanMessage(content="Question: task")])
+    stats = router.stats()
+    fast, strong = stats["gpt-3.5-turbo"], stats["gpt-4"]
+    assert fast["calls"] == 2 and fast["escalations"] == 1
+    assert strong["calls"] == 2 and strong["escalations"] == 0
+    assert fast["steps"][STEP_NAVIGATION] == 1
+    assert strong["steps"][STEP_PLANNING] == 1
+    assert strong["latency_seconds"]["p50"] is not None
+    assert 0 < fast["cost"] < strong["cost"]
+
+
+def test_router_escalates_async_calls() -> None:
+    router = ModelRouter(
+        ["gpt-3.5-turbo", "gpt-4"],
+        llm_factory=scripted({"gpt-3.5-turbo": ["no idea"], "gpt-4": [GOTO]}),
+    )
+    llm = RoutedChatModel(router=router)
+    result = asyncio.run(llm.agenerate([step("goto", "page")]))
+    assert result.generations[0][0].text == GOTO
+    stats = router.stats()
+    assert stats["gpt-3.5-turbo"]["escalations"] == 1
+    assert stats["gpt-4"]["calls"] == 1
+
+
+def test_get_model_router(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    assert get_model_router("gpt-4", None) is None
+    router: Optional[ModelRouter] = get_model_router(
+        "gpt-4", "gpt-3.5-turbo", "navigation"
+    )
+    assert router is not None
+    assert router.tiers == ["gpt-3.5-turbo", "gpt-4"]
+    assert router.routes[STEP_NAVIGATION] == 0
+    assert router.routes[STEP_EXTRACTION] == 1
+    with pytest.raises(ValueError):
+        get_model_router("gpt-4", "gpt-3.5-turbo", "navigation,shopping")
@@ -0,0 +1,49 @@
+"""Unit tests for the rolling scratchpad."""
+from typing import List, Tuple
+
+from langchain.schema import AgentAction
+
+from chromegpt.agent.scratchpad import ScratchpadManager
+
+
+class FakeAgent:
+    """Agent stub that renders the scratchpad like a ReAct agent."""
+
+    _stop = ["Observation:"]
+
+    def _construct_scratchpad(self, steps: List[Tuple[AgentAction, str]]) -> str:
+        return "".join(f"{a.log}\nObservation: {o}\n" for a, o in steps)
+
+
+def _step(i: int, observation: str = "page") -> Tuple[AgentAction, str]:
+    return AgentAction("goto", f"https://{i}.com", f"goto {i}"), f"{observation} {i}"
+
+
+def test_old_steps_are_summarized_once() -> None:
+    """Test that each step leaving the window is summarized exactly once"""
+    summarized: List[str] = []
+
+    class RecordingScratchpad(ScratchpadManager):
+        def _summarize(self, step: Tuple[AgentAction, str]) -> str:
+            summarized.append(step[1])
+            return super()._summarize(step)
+
+    scratchpad = RecordingScratchpad(window=2)
+    steps: List[Tuple[AgentAction, str]] = []
+    for i in range(5):
+        steps.append(_step(i))
+        inputs = scratchpad.get_full_inputs(FakeAgent(), steps, input="task")
+    assert summarized == ["page 0", "page 1", "page 2"]
+    assert "goto(https://0.com)" in inputs["agent_scratchpad"]
+    assert "goto 4" in inputs["agent_scratchpad"]
+    assert "goto 2\n" not in inputs["agent_scratchpad"]
+    assert inputs["input"] == "task"
+
+
+def test_token_budget_shrinks_window() -> None:
+    """Test that large observations are moved to the summary early"""
+    scratchpad = ScratchpadManager(window=4, token_budget=300)
+    steps = [_step(i, "x" * 1000) for i in range(3)]
+    inputs = scratchpad.get_full_inputs(FakeAgent(), steps)
+    assert scratchpad.summarized_steps == 2
+    assert inputs["agent_scratchpad"].count("Observation:") == 1
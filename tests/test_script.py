@@ -0,0 +1,90 @@
+"""Tests for the run_script tool."""
+from typing import Any, List
+
+import pytest
+
+from chromegpt.agent.trajectory import is_error_observation
+from chromegpt.agent.utils import get_agent_tools
+from chromegpt.tools.selenium import parse_script
+from tests.fake_driver import make_selenium
+
+
+def test_parse_script_accepts_tool_style_steps() -> None:
+    script = parse_script(
+        "[{'action': 'Goto', 'action_input': 'https://a.com'},"
+        " {'action': 'fill_form', 'input': {'email': 'a@b.com'}},"
+        " {'action': 'scroll', 'input': 'sideways'},]"
+    )
+    assert [str(step) for step in script] == [
+        "goto https://a.com",
+        'fill_form {"email": "a@b.com"}',
+        "scroll down",
+    ]
+    assert parse_script({"steps": [{"action": "click", "input": "Go"}]})  # type: ignore
+
+
+@pytest.mark.parametrize(
+    "steps, message",
+    [
+        ([{"action": "hover", "input": "Menu"}], "step 1: action must be one of"),
+        ([{"action": "goto", "input": "a.com"}], "step 1: goto needs a full url"),
+        ([{"action": "click", "input": "Go"}, "click"], "step 2 is not an object"),
+        ([{"action": "click", "input": "Go"}] * 9, "at most 8 steps"),
+        ([], "non-empty list"),
+    ],
+)
+def test_parse_script_rejects_bad_steps(steps: Any, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        parse_script(steps)
+
+
+def test_run_script_stops_at_first_failure() -> None:
+    selenium = make_selenium()
+    clicked: List[str] = []
+
+    def click(text: str) -> str:
+        clicked.append(text)
+        if text == "Missing":
+            return "No interactable buttons found in the website. Try another button."
+        return f"Clicked interactable element and the website changed. Now {text}"
+
+    selenium.click_button_by_text = click
+    selenium._collect_website_description = lambda: "Website: shop.com"
+    result = selenium.run_script(
+        [
+            {"action": "click", "input": "Shoes"},
+            {"action": "click", "input": "Missing"},
+            {"action": "click", "input": "Buy"},
+        ]
+    )
+    assert clicked == ["Shoes", "Missing"]
+    assert is_error_observation(result)
+    assert result.splitlines() == [
+        "Error running script, step 2 failed. Script steps:",
+        "1. click Shoes: Clicked interactable element and the website changed",
+        "2. click Missing: FAILED No interactable buttons found in the website",
+        "3. click Buy: skipped",
+        "Now Website: shop.com",
+    ]
+    assert selenium.run_script("click the buy button").startswith("Cannot run script")
+
+
+@pytest.mark.parametrize(
+    "tool_input",
+    [
+        [{"action": "scroll", "input": "up"}],
+        {"steps": [{"action": "scroll", "input": "up"}]},
+        '{"steps": [{"action": "scroll", "input": "up"}]}',
+        '[{"action": "scroll", "input": "up"}]',
+    ],
+)
+def test_run_script_tool_accepts_lists_and_objects(tool_input: Any) -> None:
+    selenium = make_selenium()
+    scrolled: List[str] = []
+    selenium._scroll_window = scrolled.append
+    selenium._collect_website_description = lambda: "Website: shop.com"
+    tool = next(t for t in get_agent_tools(selenium) if t.name == "run_script")
+    result = tool.run(tool_input)
+    assert scrolled == ["up"]
+    assert result.startswith("Script steps:\n1. scroll up: Scrolled up")
+    assert not is_error_observation(result)
@@ -0,0 +1,111 @@
+"""Unit tests for the task server, using a fake worker instead of a browser."""
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Any, List
+
+import pytest
+
+from chromegpt.server import Task, TaskHTTPServer, TaskServer
+from chromegpt.tools.events import ToolEvents
+
+
+class FakeWorker:
+    """Worker whose single tool waits until ``release`` is set."""
+
+    def __init__(self) -> None:
+        self.events = ToolEvents()
+        self.release = threading.Event()
+        self.tool = self.events.wrap("goto", self._goto)
+        self.runs: List[str] = []
+
+    def _goto(self, url: str) -> str:
+        self.release.wait(5)
+        return f"visited {url}"
+
+    def run(self, task: Task) -> Any:
+        self.events.cancelled = task.cancelled
+        self.events.listeners = [task.add_event]
+        self.runs.append(task.task)
+        self.tool(task.task)
+        return self.tool(task.task + "/next")
+
+
+def wait_done(task: Task) -> None:
+    for _ in task.iter_events(timeout=0.1):
+        pass
+
+
+def test_task_runs_and_streams_events() -> None:
+    worker = FakeWorker()
+    worker.release.set()
+    server = TaskServer(lambda: worker)
+    task = server.submit("https://example.com")
+    wait_done(task)
+    assert task.status == "succeeded"
+    assert task.result == "visited https://example.com/next"
+    types = [event["type"] for event in task.events]
+    assert types == ["status", "status"] + ["action", "observation"] * 2 + ["status"]
+    stats = server.stats()
+    assert stats["completed"] == 1 and stats["queue_depth"] == 0
+    assert stats["run_seconds"]["p50"] is not None
+    server.shutdown()
+
+
+def test_only_recent_finished_tasks_are_kept() -> None:
+    worker = FakeWorker()
+    worker.release.set()
+    server = TaskServer(lambda: worker, history=2)
+    tasks = [server.submit(f"https://{name}.com") for name in "abc"]
+    wait_done(tasks[-1])
+    server.shutdown()
+    assert list(server.tasks) == [task.id for task in tasks[1:]]
+    assert server.get(tasks[0].id) is None
+
+
+def test_cancel_running_and_queued_tasks() -> None:
+    worker = FakeWorker()
+    server = TaskServer(lambda: worker)
+    running = server.submit("https://a.com")
+    queued = server.submit("https://b.com")
+    while running.status != "running":
+        time.sleep(0.01)
+    server.cancel(queued.id)
+    server.cancel(running.id)
+    worker.release.set()
+    wait_done(running)
+    assert running.status == "cancelled"
+    assert queued.status == "cancelled"
+    # the running task stopped before its second tool call
+    assert [e["tool"] for e in running.events if e["type"] == "action"] == ["goto"]
+    server.shutdown()
+    assert worker.runs == ["https://a.com"]
+
+
+def test_http_api() -> None:
+    worker = FakeWorker()
+    worker.release.set()
+    httpd = TaskHTTPServer(("127.0.0.1", 0), TaskServer(lambda: worker))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    request = urllib.request.Request(
+        f"{url}/tasks",
+        data=json.dumps({"task": "https://example.com"}).encode(),
+        method="POST",
+    )
+    task = json.load(urllib.request.urlopen(request))
+    with urllib.request.urlopen(f"{url}/tasks/{task['id']}/events") as response:
+        events = [json.loads(line) for line in response]
+    assert events[-1] == {**events[-1], "type": "status", "status": "succeeded"}
+    task = json.load(urllib.request.urlopen(f"{url}/tasks/{task['id']}"))
+    assert task["result"] == "visited https://example.com/next"
+    assert json.load(urllib.request.urlopen(f"{url}/stats"))["completed"] == 1
+    for body in (b"[]", b'"x"', b"{}", b"not json"):
+        request = urllib.request.Request(f"{url}/tasks", data=body, method="POST")
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request)
+        assert error.value.code == 400  # type: ignore
+    httpd.shutdown()
+    httpd.server_close()
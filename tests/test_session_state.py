@@ -0,0 +1,120 @@
+"""Unit tests for the persisted session state store."""
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from chromegpt.tools.session_state import SessionStateStore, domain_from_url
+
+
+class FakeDriver:
+    """Minimal stand-in for the WebDriver calls used by the store."""
+
+    def __init__(self, url: str) -> None:
+        self.current_url = url
+        self.cookies: List[Dict[str, Any]] = []
+        self.storage: Dict[str, Dict[str, str]] = {
+            "localStorage": {},
+            "sessionStorage": {},
+        }
+
+    def get_cookies(self) -> List[Dict[str, Any]]:
+        return list(self.cookies)
+
+    def add_cookie(self, cookie: Dict[str, Any]) -> None:
+        self.cookies.append(cookie)
+
+    def execute_script(self, script: str, *args: Any) -> Any:
+        if args:
+            for area in ("localStorage", "sessionStorage"):
+                self.storage[area].update(args[0].get(area, {}))
+            return None
+        return self.storage
+
+
+def test_domain_from_url() -> None:
+    """Test that www. prefixes and paths are dropped"""
+    assert domain_from_url("https://www.example.com/a?b=c") == "example.com"
+    assert domain_from_url("not a url") == ""
+
+
+def test_snapshot_and_restore(tmp_path: Path) -> None:
+    """Test that cookies and storage carry over to a new session"""
+    driver = FakeDriver("https://www.example.com/login")
+    driver.cookies.append({"name": "session", "value": "abc"})
+    driver.storage["localStorage"]["consent"] = "yes"
+    SessionStateStore(str(tmp_path)).snapshot(driver)  # type: ignore
+
+    new_driver = FakeDriver("https://example.com/")
+    store = SessionStateStore(str(tmp_path))
+    assert store.restore(new_driver)  # type: ignore
+    assert new_driver.cookies == [{"name": "session", "value": "abc"}]
+    assert new_driver.storage["localStorage"] == {"consent": "yes"}
+    # State is only applied once per domain
+    assert not store.restore(new_driver)  # type: ignore
+
+
+def test_tenant_isolation(tmp_path: Path) -> None:
+    """Test that tenants do not share state"""
+    SessionStateStore(str(tmp_path), tenant="a").save("example.com", {"cookies": []})
+    assert SessionStateStore(str(tmp_path), tenant="a").load("example.com")
+    assert SessionStateStore(str(tmp_path), tenant="b").load("example.com") is None
+    assert SessionStateStore(str(tmp_path), tenant="../a").load("example.com") is None
+    SessionStateStore(str(tmp_path), tenant="a/b").save("example.com", {"cookies": []})
+    assert SessionStateStore(str(tmp_path), tenant="a_b").load("example.com") is None
+
+
+def test_concurrent_saves_of_one_domain(tmp_path: Path) -> None:
+    stores = [SessionStateStore(str(tmp_path)) for _ in range(4)]
+
+    def save(store: SessionStateStore) -> None:
+        for i in range(50):
+            store.save("example.com", {"cookies": [{"name": "n", "value": str(i)}]})
+            store._saved_digests.clear()
+
+    threads = [threading.Thread(target=save, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stores[0].load("example.com")
+    assert os.listdir(stores[0].directory) == ["example.com.json"]
+
+
+def test_save_failure_is_not_raised(tmp_path: Path) -> None:
+    (tmp_path / "file").write_text("")
+    store = SessionStateStore(str(tmp_path / "file"))
+    store.save("example.com", {"cookies": []})
+    assert store.load("example.com") is None
+
+
+def test_expired_state_is_dropped(tmp_path: Path) -> None:
+    """Test that state older than the ttl is ignored and removed"""
+    store = SessionStateStore(str(tmp_path), ttl=60)
+    store.save("example.com", {"cookies": []})
+    path = store._path("example.com")
+    assert store.load("example.com")
+    store.ttl = -1
+    time.sleep(0.01)
+    assert store.load("example.com") is None
+    assert not os.path.exists(path)
+
+
+def test_unreadable_state_is_ignored(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that bad state files and failed removals don't raise"""
+    store = SessionStateStore(str(tmp_path), ttl=-1)
+    store.save("example.com", {"cookies": []})
+
+    def remove(path: str) -> None:
+        raise PermissionError(path)
+
+    monkeypatch.setattr(os, "remove", remove)
+    assert store.load("example.com") is None
+    with open(store._path("example.com"), "w") as f:
+        f.write("[1, 2]")
+    assert store.load("example.com") is None
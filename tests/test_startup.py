@@ -0,0 +1,84 @@
+"""Tests for lazy agent loading and the cold-start benchmark."""
+from typing import Any, List, Optional
+
+import pytest
+from langchain.docstore.document import Document
+from langchain.vectorstores.base import VectorStore
+
+from chromegpt.agent.registry import AGENT_REGISTRY, get_agent_class
+from chromegpt.agent.utils import LazyVectorStore
+from chromegpt.startup_benchmark import parse_importtime
+
+
+def test_registry_imports_agent_on_demand() -> None:
+    from chromegpt.agent.zeroshot import ZeroShotAgent
+
+    assert set(AGENT_REGISTRY) == {"auto-gpt", "baby-agi", "zero-shot"}
+    assert get_agent_class("zero-shot") is ZeroShotAgent
+    with pytest.raises(ValueError, match="Agent nope not found"):
+        get_agent_class("nope")
+
+
+class RecordingStore(VectorStore):
+    def __init__(self) -> None:
+        self.texts: List[str] = []
+
+    def add_texts(
+        self, texts: Any, metadatas: Optional[List[dict]] = None, **kwargs: Any
+    ) -> List[str]:
+        self.texts += list(texts)
+        return [str(i) for i in range(len(self.texts))]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Any]:
+        return [Document(page_content=text) for text in self.texts[:k]]
+
+    @classmethod
+    def from_texts(cls, *args: Any, **kwargs: Any) -> "RecordingStore":
+        return cls()
+
+
+def test_lazy_vectorstore_builds_store_on_first_use() -> None:
+    built: List[RecordingStore] = []
+
+    def factory() -> VectorStore:
+        built.append(RecordingStore())
+        return built[-1]
+
+    store = LazyVectorStore(factory)
+    assert built == []
+    assert store.add_texts(["a", "b"]) == ["0", "1"]
+    assert [doc.page_content for doc in store.similarity_search("a", k=1)] == ["a"]
+    assert len(built) == 1 and built[0].texts == ["a", "b"]
+
+
+def test_lazy_vectorstore_from_texts_defers_embedding() -> None:
+    calls: List[str] = []
+
+    def embed(texts: List[str]) -> List[List[float]]:
+        calls.extend(texts)
+        return [[1.0, 0.0] for _ in texts]
+
+    embedding: Any = type(
+        "Embedding",
+        (),
+        {"embed_documents": staticmethod(embed), "embed_query": lambda self, t: []},
+    )()
+    store = LazyVectorStore.from_texts(["a"], embedding)
+    assert isinstance(store, LazyVectorStore) and calls == []
+    pytest.importorskip("faiss")
+    store.store
+    assert calls == ["a"]
+
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   codecs
+import time:       300 |        420 | encodings
+import time:        50 |       5000 | click
+import time:        10 |         10 |     click.types
+garbage line
+"""
+
+
+def test_parse_importtime_keeps_top_level_imports() -> None:
+    assert parse_importtime(IMPORTTIME) == [("click", 5000), ("encodings", 420)]
@@ -0,0 +1,94 @@
+"""Unit tests for incremental action parsing of streamed LLM output."""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Iterator, List
+
+from langchain.schema import BaseMessage, HumanMessage
+
+from chromegpt.agent.streaming import EarlyStopChatOpenAI, IncrementalActionParser
+
+ACTION = '{"action": "goto", "action_input": "https://example.com"}'
+CHUNKS = ["Action:\n", ACTION[:20], ACTION[20:], "\nObservation: made up"]
+
+
+class FakeStreamingLLM(EarlyStopChatOpenAI):
+    read: List[str] = []
+
+    def completion_with_retry(self, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        for chunk in CHUNKS:
+            self.read.append(chunk)
+            yield {"choices": [{"delta": {"content": chunk}}]}
+
+    async def acompletion_with_retry(self, **kwargs: Any) -> Any:
+        async def stream() -> AsyncIterator[Dict[str, Any]]:
+            for chunk in self.completion_with_retry(**kwargs):
+                yield chunk
+
+        return stream()
+
+
+def _feed(parser: IncrementalActionParser, text: str, chunk_size: int = 3) -> bool:
+    done = False
+    for i in range(0, len(text), chunk_size):
+        done = parser.feed(text[i : i + chunk_size])
+        if done:
+            break
+    return done
+
+
+def test_react_action_stops_at_closing_brace() -> None:
+    """Test that a ReAct action is parsed before the trailing text"""
+    parser = IncrementalActionParser()
+    text = (
+        'Thought: go to the site\nAction:\n```\n{"action": "goto", "action_input":'
+        ' "https://example.com/{id}"}\n```\nObservation: made up'
+    )
+    assert _feed(parser, text)
+    assert parser.action == {
+        "action": "goto",
+        "action_input": "https://example.com/{id}",
+    }
+    completion = parser.completion()
+    assert completion.endswith("```") and "Observation" not in completion
+
+
+def test_autogpt_nested_command() -> None:
+    """Test that nested objects only complete at the top level"""
+    parser = IncrementalActionParser()
+    response = {
+        "thoughts": {"text": "t", "reasoning": "r"},
+        "command": {"name": "click", "args": {"button_text": 'Contact "us"'}},
+    }
+    assert _feed(parser, json.dumps(response) + " trailing")
+    assert parser.action == response
+    assert parser.completion() == json.dumps(response)
+
+
+def test_final_answer_is_not_cut() -> None:
+    """Test that final answers are streamed in full"""
+    parser = IncrementalActionParser()
+    assert not _feed(parser, 'Final Answer: {"action": "x"} and more')
+    assert parser.completion() == 'Final Answer: {"action": "x"} and more'
+
+
+def test_action_list_is_parsed_whole() -> None:
+    """Test that a list of actions is only complete at the closing bracket"""
+    parser = IncrementalActionParser()
+    actions = [
+        {"action": "goto", "action_input": "https://example.com"},
+        {"action": "goto", "action_input": "https://example.org"},
+    ]
+    assert _feed(parser, "Action:\n```\n" + json.dumps(actions) + "\n```\nmore")
+    assert parser.action == actions
+
+
+def test_early_stop_sync_and_async() -> None:
+    """Test that both paths stop reading the stream after the action"""
+    llm = FakeStreamingLLM(openai_api_key="test")  # type: ignore
+    messages: List[BaseMessage] = [HumanMessage(content="go")]
+    assert llm(messages).content == "Action:\n" + ACTION
+    assert llm.read == CHUNKS[:3]
+    llm.read.clear()
+    result = asyncio.run(llm.agenerate([messages]))
+    assert result.generations[0][0].text == "Action:\n" + ACTION
+    assert llm.read == CHUNKS[:3]
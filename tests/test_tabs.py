@@ -0,0 +1,91 @@
+"""Tests for named tabs."""
+from typing import Any
+
+from chromegpt.tools.tabs import TabManager
+from tests.fake_driver import TabbedDriver
+from tests.fake_driver import make_selenium as make_wrapper
+
+
+def test_tabs_are_named_and_switched() -> None:
+    driver = TabbedDriver("https://start.com")
+    tabs = TabManager(driver)  # type: ignore
+    assert tabs.open("https://www.shop.com/a") == "shop.com"
+    assert tabs.open("https://shop.com/b") == "shop.com-2"
+    assert driver.current_window_handle == "w0" and tabs.active == "main"
+    assert tabs.switch("shop.com-2") and driver.current_url == "https://shop.com/b"
+    assert not tabs.switch("nope")
+    # A popup opened by the website becomes the active tab
+    driver.execute_script("window.open(arguments[0], '_blank');", "https://pop.com")
+    tabs.switch_to_active()
+    assert tabs.active == "tab" and driver.current_url == "https://pop.com"
+
+    tabs.close("tab")
+    assert tabs.active == "shop.com-2" and driver.current_url == "https://shop.com/b"
+    tabs.close("shop.com")
+    assert tabs.names() == ["main", "shop.com-2"]
+    # Tabs closed by the website are dropped
+    driver.switch_to.window("w0")
+    driver.close()
+    driver.switch_to.window("w2")
+    assert tabs.names() == ["shop.com-2"]
+    tabs.close("shop.com-2")
+    assert tabs.names() == ["shop.com-2"]  # The last tab stays open
+
+
+def test_opening_past_max_tabs_closes_least_recently_used() -> None:
+    driver = TabbedDriver("https://start.com")
+    tabs = TabManager(driver, max_tabs=3)  # type: ignore
+    tabs.open("https://a.com")
+    tabs.open("https://b.com")
+    tabs.switch("a.com")
+    tabs.switch("main")
+    tabs.open("https://c.com")
+    assert tabs.names() == ["a.com", "main", "c.com"]
+    assert sorted(driver.urls.values()) == [
+        "https://a.com",
+        "https://c.com",
+        "https://start.com",
+    ]
+    assert driver.current_url == "https://start.com"
+
+
+def make_selenium() -> Any:
+    driver: Any = TabbedDriver("https://start.com")
+    selenium = make_wrapper(driver, tabs=TabManager(driver, max_tabs=3))
+    selenium.describe_website = lambda: f"Website: {selenium.driver.current_url}"
+    return selenium
+
+
+def test_open_and_switch_tab_tools() -> None:
+    selenium = make_selenium()
+    assert selenium.open_tab("shop.com").startswith("Invalid url")
+    assert (
+        selenium.open_tab("https://shop.com")
+        == "Opened tab 'shop.com'. Website: https://shop.com"
+    )
+    assert (
+        selenium.switch_tab("'main'")
+        == "Switched to tab 'main'. Website: https://start.com"
+    )
+    assert (
+        selenium.switch_tab("cart")
+        == 'No tab named \'cart\'. Open tabs: ["shop.com", "main"]'
+    )
+
+
+def test_compare_pages_describes_each_tab_and_keeps_them_open() -> None:
+    selenium = make_selenium()
+    output = selenium.compare_pages("https://a.com, not a url, https://b.com")
+    assert "Tab 'a.com' (https://a.com): Website: https://a.com" in output
+    assert "Tab 'b.com' (https://b.com): Website: https://b.com" in output
+    assert output.endswith(
+        "Use switch_tab with a tab name to continue on one of these pages."
+    )
+    assert selenium.driver.current_url == "https://start.com"
+    assert selenium.tabs.names() == ["main", "a.com", "b.com"]
+    # Only as many pages as fit next to the active tab are opened
+    output = selenium.compare_pages(
+        '["https://c.com", "https://d.com", "https://e.com"]'
+    )
+    assert "e.com" not in output and selenium.tabs.names() == ["main", "c.com", "d.com"]
+    assert selenium.compare_pages("nothing").startswith("No valid urls")
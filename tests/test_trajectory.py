@@ -0,0 +1,114 @@
+"""Unit tests for recording and replaying trajectories."""
+from pathlib import Path
+from typing import List
+
+from langchain.agents import Tool
+from langchain.schema import AgentAction
+
+from chromegpt.agent.trajectory import (
+    TrajectoryReplayer,
+    TrajectoryStore,
+    fill_placeholders,
+    parameterize,
+)
+
+
+def make_tools(calls: List[str], broken: bool = False) -> List[Tool]:
+    def goto(url: str) -> str:
+        calls.append(f"goto {url}")
+        return f"Current window displays {url}"
+
+    def fill_form(form_input: str) -> str:
+        calls.append(f"fill_form {form_input}")
+        if broken:
+            return "Cannot find form with input: email."
+        return f"Successfully filled out form with input: {form_input}, website changed"
+
+    return [
+        Tool(name="goto", func=goto, description="goto"),
+        Tool(name="fill_form", func=fill_form, description="fill_form"),
+    ]
+
+
+TASK = "Subscribe bob@example.com to the newsletter on https://news.com"
+STEPS = [
+    (AgentAction("goto", "https://news.com", ""), "Current window displays ..."),
+    (AgentAction("click", "subscribe", ""), "No interactable element found"),
+    (
+        AgentAction("fill_form", '{"email": "bob@example.com"}', ""),
+        "Successfully filled out form, website changed after filling out form.",
+    ),
+]
+
+
+def test_parameterize() -> None:
+    template, params = parameterize(TASK)
+    assert template == "subscribe <<p0>> to the newsletter on <<p1>>"
+    assert params == ["bob@example.com", "https://news.com"]
+    assert parameterize("Subscribe ann@x.org to the  newsletter on https://a.io") == (
+        template,
+        ["ann@x.org", "https://a.io"],
+    )
+
+
+def test_replay_with_new_values(tmp_path: Path) -> None:
+    store = TrajectoryStore(str(tmp_path))
+    assert store.record(TASK, STEPS, "Subscribed bob@example.com.")
+    calls: List[str] = []
+    replayer = TrajectoryReplayer(TrajectoryStore(str(tmp_path)), make_tools(calls))
+    result = replayer.replay("Subscribe ann@x.org to the newsletter on https://a.io")
+    # the failed click isn't part of the plan
+    assert calls == ["goto https://a.io", 'fill_form {"email": "ann@x.org"}']
+    assert result.output == "Subscribed ann@x.org."
+
+
+def test_divergence_hands_off(tmp_path: Path) -> None:
+    store = TrajectoryStore(str(tmp_path), max_failures=1)
+    store.record(TASK, STEPS, "Subscribed.")
+    calls: List[str] = []
+    replayer = TrajectoryReplayer(store, make_tools(calls, broken=True))
+    result = replayer.replay(TASK)
+    assert result.output is None
+    assert [action.tool for action, _ in result.steps] == ["goto", "fill_form"]
+    assert "already completed" in result.handoff(TASK)
+    # the trajectory is dropped after max_failures failed replays
+    assert store.match(TASK) is None
+
+
+def test_unreplayable_task_not_recorded(tmp_path: Path) -> None:
+    store = TrajectoryStore(str(tmp_path))
+    steps = [(AgentAction("goto", "https://news.com", ""), "...")]
+    # the email doesn't show up in any step
+    assert not store.record(TASK, steps, "Done.")
+
+
+def test_short_numbers_only_replace_whole_inputs(tmp_path: Path) -> None:
+    task = "Book a table for 2 at https://resto.com"
+    _, params = parameterize(task)
+    assert params == ["2", "https://resto.com"]
+    url = "https://resto.com/2024-05-12/booking?party=2"
+    assert (
+        fill_placeholders(url, params, reverse=True)
+        == "<<p1>>/2024-05-12/booking?party=2"
+    )
+    assert fill_placeholders({"party": "2"}, params, reverse=True) == {
+        "party": "<<p0>>"
+    }
+    # The party size only shows up inside the url, so the plan is task specific
+    store = TrajectoryStore(str(tmp_path))
+    steps = [(AgentAction("goto", url, ""), "Current window displays ...")]
+    assert not store.record(task, steps, "Booked.")
+    # Filled in as a form value it is a parameter, the date stays untouched
+    steps.append(
+        (
+            AgentAction("fill_form", {"date": "2024-05-12", "party": "2"}, ""),
+            "Successfully filled out form, website changed",
+        )
+    )
+    assert store.record(task, steps, "Booked.")
+    match = store.match("Book a table for 4 at https://resto.com")
+    assert match is not None
+    trajectory, new_params = match
+    filled = fill_placeholders(trajectory["steps"][1]["tool_input"], new_params)
+    assert filled == {"date": "2024-05-12", "party": "4"}
+    assert fill_placeholders(trajectory["steps"][0]["tool_input"], new_params) == url
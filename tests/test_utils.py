@@ -0,0 +1,8 @@
+"""Unit tests for the shared tool helpers."""
+from chromegpt.tools.utils import percentiles
+
+
+def test_percentiles() -> None:
+    assert percentiles([]) == {"p50": None, "p90": None, "p99": None}
+    values = [float(i) for i in range(1, 101)]
+    assert percentiles(values) == {"p50": 50.0, "p90": 90.0, "p99": 99.0}